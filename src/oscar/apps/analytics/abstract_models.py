@@ -1,6 +1,7 @@
 from decimal import Decimal
 
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from oscar.core.compat import AUTH_USER_MODEL
@@ -29,6 +30,10 @@ class AbstractProductRecord(Model):
 
     # Product score - used within search
     score = models.FloatField(_('Score'), default=0.00)
+    date_scored = models.DateTimeField(
+        _('Date Scored'), blank=True, null=True)
+    # Decaying score of the old activity that was folded into this record
+    folded_score = models.FloatField(_('Folded Score'), blank=True, null=True)
 
     class Meta:
         abstract = True
@@ -41,6 +46,40 @@ class AbstractProductRecord(Model):
         return _("Record for '%s'") % self.product
 
 
+class AbstractProductActivity(Model):
+    """
+    The views, basket additions and purchases of a product during a period
+    of time.
+
+    These are used to calculate popularity scores that decay over time.
+    """
+
+    product = models.ForeignKey(
+        'catalogue.Product', verbose_name=_("Product"),
+        related_name='activity', on_delete=models.CASCADE)
+    period_start = models.DateTimeField(_('Period Start'))
+
+    num_views = models.PositiveIntegerField(_('Views'), default=0)
+    num_basket_additions = models.PositiveIntegerField(
+        _('Basket Additions'), default=0)
+    num_purchases = models.PositiveIntegerField(_('Purchases'), default=0)
+
+    date_updated = models.DateTimeField(
+        _('Date Updated'), default=timezone.now, db_index=True)
+
+    class Meta:
+        abstract = True
+        app_label = 'analytics'
+        ordering = ['-period_start']
+        unique_together = ('product', 'period_start')
+        verbose_name = _('Product activity')
+        verbose_name_plural = _('Product activity')
+
+    def __str__(self):
+        return _("Activity of '%(product)s' from %(period_start)s") % {
+            'product': self.product, 'period_start': self.period_start}
+
+
 class AbstractUserRecord(Model):
     """
     A record of a user's activity.
@@ -75,6 +114,12 @@ class AbstractUserRecord(Model):
 
 
 class AbstractUserProductView(Model):
+    """
+    A user viewing a product.
+
+    Repeated views of a product by a user on the same day are compacted into
+    a single record by the ``oscar_compact_product_views`` command.
+    """
 
     user = models.ForeignKey(
         AUTH_USER_MODEL, verbose_name=_("User"),
@@ -83,7 +128,9 @@ class AbstractUserProductView(Model):
         'catalogue.Product',
         on_delete=models.CASCADE,
         verbose_name=_("Product"))
-    date_created = models.DateTimeField(_("Date Created"), auto_now_add=True)
+    num_views = models.PositiveIntegerField(_('Views'), default=1)
+    date_created = models.DateTimeField(
+        _("Date Created"), auto_now_add=True, db_index=True)
 
     class Meta:
         abstract = True
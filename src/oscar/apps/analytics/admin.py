@@ -9,7 +9,7 @@ class ProductRecordAdmin(admin.ModelAdmin):
 
 
 class UserProductViewAdmin(admin.ModelAdmin):
-    list_display = ('user', 'product', 'date_created')
+    list_display = ('user', 'product', 'num_views', 'date_created')
 
 
 class UserRecordAdmin(admin.ModelAdmin):
@@ -0,0 +1,217 @@
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict, deque
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from oscar.core.loading import get_class, get_model
+
+ProductRecord = get_model('analytics', 'ProductRecord')
+UserProductView = get_model('analytics', 'UserProductView')
+UserRecord = get_model('analytics', 'UserRecord')
+UserSearch = get_model('analytics', 'UserSearch')
+get_counter_backend = get_class('analytics.counters', 'get_counter_backend')
+record_product_activity = get_class(
+    'analytics.scores', 'record_product_activity')
+
+logger = logging.getLogger('oscar.analytics')
+
+# Event kinds
+PRODUCT_COUNT, USER_COUNT, USER_ORDER, PRODUCT_VIEW, SEARCH = range(5)
+
+
+class EventBuffer(object):
+    """
+    An in-process queue of analytics events.
+
+    Receivers append events to the buffer instead of writing to the
+    database.  Flushing the buffer aggregates the events into one delta per
+    record and field and writes all records at once, so a product viewed a
+    hundred times between two flushes is only written once.
+
+    A background thread flushes the buffer every
+    ``OSCAR_ANALYTICS_FLUSH_INTERVAL`` seconds, and as soon as it holds
+    ``OSCAR_ANALYTICS_BUFFER_FLUSH_SIZE`` events, so events are never written
+    on the request path.  The buffer is also flushed when the process exits.
+    Events that arrive while the buffer holds
+    ``OSCAR_ANALYTICS_BUFFER_MAX_SIZE`` events push out the oldest ones, and
+    events that fail to be written are retried once with the next flush.
+    Dropped events are counted and logged.
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self.events = deque(maxlen=max_size)
+        self.failed_events = []
+        self.num_dropped = 0
+        self.lock = threading.Lock()
+        self.flusher = None
+
+    # Recording events
+
+    def add(self, kind, *args):
+        if self.max_size is not None and len(self.events) >= self.max_size:
+            # Appending pushes out the oldest event
+            self.num_dropped += 1
+        self.events.append((kind, args))
+        if settings.OSCAR_ANALYTICS_FLUSH_INTERVAL:
+            self.start_flusher()
+        if len(self.events) >= settings.OSCAR_ANALYTICS_BUFFER_FLUSH_SIZE:
+            # Let the flusher write the events, outside of this request and
+            # its transaction
+            self.start_flusher().wake()
+
+    def record_product(self, product_id, field_name, increment=1):
+        self.add(PRODUCT_COUNT, product_id, field_name, increment)
+
+    def record_user(self, user_id, field_name, increment=1):
+        self.add(USER_COUNT, user_id, field_name, increment)
+
+    def record_user_order(self, user_id, order):
+        self.add(USER_ORDER, user_id, order.num_lines, order.num_items,
+                 order.total_incl_tax, order.date_placed)
+
+    def record_product_view(self, user_id, product_id):
+        self.add(PRODUCT_VIEW, user_id, product_id)
+
+    def record_search(self, user_id, query):
+        self.add(SEARCH, user_id, query)
+
+    # Flushing
+
+    def start_flusher(self):
+        """
+        Start the flusher thread if it isn't running, and return it
+        """
+        flusher = self.flusher
+        if flusher is not None and flusher.is_alive():
+            return flusher
+        with self.lock:
+            if self.flusher is None or not self.flusher.is_alive():
+                self.flusher = EventFlusher(
+                    self, settings.OSCAR_ANALYTICS_FLUSH_INTERVAL)
+                self.flusher.start()
+            return self.flusher
+
+    def drain(self):
+        """
+        Remove and return all buffered events
+        """
+        events = []
+        while True:
+            try:
+                events.append(self.events.popleft())
+            except IndexError:
+                return events
+
+    def flush(self):
+        """
+        Write all buffered events to the database and return the number of
+        events written
+        """
+        with self.lock:
+            retried, self.failed_events = self.failed_events, []
+            events = retried + self.drain()
+            num_written = len(events)
+            if events:
+                try:
+                    self.write(events)
+                except Exception:
+                    logger.exception(
+                        "Error when writing %d analytics events", len(events))
+                    # Retry the new events with the next flush, without the
+                    # retried ones in case they caused the error
+                    self.failed_events = events[len(retried):]
+                    self.num_dropped += len(retried)
+                    num_written = 0
+            num_dropped, self.num_dropped = self.num_dropped, 0
+        if num_dropped:
+            logger.warning("Dropped %d analytics events", num_dropped)
+        return num_written
+
+    def aggregate(self, events):
+        """
+        Return the deltas of the product and user records, and the product
+        views and searches to create, for a list of events.  Repeated views
+        of a product by a user are collapsed into one.
+        """
+        product_deltas = defaultdict(Counter)
+        user_deltas = defaultdict(Counter)
+        last_orders = {}
+        views, searches = Counter(), []
+        for kind, args in events:
+            if kind == PRODUCT_COUNT:
+                product_id, field_name, increment = args
+                product_deltas[product_id][field_name] += increment
+            elif kind == USER_COUNT:
+                user_id, field_name, increment = args
+                user_deltas[user_id][field_name] += increment
+            elif kind == USER_ORDER:
+                user_id, num_lines, num_items, total, date_placed = args
+                deltas = user_deltas[user_id]
+                deltas['num_orders'] += 1
+                deltas['num_order_lines'] += num_lines
+                deltas['num_order_items'] += num_items
+                deltas['total_spent'] += total or Decimal('0.00')
+                if date_placed is not None:
+                    last_orders[user_id] = max(
+                        date_placed, last_orders.get(user_id, date_placed))
+            elif kind == PRODUCT_VIEW:
+                views[args] += 1
+            elif kind == SEARCH:
+                user_id, query = args
+                searches.append(UserSearch(user_id=user_id, query=query))
+        views = [
+            UserProductView(
+                user_id=user_id, product_id=product_id, num_views=num_views)
+            for (user_id, product_id), num_views in views.items()]
+        return product_deltas, user_deltas, last_orders, views, searches
+
+    def write(self, events):
+        product_deltas, user_deltas, last_orders, views, searches = \
+            self.aggregate(events)
+        counters = get_counter_backend()
+        with transaction.atomic():
+            counters.increment(ProductRecord, 'product', product_deltas)
+            record_product_activity(product_deltas, counters)
+            counters.increment(
+                UserRecord, 'user', user_deltas,
+                {user_id: {'date_last_order': date_placed}
+                 for user_id, date_placed in last_orders.items()})
+            UserProductView._default_manager.bulk_create(views)
+            UserSearch._default_manager.bulk_create(searches)
+
+
+class EventFlusher(threading.Thread):
+    """
+    A daemon thread that flushes an event buffer at a regular interval, and
+    whenever it's woken up
+    """
+
+    def __init__(self, buffer, interval):
+        super().__init__(name='oscar-analytics-flusher', daemon=True)
+        self.buffer = buffer
+        self.interval = interval
+        self.woken = threading.Event()
+
+    def wake(self):
+        self.woken.set()
+
+    def run(self):
+        while True:
+            # Without an interval, only flush when woken up
+            self.woken.wait(self.interval)
+            self.woken.clear()
+            try:
+                self.buffer.flush()
+            finally:
+                # Don't leave the connection of this thread open between
+                # flushes
+                connection.close()
+
+
+event_buffer = EventBuffer(settings.OSCAR_ANALYTICS_BUFFER_MAX_SIZE)
+atexit.register(event_buffer.flush)
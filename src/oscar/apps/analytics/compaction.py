@@ -0,0 +1,115 @@
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DateTimeField, IntegerField, Value, When
+from django.utils import timezone
+
+from oscar.core.loading import get_model
+
+UserProductView = get_model('analytics', 'UserProductView')
+
+
+class ProductViewCompactor(object):
+    """
+    Keeps the size of the ``UserProductView`` table bounded.
+
+    Compacting collapses the views of a product by a user on the same day
+    into the first of them, which keeps the number of views and the date of
+    the last one.  Pruning deletes the views older than a horizon.  Both
+    work in batches so they don't hold long locks.
+    """
+    batch_size = 1000
+
+    def get_day_start(self, day):
+        start = datetime.datetime.combine(day, datetime.time.min)
+        if settings.USE_TZ:
+            start = timezone.make_aware(start)
+        return start
+
+    def compact(self, days=7):
+        """
+        Compact the views of the last ``days`` complete days and return the
+        number of deleted records
+        """
+        if settings.USE_TZ:
+            today = timezone.localdate()
+        else:
+            today = datetime.date.today()
+        num_deleted = 0
+        for offset in range(days, 0, -1):
+            day = today - datetime.timedelta(days=offset)
+            num_deleted += self.compact_day(
+                self.get_day_start(day),
+                self.get_day_start(day + datetime.timedelta(days=1)))
+        return num_deleted
+
+    def compact_day(self, start, end):
+        """
+        Compact the views between two dates and return the number of deleted
+        records
+        """
+        # Maps users and products to the pk of their first view, their
+        # number of views and the date of the last one
+        views = {}
+        changed, duplicate_pks = set(), []
+        rows = UserProductView._default_manager.filter(
+            date_created__gte=start, date_created__lt=end
+        ).order_by('date_created', 'pk').values_list(
+            'pk', 'user_id', 'product_id', 'num_views', 'date_created')
+        for pk, user_id, product_id, num_views, date_created in rows.iterator():
+            key = (user_id, product_id)
+            if key in views:
+                first_pk, total, __ = views[key]
+                views[key] = (first_pk, total + num_views, date_created)
+                changed.add(key)
+                duplicate_pks.append(pk)
+            else:
+                views[key] = (pk, num_views, date_created)
+        compacted = [views[key] for key in changed]
+
+        with transaction.atomic():
+            for i in range(0, len(compacted), self.batch_size):
+                self.update_views(compacted[i:i + self.batch_size])
+            for i in range(0, len(duplicate_pks), self.batch_size):
+                UserProductView._default_manager.filter(
+                    pk__in=duplicate_pks[i:i + self.batch_size]).delete()
+        return len(duplicate_pks)
+
+    def update_views(self, views):
+        """
+        Set the number of views and date of a list of ``(pk, num_views,
+        date_created)`` tuples with a single UPDATE
+        """
+        UserProductView._default_manager.filter(
+            pk__in=[pk for pk, __, __ in views]
+        ).update(
+            num_views=Case(
+                *[When(pk=pk, then=Value(num_views))
+                  for pk, num_views, __ in views],
+                output_field=IntegerField()),
+            date_created=Case(
+                *[When(pk=pk, then=Value(date_created))
+                  for pk, __, date_created in views],
+                output_field=DateTimeField()))
+
+    def prune(self, days=None):
+        """
+        Delete the views older than a number of days, by default
+        ``OSCAR_ANALYTICS_VIEW_RETENTION_DAYS``, and return their number
+        """
+        if days is None:
+            days = settings.OSCAR_ANALYTICS_VIEW_RETENTION_DAYS
+        if days is None:
+            return 0
+        threshold = timezone.now() - datetime.timedelta(days=days)
+        old_views = UserProductView._default_manager.filter(
+            date_created__lt=threshold).order_by()
+        num_deleted = 0
+        while True:
+            pks = list(old_views.values_list(
+                'pk', flat=True)[:self.batch_size])
+            if not pks:
+                return num_deleted
+            UserProductView._default_manager.filter(pk__in=pks).delete()
+            num_deleted += len(pks)
@@ -0,0 +1,162 @@
+import sqlite3
+
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, transaction
+from django.db.models import F
+
+
+class CounterBackend(object):
+    """
+    Adds increments to the counters of analytics records, creating the
+    records that don't exist yet.
+
+    This backend works with any database: it updates each record and creates
+    it if no row was updated.
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+
+    def increment(self, model, key_field, increments, values=None):
+        """
+        Add increments to the counters of several records.
+
+        ``increments`` maps the value of ``key_field``, a unique field of
+        ``model``, to a dict of counter field names and increments.
+        ``key_field`` can also be a tuple of fields that are unique together,
+        in which case the keys are tuples of their values.  ``values``
+        optionally maps the same keys to a dict of field values to set.
+        """
+        values = values or {}
+        attnames = [field.attname for field in get_key_fields(model, key_field)]
+        for key, deltas in increments.items():
+            self.increment_record(
+                model, dict(zip(attnames, get_key_values(key_field, key))),
+                deltas, values.get(key))
+
+    def increment_record(self, model, filter_kwargs, deltas, values=None):
+        values = dict(values or {})
+        updates = dict(values)
+        for field_name, delta in deltas.items():
+            updates[field_name] = F(field_name) + delta
+        manager = model._default_manager.db_manager(self.using)
+        if manager.filter(**filter_kwargs).update(**updates):
+            return
+        values.update(filter_kwargs)
+        values.update(deltas)
+        try:
+            with transaction.atomic(using=self.using):
+                manager.create(**values)
+        except IntegrityError:
+            # The record was created concurrently
+            manager.filter(**filter_kwargs).update(**updates)
+
+
+class UpsertCounterBackend(CounterBackend):
+    """
+    Adds increments with ``INSERT ... ON CONFLICT DO UPDATE`` statements,
+    which PostgreSQL (9.5+) and SQLite (3.24+) support.  All records are
+    updated with a single statement per batch and no increment is lost to
+    concurrent inserts.
+    """
+    # SQLite doesn't accept more than 999 parameters per statement
+    max_params = 999
+
+    def increment(self, model, key_field, increments, values=None):
+        if not increments:
+            return
+        values = values or {}
+        keys = get_key_fields(model, key_field)
+        counter_names = set()
+        value_names = set()
+        for deltas in increments.values():
+            counter_names.update(deltas)
+        for record_values in values.values():
+            value_names.update(record_values)
+
+        fields = keys + [
+            field for field in model._meta.concrete_fields
+            if not field.primary_key and field not in keys]
+        rows = [
+            self.get_row(fields, get_key_values(key_field, key_value), deltas,
+                         values.get(key_value, {}), value_names)
+            for key_value, deltas in increments.items()]
+
+        batch_size = max(self.max_params // len(fields), 1)
+        for start in range(0, len(rows), batch_size):
+            self.upsert(model, keys, fields, counter_names, value_names,
+                        rows[start:start + batch_size])
+
+    def get_row(self, fields, key_values, deltas, values, value_names):
+        row = list(key_values)
+        for field in fields[len(row):]:
+            if field.name in deltas:
+                value = deltas[field.name]
+            elif field.name in values:
+                value = values[field.name]
+            elif field.name in value_names:
+                # Keep the current value of records that don't set it
+                value = None
+            else:
+                value = field.get_default()
+            row.append(value)
+        return row
+
+    def upsert(self, model, keys, fields, counter_names, value_names, rows):
+        connection = connections[self.using]
+        quote = connection.ops.quote_name
+        table = quote(model._meta.db_table)
+        assignments = []
+        for field in fields:
+            column = quote(field.column)
+            if field.name in counter_names:
+                assignments.append('%s = %s.%s + excluded.%s' % (
+                    column, table, column, column))
+            elif field.name in value_names:
+                assignments.append('%s = COALESCE(excluded.%s, %s.%s)' % (
+                    column, column, table, column))
+        if assignments:
+            action = 'DO UPDATE SET %s' % ', '.join(assignments)
+        else:
+            # Only create the missing records
+            action = 'DO NOTHING'
+        placeholders = '(%s)' % ', '.join(['%s'] * len(fields))
+        sql = 'INSERT INTO %s (%s) VALUES %s ON CONFLICT (%s) %s' % (
+            table,
+            ', '.join(quote(field.column) for field in fields),
+            ', '.join([placeholders] * len(rows)),
+            ', '.join(quote(key.column) for key in keys),
+            action)
+        params = []
+        for row in rows:
+            params.extend(
+                field.get_db_prep_save(value, connection)
+                for field, value in zip(fields, row))
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+
+def get_key_fields(model, key_field):
+    if isinstance(key_field, str):
+        key_field = (key_field,)
+    return [model._meta.get_field(name) for name in key_field]
+
+
+def get_key_values(key_field, key):
+    return (key,) if isinstance(key_field, str) else tuple(key)
+
+
+def supports_upsert(connection):
+    if connection.vendor == 'postgresql':
+        return connection.pg_version >= 90500
+    if connection.vendor == 'sqlite':
+        return sqlite3.sqlite_version_info >= (3, 24)
+    return False
+
+
+def get_counter_backend(using=DEFAULT_DB_ALIAS):
+    """
+    Return the best counter backend for a database
+    """
+    if supports_upsert(connections[using]):
+        return UpsertCounterBackend(using)
+    return CounterBackend(using)
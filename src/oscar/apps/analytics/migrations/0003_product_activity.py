@@ -0,0 +1,43 @@
+# Generated by Django 2.1.15 on 2026-10-18 06:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogue', '0013_auto_20170821_1548'),
+        ('analytics', '0002_auto_20140827_1705'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductActivity',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateTimeField(verbose_name='Period Start')),
+                ('num_views', models.PositiveIntegerField(default=0, verbose_name='Views')),
+                ('num_basket_additions', models.PositiveIntegerField(default=0, verbose_name='Basket Additions')),
+                ('num_purchases', models.PositiveIntegerField(default=0, verbose_name='Purchases')),
+                ('date_updated', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Date Updated')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='catalogue.Product', verbose_name='Product')),
+            ],
+            options={
+                'verbose_name': 'Product activity',
+                'verbose_name_plural': 'Product activity',
+                'ordering': ['-period_start'],
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='productrecord',
+            name='date_scored',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Date Scored'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='productactivity',
+            unique_together={('product', 'period_start')},
+        ),
+    ]
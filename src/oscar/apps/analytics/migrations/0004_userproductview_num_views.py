@@ -0,0 +1,23 @@
+# Generated by Django 2.1.15 on 2026-10-18 06:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_product_activity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userproductview',
+            name='num_views',
+            field=models.PositiveIntegerField(default=1, verbose_name='Views'),
+        ),
+        migrations.AlterField(
+            model_name='userproductview',
+            name='date_created',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Date Created'),
+        ),
+    ]
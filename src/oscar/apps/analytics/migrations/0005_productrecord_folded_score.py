@@ -0,0 +1,18 @@
+# Generated by Django 2.1.15 on 2026-10-18 07:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_userproductview_num_views'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productrecord',
+            name='folded_score',
+            field=models.FloatField(blank=True, null=True, verbose_name='Folded Score'),
+        ),
+    ]
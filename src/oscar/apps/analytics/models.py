@@ -1,5 +1,5 @@
 from oscar.apps.analytics.abstract_models import (
-    AbstractProductRecord, AbstractUserProductView,
+    AbstractProductActivity, AbstractProductRecord, AbstractUserProductView,
     AbstractUserRecord, AbstractUserSearch)
 from oscar.core.loading import is_model_registered
 
@@ -13,6 +13,13 @@ if not is_model_registered('analytics', 'ProductRecord'):
     __all__.append('ProductRecord')
 
 
+if not is_model_registered('analytics', 'ProductActivity'):
+    class ProductActivity(AbstractProductActivity):
+        pass
+
+    __all__.append('ProductActivity')
+
+
 if not is_model_registered('analytics', 'UserRecord'):
     class UserRecord(AbstractUserRecord):
         pass
@@ -1,75 +1,64 @@
-import logging
+from collections import Counter, defaultdict
 
-from django.db import IntegrityError
-from django.db.models import F
+from django.conf import settings
 from django.dispatch import receiver
 
 from oscar.apps.basket.signals import basket_addition
 from oscar.apps.catalogue.signals import product_viewed
 from oscar.apps.order.signals import order_placed
 from oscar.apps.search.signals import user_search
-from oscar.core.loading import get_classes
+from oscar.core.loading import get_class, get_classes
 
 UserSearch, UserRecord, ProductRecord, UserProductView = get_classes(
     'analytics.models', ['UserSearch', 'UserRecord', 'ProductRecord',
                          'UserProductView'])
+event_buffer = get_class('analytics.buffer', 'event_buffer')
+get_counter_backend = get_class('analytics.counters', 'get_counter_backend')
+record_product_activity = get_class(
+    'analytics.scores', 'record_product_activity')
 
 # Helpers
 
-logger = logging.getLogger('oscar.analytics')
-
 
 def _update_counter(model, field_name, filter_kwargs, increment=1):
     """
-    Efficiently updates a counter field by a given increment. Uses Django's
-    update() call to fetch and update in one query.
-
-    TODO: This has a race condition, we should use UPSERT here
+    Efficiently updates a counter field by a given increment, creating the
+    record if needed. Uses an UPSERT statement on databases that support it.
 
     :param model: The model class of the recording model
     :param field_name: The name of the field to update
-    :param filter_kwargs: Parameters to the ORM's filter() function to get the
-                          correct instance
+    :param filter_kwargs: The unique field of the record and its value, e.g.
+                          ``{'product': product}``
     """
-    try:
-        record = model.objects.filter(**filter_kwargs)
-        affected = record.update(**{field_name: F(field_name) + increment})
-        if not affected:
-            filter_kwargs[field_name] = increment
-            model.objects.create(**filter_kwargs)
-    except IntegrityError:      # pragma: no cover
-        # get_or_create has a race condition (we should use upsert in supported)
-        # databases. For now just ignore these errors
-        logger.error(
-            "IntegrityError when updating analytics counter for %s", model)
+    (key_field, key), = filter_kwargs.items()
+    get_counter_backend().increment(
+        model, key_field, {getattr(key, 'pk', key): {field_name: increment}})
+
+
+def _buffer_events():
+    return settings.OSCAR_ANALYTICS_BUFFER
 
 
 def _record_products_in_order(order):
-    # surely there's a way to do this without causing a query for each line?
-    for line in order.lines.all():
-        _update_counter(
-            ProductRecord, 'num_purchases',
-            {'product': line.product}, line.quantity)
+    increments = defaultdict(Counter)
+    for product_id, quantity in order.lines.exclude(
+            product=None).values_list('product_id', 'quantity'):
+        increments[product_id]['num_purchases'] += quantity
+    counters = get_counter_backend()
+    counters.increment(ProductRecord, 'product', increments)
+    record_product_activity(increments, counters)
 
 
 def _record_user_order(user, order):
-    try:
-        record = UserRecord.objects.filter(user=user)
-        affected = record.update(
-            num_orders=F('num_orders') + 1,
-            num_order_lines=F('num_order_lines') + order.num_lines,
-            num_order_items=F('num_order_items') + order.num_items,
-            total_spent=F('total_spent') + order.total_incl_tax,
-            date_last_order=order.date_placed)
-        if not affected:
-            UserRecord.objects.create(
-                user=user, num_orders=1, num_order_lines=order.num_lines,
-                num_order_items=order.num_items,
-                total_spent=order.total_incl_tax,
-                date_last_order=order.date_placed)
-    except IntegrityError:      # pragma: no cover
-        logger.error(
-            "IntegrityError in analytics when recording a user order.")
+    get_counter_backend().increment(
+        UserRecord, 'user',
+        {user.pk: {
+            'num_orders': 1,
+            'num_order_lines': order.num_lines,
+            'num_order_items': order.num_items,
+            'total_spent': order.total_incl_tax,
+        }},
+        {user.pk: {'date_last_order': order.date_placed}})
 
 
 # Receivers
@@ -78,7 +67,14 @@ def _record_user_order(user, order):
 def receive_product_view(sender, product, user, **kwargs):
     if kwargs.get('raw', False):
         return
+    if _buffer_events():
+        event_buffer.record_product(product.id, 'num_views')
+        if user and user.is_authenticated:
+            event_buffer.record_user(user.id, 'num_product_views')
+            event_buffer.record_product_view(user.id, product.id)
+        return
     _update_counter(ProductRecord, 'num_views', {'product': product})
+    record_product_activity({product.id: {'num_views': 1}})
     if user and user.is_authenticated:
         _update_counter(UserRecord, 'num_product_views', {'user': user})
         UserProductView.objects.create(product=product, user=user)
@@ -87,15 +83,24 @@ def receive_product_view(sender, product, user, **kwargs):
 @receiver(user_search)
 def receive_product_search(sender, query, user, **kwargs):
     if user and user.is_authenticated and not kwargs.get('raw', False):
-        UserSearch._default_manager.create(user=user, query=query)
+        if _buffer_events():
+            event_buffer.record_search(user.id, query)
+        else:
+            UserSearch._default_manager.create(user=user, query=query)
 
 
 @receiver(basket_addition)
 def receive_basket_addition(sender, product, user, **kwargs):
     if kwargs.get('raw', False):
         return
+    if _buffer_events():
+        event_buffer.record_product(product.id, 'num_basket_additions')
+        if user and user.is_authenticated:
+            event_buffer.record_user(user.id, 'num_basket_additions')
+        return
     _update_counter(
         ProductRecord, 'num_basket_additions', {'product': product})
+    record_product_activity({product.id: {'num_basket_additions': 1}})
     if user and user.is_authenticated:
         _update_counter(UserRecord, 'num_basket_additions', {'user': user})
 
@@ -104,6 +109,13 @@ def receive_basket_addition(sender, product, user, **kwargs):
 def receive_order_placed(sender, order, user, **kwargs):
     if kwargs.get('raw', False):
         return
+    if _buffer_events():
+        for product_id, quantity in order.lines.exclude(
+                product=None).values_list('product_id', 'quantity'):
+            event_buffer.record_product(product_id, 'num_purchases', quantity)
+        if user and user.is_authenticated:
+            event_buffer.record_user_order(user.id, order)
+        return
     _record_products_in_order(order)
     if user and user.is_authenticated:
         _record_user_order(user, order)
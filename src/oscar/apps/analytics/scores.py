@@ -1,9 +1,54 @@
-from django.db.models import F
+import datetime
+import math
 
-from oscar.core.loading import get_model
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, FloatField, Max, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
+from oscar.core.loading import get_class, get_model
+
+ProductActivity = get_model('analytics', 'ProductActivity')
 ProductRecord = get_model('analytics', 'ProductRecord')
 Product = get_model('catalogue', 'Product')
+get_counter_backend = get_class('analytics.counters', 'get_counter_backend')
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def get_epoch(date):
+    return EPOCH if timezone.is_aware(date) else EPOCH.replace(tzinfo=None)
+
+
+def get_period_start(date):
+    """
+    Return the start of the activity period of a date
+    """
+    length = settings.OSCAR_ANALYTICS_ACTIVITY_PERIOD
+    epoch = get_epoch(date)
+    seconds = (date - epoch).total_seconds()
+    return epoch + datetime.timedelta(seconds=seconds - seconds % length)
+
+
+def record_product_activity(increments, counters=None):
+    """
+    Add the views, basket additions and purchases of products to their
+    activity in the current period.
+
+    ``increments`` maps product ids to a dict of field names and increments.
+    """
+    if not settings.OSCAR_ANALYTICS_DECAYING_SCORES or not increments:
+        return
+    now = timezone.now()
+    period_start = get_period_start(now)
+    counters = counters or get_counter_backend()
+    counters.increment(
+        ProductActivity, ('product', 'period_start'),
+        {(product_id, period_start): deltas
+         for product_id, deltas in increments.items()},
+        {(product_id, period_start): {'date_updated': now}
+         for product_id in increments})
 
 
 class Calculator(object):
@@ -15,11 +60,17 @@ class Calculator(object):
         'num_purchases': 5
     }
 
-    def __init__(self, logger):
+    batch_size = 1000
+
+    def __init__(self, logger, incremental=False):
         self.logger = logger
+        self.incremental = incremental
 
     def run(self):
-        self.calculate_scores()
+        if settings.OSCAR_ANALYTICS_DECAYING_SCORES:
+            self.calculate_decaying_scores()
+        else:
+            self.calculate_scores()
 
     def calculate_scores(self):
         self.logger.info("Calculating product scores")
@@ -28,3 +79,131 @@ class Calculator(object):
             self.weights[name] * F(name) for name in self.weights.keys()]
         ProductRecord.objects.update(
             score=sum(weighted_fields) / total_weight)
+
+    def calculate_decaying_scores(self):
+        """
+        Calculate scores from the activity of products, where each period
+        weighs half as much as the period one half-life later.
+
+        Scores are the base 2 logarithm of the weighted activity relative to
+        a fixed date rather than to now.  They are ordered like the decayed
+        popularity of products but don't change as time passes, so only the
+        scores of products with new activity need to be recalculated.
+        """
+        date_scored = timezone.now()
+        product_ids = ProductActivity.objects.order_by(
+            'product_id').values_list('product_id', flat=True).distinct()
+        last_scored = ProductRecord.objects.aggregate(
+            last_scored=Max('date_scored'))['last_scored']
+        if self.incremental and last_scored is not None:
+            self.logger.info(
+                "Calculating scores of products active since %s", last_scored)
+            product_ids = product_ids.filter(date_updated__gte=last_scored)
+        else:
+            self.logger.info("Calculating decaying product scores")
+            ProductRecord.objects.update(score=Coalesce(
+                'folded_score', Value(0.0, output_field=FloatField())))
+        product_ids = list(product_ids)
+        for start in range(0, len(product_ids), self.batch_size):
+            self.update_scores(
+                product_ids[start:start + self.batch_size], date_scored)
+        self.logger.info("Calculated the scores of %d products",
+                         len(product_ids))
+        self.fold_activity()
+
+    def get_activity(self, queryset):
+        """
+        Return a map of product ids to their periods and weighted activity
+        """
+        activity = {}
+        rows = queryset.order_by().values_list(
+            'product_id', 'period_start', *self.weights)
+        for product_id, period_start, *counts in rows:
+            weight = sum(self.weights[name] * count
+                         for name, count in zip(self.weights, counts))
+            if weight:
+                activity.setdefault(product_id, []).append(
+                    (period_start, weight))
+        return activity
+
+    def get_folded_scores(self, product_ids):
+        return dict(ProductRecord.objects.filter(
+            product_id__in=product_ids).values_list(
+                'product_id', 'folded_score'))
+
+    def update_scores(self, product_ids, date_scored):
+        activity = self.get_activity(
+            ProductActivity.objects.filter(product_id__in=product_ids))
+        folded_scores = self.get_folded_scores(product_ids)
+        values = {
+            product_id: {
+                'score': self.get_decaying_score(
+                    activity.get(product_id, []),
+                    folded_scores.get(product_id)),
+                'date_scored': date_scored,
+            }
+            for product_id in product_ids}
+        with transaction.atomic():
+            get_counter_backend().increment(
+                ProductRecord, 'product',
+                {product_id: {} for product_id in product_ids}, values)
+
+    def fold_activity(self):
+        """
+        Fold the activity older than OSCAR_ANALYTICS_ACTIVITY_RETENTION_DAYS
+        into the folded scores of products, and delete it.
+
+        Scores are relative to a fixed date, so the folded score of the old
+        activity of a product adds up with the score of its newer activity
+        exactly as the activity itself did.
+        """
+        retention_days = settings.OSCAR_ANALYTICS_ACTIVITY_RETENTION_DAYS
+        if retention_days is None:
+            return
+        before = get_period_start(
+            timezone.now() - datetime.timedelta(days=retention_days))
+        product_ids = list(ProductActivity.objects.filter(
+            period_start__lt=before).order_by('product_id').values_list(
+                'product_id', flat=True).distinct())
+        for start in range(0, len(product_ids), self.batch_size):
+            self.fold_product_activity(
+                product_ids[start:start + self.batch_size], before)
+        self.logger.info("Folded the old activity of %d products",
+                         len(product_ids))
+
+    def fold_product_activity(self, product_ids, before):
+        old_activity = ProductActivity.objects.filter(
+            product_id__in=product_ids, period_start__lt=before)
+        with transaction.atomic():
+            activity = self.get_activity(old_activity)
+            folded_scores = self.get_folded_scores(product_ids)
+            values = {
+                product_id: {
+                    'folded_score': self.get_decaying_score(
+                        activity.get(product_id, []),
+                        folded_scores.get(product_id), default=None),
+                }
+                for product_id in product_ids}
+            get_counter_backend().increment(
+                ProductRecord, 'product',
+                {product_id: {} for product_id in product_ids}, values)
+            old_activity.delete()
+
+    def get_decaying_score(self, activity, folded_score=None, default=0.0):
+        """
+        Return the score of a list of periods and weighted activity, and of
+        the activity already folded into a score
+        """
+        half_life = settings.OSCAR_ANALYTICS_SCORE_HALF_LIFE
+        exponents = [
+            (period_start - get_epoch(period_start)).total_seconds() / half_life
+            + math.log2(weight)
+            for period_start, weight in activity]
+        if folded_score is not None:
+            exponents.append(folded_score)
+        if not exponents:
+            return default
+        # Add up the powers of 2 without overflowing
+        largest = max(exponents)
+        return largest + math.log2(sum(
+            2 ** (exponent - largest) for exponent in exponents))
@@ -3,12 +3,13 @@ from decimal import Decimal as D
 
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
-from django.db import models
-from django.db.models import Sum
+from django.db import models, transaction
+from django.db.models import Case, IntegerField, Sum, Value, When
 from django.utils.encoding import smart_text
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 
+from oscar.apps.basket.signals import basket_merged
 from oscar.core.compat import AUTH_USER_MODEL
 from oscar.core.loading import get_class, get_classes
 from oscar.core.utils import get_default_currency, round_half_up
@@ -299,21 +300,73 @@ class AbstractBasket(Model):
         """
         Merges another basket with this one.
 
+        The lines are moved, updated and deleted with a constant number of
+        queries, inside a transaction which locks both baskets.
+
         :basket: The basket to merge into this one.
         :add_quantities: Whether to add line quantities when they are merged.
         """
-        # Use basket.lines.all instead of all_lines as this function is called
-        # before a strategy has been assigned.
-        for line_to_merge in basket.lines.all():
-            self.merge_line(line_to_merge, add_quantities)
-        basket.status = self.MERGED
-        basket.date_merged = now()
-        basket._lines = None
-        basket.save()
-        # Ensure all vouchers are moved to the new basket
-        for voucher in basket.vouchers.all():
-            basket.vouchers.remove(voucher)
-            self.vouchers.add(voucher)
+        if not self.can_be_edited:
+            raise PermissionDenied(
+                _("You cannot modify a %s basket") % (
+                    self.status.lower(),))
+        Line = self.lines.model
+        with transaction.atomic():
+            # Lock the baskets in a consistent order to avoid deadlocks
+            list(self.__class__._default_manager.select_for_update()
+                 .filter(pk__in=[self.pk, basket.pk]).order_by('pk'))
+
+            # Use basket.lines instead of all_lines as this function is
+            # called before a strategy has been assigned.
+            lines_to_merge = list(basket.lines.values_list(
+                'pk', 'line_reference', 'quantity'))
+            existing_lines = {
+                line_reference: (pk, quantity)
+                for line_reference, pk, quantity in self.lines.filter(
+                    line_reference__in=[
+                        line_reference for __, line_reference, __
+                        in lines_to_merge]
+                ).values_list('line_reference', 'pk', 'quantity')}
+
+            moved_ids, deleted_ids, quantities = [], [], {}
+            for pk, line_reference, quantity in lines_to_merge:
+                if line_reference not in existing_lines:
+                    moved_ids.append(pk)
+                    continue
+                # Line already exists - assume the max quantity is correct
+                # and delete the old
+                existing_pk, existing_quantity = existing_lines[line_reference]
+                if add_quantities:
+                    quantities[existing_pk] = existing_quantity + quantity
+                else:
+                    quantities[existing_pk] = max(existing_quantity, quantity)
+                deleted_ids.append(pk)
+
+            if moved_ids:
+                # Line attributes follow their lines
+                Line._default_manager.filter(pk__in=moved_ids).update(
+                    basket=self)
+            if quantities:
+                Line._default_manager.filter(pk__in=quantities).update(
+                    quantity=Case(
+                        *[When(pk=pk, then=Value(quantity))
+                          for pk, quantity in quantities.items()],
+                        output_field=IntegerField()))
+            if deleted_ids:
+                Line._default_manager.filter(pk__in=deleted_ids).delete()
+
+            basket.status = self.MERGED
+            basket.date_merged = now()
+            basket._lines = None
+            basket.save()
+            # Ensure all vouchers are moved to the new basket
+            vouchers = list(basket.vouchers.all())
+            if vouchers:
+                basket.vouchers.clear()
+                self.vouchers.add(*vouchers)
+        self._lines = None
+        basket_merged.send(
+            sender=self.__class__, basket=self, merged_basket=basket)
     merge.alters_data = True
 
     def freeze(self):
@@ -1,14 +1,22 @@
 from django.conf import settings
 from django.contrib import messages
 from django.core.signing import BadSignature, Signer
+from django.db import transaction
 from django.utils.functional import SimpleLazyObject, empty
 from django.utils.translation import gettext_lazy as _
 
-from oscar.core.loading import get_class, get_model
+from oscar.core.compat import get_user_model
+from oscar.core.loading import get_class, get_classes, get_model
 
 Applicator = get_class('offer.applicator', 'Applicator')
+applied_offers = get_class('offer.cache', 'applied_offers')
+BasketLinesSummary, BasketSummary = get_classes(
+    'basket.summary', ['BasketLinesSummary', 'BasketSummary'])
+basket_summaries = get_class('basket.summary', 'basket_summaries')
+closed_baskets = get_class('basket.utils', 'closed_baskets')
 Basket = get_model('basket', 'basket')
 Selector = get_class('partner.strategy', 'Selector')
+User = get_user_model()
 
 selector = Selector()
 
@@ -42,6 +50,20 @@ class BasketMiddleware:
 
             return basket
 
+        def load_basket_summary():
+            """
+            Return the summary of the basket, loading the basket only if the
+            summary isn't cached.
+            """
+            return self.get_basket_summary(request)
+
+        def load_basket_lines_summary():
+            """
+            Return the lines summary of the basket, loading the basket only
+            if the summary isn't cached.
+            """
+            return self.get_basket_lines_summary(request)
+
         def load_basket_hash():
             """
             Load the basket and return the basket hash
@@ -49,6 +71,10 @@ class BasketMiddleware:
             Note that we don't apply offers or check that every line has a
             stockrecord here.
             """
+            if settings.OSCAR_BASKET_TRUST_SIGNED_COOKIE:
+                basket_hash = self.get_trusted_basket_hash(request)
+                if basket_hash is not None:
+                    return basket_hash
             basket = self.get_basket(request)
             if basket.id:
                 return self.get_basket_hash(basket.id)
@@ -57,6 +83,9 @@ class BasketMiddleware:
         # when the attribute is accessed.
         request.basket = SimpleLazyObject(load_full_basket)
         request.basket_hash = SimpleLazyObject(load_basket_hash)
+        request.basket_summary = SimpleLazyObject(load_basket_summary)
+        request.basket_lines_summary = SimpleLazyObject(
+            load_basket_lines_summary)
 
         response = self.get_response(request)
         return self.process_response(request, response)
@@ -139,7 +168,7 @@ class BasketMiddleware:
             # that they have just signed in and we need to merge their cookie
             # basket into their user basket, then delete the cookie.
             try:
-                basket, __ = manager.get_or_create(owner=request.user)
+                basket = self.get_user_basket(request.user, manager)
             except Basket.MultipleObjectsReturned:
                 # Not sure quite how we end up here with multiple baskets.
                 # We merge them and create a fresh one
@@ -176,6 +205,99 @@ class BasketMiddleware:
 
         return basket
 
+    def get_basket_summary(self, request):
+        """
+        Return the summary of the open basket for this request.
+
+        When summaries are cached, the basket is only loaded if its summary
+        isn't in the cache.
+        """
+        if not settings.OSCAR_BASKET_CACHE_SUMMARY:
+            return BasketSummary(request.basket)
+        return self.get_cached_summary(
+            request, BasketSummary, basket_summaries.get,
+            basket_summaries.store)
+
+    def get_basket_lines_summary(self, request):
+        """
+        Return the lines summary of the open basket for this request, in the
+        same way as its summary.
+        """
+        if not settings.OSCAR_BASKET_CACHE_SUMMARY:
+            return BasketLinesSummary(request.basket)
+        return self.get_cached_summary(
+            request, BasketLinesSummary, basket_summaries.get_lines,
+            basket_summaries.store_lines)
+
+    def get_cached_summary(self, request, summary_class, get, store):
+        basket_id = self.get_summary_basket_id(request)
+        if basket_id is not None:
+            summary = get(basket_id)
+            if summary is not None:
+                return summary
+        elif not self.has_pending_basket(request):
+            # Anonymous visitor without a basket
+            return summary_class()
+        return store(request.basket)
+
+    def get_summary_basket_id(self, request):
+        """
+        Return the id of the basket whose cached summary can be used without
+        loading the basket, or None.
+        """
+        if request.user.is_authenticated:
+            if self.get_cookie_key(request) in request.COOKIES:
+                # The cookie basket is merged when the basket is loaded
+                return None
+            return basket_summaries.get_user_basket_id(request.user.pk)
+        return self.get_cookie_basket_id(request)
+
+    def get_cookie_basket_id(self, request):
+        """
+        Return the basket id of a correctly signed basket cookie, without
+        checking that the basket exists.
+        """
+        cookie_key = self.get_cookie_key(request)
+        if cookie_key in request.COOKIES:
+            try:
+                return int(Signer().unsign(request.COOKIES[cookie_key]))
+            except (BadSignature, ValueError):
+                return None
+        return None
+
+    def get_trusted_basket_hash(self, request):
+        """
+        Return the basket hash of an anonymous visitor straight from the
+        basket cookie, or None if the basket has to be loaded.
+        """
+        if request.user.is_authenticated:
+            return None
+        basket_id = self.get_cookie_basket_id(request)
+        if basket_id is None or basket_id in closed_baskets:
+            return None
+        return self.get_basket_hash(basket_id)
+
+    def has_pending_basket(self, request):
+        """
+        Test whether the request may have a basket that hasn't been cached
+        """
+        return (request.user.is_authenticated
+                or self.get_cookie_key(request) in request.COOKIES)
+
+    def get_user_basket(self, user, manager):
+        """
+        Return the open basket of a signed-in user, creating it if needed.
+        """
+        try:
+            return manager.get(owner=user)
+        except Basket.DoesNotExist:
+            pass
+        with transaction.atomic():
+            # Lock the user so concurrent requests can't both create a basket
+            User._default_manager.select_for_update().get(pk=user.pk)
+            basket, __ = manager.get_or_create(owner=user)
+        return basket
+
     def merge_baskets(self, master, slave):
         """
         Merge one basket into another.
@@ -194,17 +316,44 @@ class BasketMiddleware:
         basket = None
         if cookie_key in request.COOKIES:
             basket_hash = request.COOKIES[cookie_key]
+            trust_cookie = settings.OSCAR_BASKET_TRUST_SIGNED_COOKIE
             try:
                 basket_id = Signer().unsign(basket_hash)
+                if trust_cookie and basket_id in closed_baskets:
+                    # Skip the query for baskets known to be closed
+                    raise Basket.DoesNotExist
                 basket = Basket.objects.get(pk=basket_id, owner=None,
                                             status=Basket.OPEN)
-            except (BadSignature, Basket.DoesNotExist):
+            except BadSignature:
+                request.cookies_to_delete.append(cookie_key)
+            except Basket.DoesNotExist:
+                if trust_cookie:
+                    closed_baskets.add(basket_id)
                 request.cookies_to_delete.append(cookie_key)
         return basket
 
     def apply_offers_to_basket(self, request, basket):
-        if not basket.is_empty:
+        if basket.is_empty:
+            return
+        if not settings.OSCAR_OFFERS_CACHE_APPLICATIONS:
+            Applicator().apply(basket, request.user, request)
+            return
+        # Only apply the offers again when the basket, the user or the offers
+        # have changed since they were last applied
+        fingerprint = self.get_offers_fingerprint(request, basket)
+        if not applied_offers.restore(basket, fingerprint):
             Applicator().apply(basket, request.user, request)
+            applied_offers.store(basket, fingerprint)
+
+    def get_offers_fingerprint(self, request, basket):
+        """
+        Return the fingerprint under which the offers applied to the basket
+        are cached.
+
+        Override this when the applied offers depend on other state of the
+        request, such as session-based offers.
+        """
+        return applied_offers.get_fingerprint(basket, request.user)
 
     def get_basket_hash(self, basket_id):
         return Signer().sign(basket_id)
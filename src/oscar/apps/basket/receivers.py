@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from oscar.apps.basket.signals import basket_merged
+from oscar.core.loading import get_class, get_model
+
+basket_summaries = get_class('basket.summary', 'basket_summaries')
+closed_baskets = get_class('basket.utils', 'closed_baskets')
+
+Basket = get_model('basket', 'Basket')
+Line = get_model('basket', 'Line')
+
+
+@receiver(post_save, sender=Line)
+@receiver(post_delete, sender=Line)
+def invalidate_summary_on_line_change(sender, instance, **kwargs):
+    if settings.OSCAR_BASKET_CACHE_SUMMARY:
+        basket_summaries.invalidate(instance.basket_id)
+
+
+@receiver(post_save, sender=Basket)
+@receiver(post_delete, sender=Basket)
+def invalidate_summary_on_basket_change(sender, instance, **kwargs):
+    # The basket may have been submitted, frozen or merged
+    if settings.OSCAR_BASKET_CACHE_SUMMARY:
+        basket_summaries.invalidate(instance.id)
+        if instance.owner_id:
+            basket_summaries.invalidate_user(instance.owner_id)
+
+
+@receiver(basket_merged)
+def invalidate_summary_on_merge(sender, basket, **kwargs):
+    # Lines are moved with queryset updates, which don't send post_save
+    if settings.OSCAR_BASKET_CACHE_SUMMARY:
+        basket_summaries.invalidate(basket.id)
+
+
+@receiver(post_save, sender=Basket)
+def update_closed_baskets_on_save(sender, instance, **kwargs):
+    if not settings.OSCAR_BASKET_TRUST_SIGNED_COOKIE:
+        return
+    if instance.status != Basket.OPEN or instance.owner_id:
+        closed_baskets.add(instance.id)
+    elif not kwargs.get('created', False):
+        # A frozen basket may have been thawed
+        closed_baskets.discard(instance.id)
+
+
+@receiver(post_delete, sender=Basket)
+def update_closed_baskets_on_delete(sender, instance, **kwargs):
+    if settings.OSCAR_BASKET_TRUST_SIGNED_COOKIE:
+        closed_baskets.add(instance.id)
+
+
+@receiver(m2m_changed, sender=Basket.vouchers.through)
+def invalidate_summary_on_voucher_change(sender, instance, action, reverse,
+                                         pk_set, **kwargs):
+    if not settings.OSCAR_BASKET_CACHE_SUMMARY:
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    if not reverse:
+        basket_summaries.invalidate(instance.pk)
+    elif action == 'pre_clear':
+        for basket_id in instance.basket_set.values_list('id', flat=True):
+            basket_summaries.invalidate(basket_id)
+    else:
+        for basket_id in pk_set or ():
+            basket_summaries.invalidate(basket_id)
@@ -6,3 +6,5 @@ voucher_addition = django.dispatch.Signal(
     providing_args=["basket", "voucher"])
 voucher_removal = django.dispatch.Signal(
     providing_args=["basket", "voucher"])
+basket_merged = django.dispatch.Signal(
+    providing_args=["basket", "merged_basket"])
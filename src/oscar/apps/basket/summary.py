@@ -0,0 +1,140 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from oscar.core.loading import get_class
+
+get_offers_version = get_class('offer.cache', 'get_offers_version')
+
+BASKET_SUMMARY_KEY = 'oscar-basket-summary-%s-%s'
+BASKET_LINES_SUMMARY_KEY = 'oscar-basket-lines-summary-%s-%s'
+USER_BASKET_KEY = 'oscar-user-basket-%s'
+
+
+class BasketSummary(object):
+    """
+    The counts and totals of a basket needed to render the header, with
+    offers applied.
+
+    A summary only holds plain values so it can be cached and rendered
+    without loading the basket, its lines or its products.
+    """
+
+    def __init__(self, basket=None):
+        self.id = None
+        self.num_lines = 0
+        self.num_items = 0
+        self.is_tax_known = True
+        self.total_excl_tax = None
+        self.total_incl_tax = None
+        self.currency = None
+        if basket is not None and basket.id:
+            self.update(basket)
+
+    def update(self, basket):
+        self.id = basket.id
+        lines = basket.all_lines()
+        self.num_lines = len(lines)
+        self.num_items = sum(line.quantity for line in lines)
+        self.is_tax_known = basket.is_tax_known
+        self.total_excl_tax = basket.total_excl_tax
+        self.total_incl_tax = basket.total_incl_tax if self.is_tax_known else None
+        self.currency = basket.currency
+
+    @property
+    def is_empty(self):
+        return self.num_lines == 0
+
+
+class BasketLinesSummary(object):
+    """
+    A short description of each line of a basket, to render the basket
+    dropdown.
+
+    Describing a line looks up the image and URL of its product, so the
+    lines are summarised apart from the counts and totals of the header.
+    """
+
+    def __init__(self, basket=None):
+        self.lines = []
+        if basket is not None and basket.id:
+            self.lines = [
+                self.get_line_summary(line) for line in basket.all_lines()]
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def get_line_summary(self, line):
+        product = line.product
+        image = product.primary_image()
+        if isinstance(image, dict):
+            image_name = image['original'].name
+        else:
+            image_name = image.original.name
+        return {
+            'description': line.description,
+            'title': product.get_title(),
+            'url': product.get_absolute_url(),
+            'image': image_name,
+            'quantity': line.quantity,
+            'unit_price_excl_tax': line.unit_price_excl_tax,
+        }
+
+
+class BasketSummaryCache(object):
+    """
+    Caches the summaries and lines summaries of baskets per basket id, and
+    the id of the open basket of each user.
+
+    Summaries are keyed by the offers version too, so changing any offer
+    invalidates every summary.  Changes to lines and vouchers invalidate the
+    summaries of their basket.
+    """
+
+    def get(self, basket_id):
+        return cache.get(BASKET_SUMMARY_KEY % (basket_id, get_offers_version()))
+
+    def store(self, basket):
+        """
+        Cache and return the summary of a basket that had offers applied
+        """
+        summary = BasketSummary(basket)
+        if basket.id:
+            timeout = settings.OSCAR_BASKET_SUMMARY_CACHE_TIMEOUT
+            cache.set(BASKET_SUMMARY_KEY % (basket.id, get_offers_version()),
+                      summary, timeout)
+            if basket.owner_id:
+                cache.set(USER_BASKET_KEY % basket.owner_id, basket.id, timeout)
+        return summary
+
+    def get_lines(self, basket_id):
+        return cache.get(
+            BASKET_LINES_SUMMARY_KEY % (basket_id, get_offers_version()))
+
+    def store_lines(self, basket):
+        """
+        Cache and return the lines summary of a basket that had offers
+        applied
+        """
+        summary = BasketLinesSummary(basket)
+        if basket.id:
+            cache.set(
+                BASKET_LINES_SUMMARY_KEY % (basket.id, get_offers_version()),
+                summary, settings.OSCAR_BASKET_SUMMARY_CACHE_TIMEOUT)
+        return summary
+
+    def invalidate(self, basket_id):
+        version = get_offers_version()
+        cache.delete_many([BASKET_SUMMARY_KEY % (basket_id, version),
+                           BASKET_LINES_SUMMARY_KEY % (basket_id, version)])
+
+    def get_user_basket_id(self, user_id):
+        return cache.get(USER_BASKET_KEY % user_id)
+
+    def invalidate_user(self, user_id):
+        cache.delete(USER_BASKET_KEY % user_id)
+
+
+basket_summaries = BasketSummaryCache()
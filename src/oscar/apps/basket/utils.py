@@ -1,12 +1,16 @@
 from collections import defaultdict
 
+from django.conf import settings
 from django.contrib import messages
+from django.core.cache import cache
 from django.template.loader import render_to_string
 
 from oscar.core.loading import get_class
 
 Applicator = get_class('offer.applicator', 'Applicator')
 
+CLOSED_BASKET_KEY = 'oscar-closed-basket-%s'
+
 
 class BasketMessageGenerator(object):
 
@@ -95,6 +99,20 @@ class LineOfferConsumer(object):
         self.__affected_quantity += min(available, quantity)
 
     # public
+    def get_state(self):
+        """
+        Return the consumptions of the line so they can be stored and
+        restored later with :meth:`set_state`.
+        """
+        return (self.__offers, self.__affected_quantity,
+                dict(self.__consumptions))
+
+    def set_state(self, state):
+        offers, affected_quantity, consumptions = state
+        self.__offers = dict(offers)
+        self.__affected_quantity = affected_quantity
+        self.__consumptions = defaultdict(int, consumptions)
+
     def consume(self, quantity, offer=None):
         """
         mark a basket line as consumed by an offer
@@ -151,3 +169,27 @@ class LineOfferConsumer(object):
 
         consumed = self.consumed(offer)
         return int(self.__line.quantity - consumed)
+
+
+class ClosedBasketCache(object):
+    """
+    Remembers the ids of baskets that can't be loaded from a basket cookie
+    anymore, because they were submitted, merged, frozen, assigned to a user
+    or deleted.
+
+    This lets the basket middleware reject stale basket cookies without
+    querying the database.
+    """
+
+    def add(self, basket_id):
+        cache.set(CLOSED_BASKET_KEY % basket_id, True,
+                  settings.OSCAR_BASKET_CLOSED_CACHE_TIMEOUT)
+
+    def discard(self, basket_id):
+        cache.delete(CLOSED_BASKET_KEY % basket_id)
+
+    def __contains__(self, basket_id):
+        return cache.get(CLOSED_BASKET_KEY % basket_id, False)
+
+
+closed_baskets = ClosedBasketCache()
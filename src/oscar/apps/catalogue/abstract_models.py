@@ -20,7 +20,7 @@ from django.utils.translation import gettext_lazy as _
 from django.utils.translation import get_language, pgettext_lazy
 from treebeard.mp_tree import MP_Node
 
-from oscar.core.loading import get_class, get_model
+from oscar.core.loading import get_class, get_classes, get_model
 from oscar.core.utils import slugify
 from oscar.core.validators import non_python_keyword
 from oscar.models.fields import AutoSlugField, NullCharField
@@ -32,6 +32,10 @@ ProductQuerySet = get_class('catalogue.managers', 'ProductQuerySet')
 ProductAttributesContainer = get_class(
     'catalogue.product_attributes', 'ProductAttributesContainer')
 Selector = get_class('partner.strategy', 'Selector')
+category_moved = get_class('catalogue.signals', 'category_moved')
+category_tree, get_categories_version, invalidate_categories = get_classes(
+    'catalogue.cache',
+    ['category_tree', 'get_categories_version', 'invalidate_categories'])
 
 
 class AbstractProductClass(Model):
@@ -152,12 +156,33 @@ class AbstractCategory(MP_Node):
 
         super().save(*args, **kwargs)
 
+    def move(self, target, pos=None):
+        """
+        Moving a subtree updates the paths with a queryset, so no post_save
+        signal is sent.  Expire the cached category tree here and send the
+        ``category_moved`` signal instead.
+        """
+        old_path = self.path
+        super().move(target, pos)
+        self.__dict__.pop('_ancestors_and_self', None)
+        invalidate_categories()
+        category_moved.send(sender=type(self), category=self, old_path=old_path)
+
     def get_ancestors_and_self(self):
         """
         Gets ancestors and includes itself. Use treebeard's get_ancestors
         if you don't want to include the category itself. It's a separate
         function as it's commonly used in templates.
+
+        Categories of the category tree already know their ancestors. Others
+        look them up in the cached category tree if it's enabled.
         """
+        if hasattr(self, '_ancestors_and_self'):
+            return list(self._ancestors_and_self)
+        if settings.OSCAR_CATEGORIES_CACHE_TREE:
+            ancestors = category_tree.get().get_ancestors(self)
+            if ancestors is not None:
+                return ancestors + [self]
         return list(self.get_ancestors()) + [self]
 
     def get_descendants_and_self(self):
@@ -170,7 +195,8 @@ class AbstractCategory(MP_Node):
 
     def get_url_cache_key(self):
         current_locale = get_language()
-        cache_key = 'CATEGORY_URL_%s_%s' % (current_locale, self.pk)
+        cache_key = 'CATEGORY_URL_%s_%s_%s' % (
+            current_locale, get_categories_version(), self.pk)
         return cache_key
 
     def get_absolute_url(self):
@@ -181,7 +207,16 @@ class AbstractCategory(MP_Node):
         ProductCategoryView does the lookup via primary key anyway. But if
         you change that logic, you'll have to reconsider the caching
         approach.
+
+        The cache key includes the categories version, so URLs are
+        regenerated when a category is renamed or moved.  Categories that
+        know their ancestors don't need the cache.
         """
+        if hasattr(self, '_ancestors_and_self') or \
+                settings.OSCAR_CATEGORIES_CACHE_TREE:
+            return reverse(
+                'catalogue:category',
+                kwargs={'category_slug': self.full_slug, 'pk': self.pk})
         cache_key = self.get_url_cache_key()
         url = cache.get(cache_key)
         if not url:
@@ -205,15 +240,12 @@ class AbstractCategory(MP_Node):
         return self.get_children().count()
     
     def is_disabled(self):
-        """ Check if this node or any parents of this node have is_enabled 
+        """ Check if this node or any parents of this node have is_enabled
         set to False.
         """
-        node = self
-        while node is not None:
-            if not node.is_enabled:
-                return True
-            node = node.get_parent()
-        return False
+        if not self.is_enabled:
+            return True
+        return self.get_ancestors().filter(is_enabled=False).exists()
 
 
 class AbstractProductCategory(Model):
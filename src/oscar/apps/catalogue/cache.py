@@ -0,0 +1,120 @@
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+from oscar.core.loading import get_model
+
+CATEGORIES_VERSION_KEY = 'oscar-categories-version'
+CATEGORY_TREE_KEY = 'oscar-category-tree-%s'
+
+
+def get_categories_version():
+    """
+    Return the current version token of the category tree.
+
+    The token changes whenever a category is saved, moved or deleted.
+    """
+    version = cache.get(CATEGORIES_VERSION_KEY)
+    if version is None:
+        # Use add() so concurrent processes agree on a single token
+        cache.add(CATEGORIES_VERSION_KEY, uuid4().hex, None)
+        version = cache.get(CATEGORIES_VERSION_KEY)
+    return version
+
+
+def invalidate_categories():
+    """
+    Mark every cached category tree as stale
+    """
+    cache.set(CATEGORIES_VERSION_KEY, uuid4().hex, None)
+
+
+class CategoryTree(object):
+    """
+    All categories in tree order, loaded with a single query.
+
+    Whether a category or one of its ancestors is disabled, and the
+    ancestors of each category, are worked out in a single pass over the
+    tree instead of walking up the ancestors of each category.  The
+    categories of the tree keep their ancestors, so their full slugs, full
+    names and URLs are computed without queries.
+    """
+
+    def __init__(self, categories):
+        self.categories = categories
+        self.by_path = {}
+        self.disabled_pks = set()
+        ancestors = []
+        for category in categories:
+            # The ancestors of a category are the categories before it that
+            # are less deep
+            del ancestors[category.depth - 1:]
+            parent = ancestors[-1] if ancestors else None
+            if not category.is_enabled or (
+                    parent is not None and parent.pk in self.disabled_pks):
+                self.disabled_pks.add(category.pk)
+            ancestors.append(category)
+            category._ancestors_and_self = list(ancestors)
+            self.by_path[category.path] = category
+
+    @classmethod
+    def build(cls):
+        Category = get_model('catalogue', 'Category')
+        return cls(list(Category.get_tree()))
+
+    def is_disabled(self, category):
+        return category.pk in self.disabled_pks
+
+    def get_ancestors(self, category):
+        """
+        Return the ancestors of a category from the tree, or ``None`` if
+        they aren't all in the tree
+        """
+        steplen = category.steplen
+        paths = [category.path[:steplen * depth]
+                 for depth in range(1, category.depth)]
+        if not all(path in self.by_path for path in paths):
+            return None
+        return [self.by_path[path] for path in paths]
+
+    def get_descendants(self, category):
+        """
+        Return the descendants of a category in tree order
+        """
+        return [
+            node for node in self.categories
+            if node.depth > category.depth and node.path.startswith(
+                category.path)]
+
+
+class CachedCategoryTree(object):
+    """
+    Keeps the category tree in process memory and shares it between
+    processes via the cache backend.  The tree is rebuilt when the
+    categories version changes.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.tree = None
+
+    def get(self):
+        if not settings.OSCAR_CATEGORIES_CACHE_TREE:
+            return CategoryTree.build()
+        version = get_categories_version()
+        if self.version != version:
+            self.load(version)
+        return self.tree
+
+    def load(self, version):
+        key = CATEGORY_TREE_KEY % version
+        tree = cache.get(key)
+        if tree is None:
+            tree = CategoryTree.build()
+            cache.set(key, tree, settings.OSCAR_CATEGORIES_CACHE_TIMEOUT)
+        self.tree = tree
+        self.version = version
+
+
+category_tree = CachedCategoryTree()
@@ -1,13 +1,16 @@
 # -*- coding: utf-8 -*-
 
 from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
-if settings.OSCAR_DELETE_IMAGE_FILES:
+from oscar.core.loading import get_class, get_model
+
+invalidate_categories = get_class('catalogue.cache', 'invalidate_categories')
 
-    from oscar.core.loading import get_model
+if settings.OSCAR_DELETE_IMAGE_FILES:
 
     from django.db import models
-    from django.db.models.signals import post_delete
 
     from sorl import thumbnail
     from sorl.thumbnail.helpers import ThumbnailError
@@ -34,3 +37,14 @@ if settings.OSCAR_DELETE_IMAGE_FILES:
     models_with_images = [ProductImage, Category]
     for sender in models_with_images:
         post_delete.connect(delete_image_files, sender=sender)
+
+
+@receiver(post_save, sender=get_model('catalogue', 'Category'))
+@receiver(post_delete, sender=get_model('catalogue', 'Category'))
+def invalidate_category_tree(sender, **kwargs):
+    """
+    Expire the cached category tree when any category changes
+    """
+    if kwargs.get('raw', False):
+        return
+    invalidate_categories()
@@ -1,11 +1,17 @@
+from collections import OrderedDict
+
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Count
 from django.utils.module_loading import import_string
 from django.views.generic.list import MultipleObjectMixin
 
 from oscar.core.loading import get_class, get_model
 
 BrowseCategoryForm = get_class('search.forms', 'BrowseCategoryForm')
+FacetMunger = get_class('search.facets', 'FacetMunger')
 SearchHandler = get_class('search.search_handlers', 'SearchHandler')
+get_full_text_backend = get_class('search.fulltext', 'get_full_text_backend')
 is_solr_supported = get_class('search.features', 'is_solr_supported')
 is_elasticsearch_supported = get_class('search.features', 'is_elasticsearch_supported')
 Product = get_model('catalogue', 'Product')
@@ -15,8 +21,10 @@ def get_product_search_handler_class():
     """
     Determine the search handler to use.
 
-    Currently only Solr is supported as a search backend, so it falls
-    back to rudimentary category browsing if that isn't enabled.
+    Solr and Elasticsearch are supported as search backends.  Without them,
+    it falls back to the database's full text search if
+    ``OSCAR_SEARCH_FULLTEXT`` is set, and to rudimentary category browsing
+    otherwise.
     """
     # Use get_class to ensure overridability
     if settings.OSCAR_PRODUCT_SEARCH_HANDLER is not None:
@@ -27,6 +35,9 @@ def get_product_search_handler_class():
         return get_class(
             'catalogue.search_handlers', 'ESProductSearchHandler',
         )
+    elif settings.OSCAR_SEARCH_FULLTEXT:
+        return get_class(
+            'catalogue.search_handlers', 'DatabaseProductSearchHandler')
     else:
         return get_class(
             'catalogue.search_handlers', 'SimpleProductSearchHandler')
@@ -56,6 +67,10 @@ class SolrProductSearchHandler(SearchHandler):
         sqs = sqs.filter_and(is_enabled=True)
         return sqs
 
+    def get_cache_key_parts(self):
+        category_pks = sorted(category.pk for category in self.categories or [])
+        return super().get_cache_key_parts() + (category_pks,)
+
 
 class ESProductSearchHandler(SearchHandler):
     """
@@ -77,6 +92,10 @@ class ESProductSearchHandler(SearchHandler):
         sqs = sqs.filter_and(is_enabled=True)
         return sqs
 
+    def get_cache_key_parts(self):
+        category_pks = sorted(category.pk for category in self.categories or [])
+        return super().get_cache_key_parts() + (category_pks,)
+
 
 class SimpleProductSearchHandler(MultipleObjectMixin):
     """
@@ -108,3 +127,118 @@ class SimpleProductSearchHandler(MultipleObjectMixin):
         context = self.get_context_data(object_list=self.object_list)
         context[context_object_name] = context['page_obj'].object_list
         return context
+
+
+class DatabaseProductSearchHandler(SimpleProductSearchHandler):
+    """
+    A search handler that searches products with the full text search of the
+    database, so keyword search works without a Haystack backend.
+
+    Products are matched against their search documents (see
+    ``search.documents``) and ranked by relevance.  Field facets are counted
+    with grouped aggregates; only the facets in ``facet_lookups`` are
+    supported.
+    """
+    form_class = BrowseCategoryForm
+
+    # Map the fields of OSCAR_SEARCH_FACETS to product lookups
+    facet_lookups = {
+        'product_class': 'product_class__name',
+        'rating': 'rating',
+    }
+
+    # Map the sort options of the search form to orderings. Products are
+    # sorted by relevance by default.
+    sort_by_map = {
+        BrowseCategoryForm.TOP_RATED: ['-rating'],
+        BrowseCategoryForm.NEWEST: ['-date_created'],
+        BrowseCategoryForm.TITLE_A_TO_Z: ['title'],
+        BrowseCategoryForm.TITLE_Z_TO_A: ['-title'],
+    }
+
+    def __init__(self, request_data, full_path, categories=None):
+        self.request_data = request_data
+        self.full_path = full_path
+        self.search_form = self.form_class(
+            data=request_data,
+            selected_facets=request_data.getlist('selected_facets'))
+        self.search_form.is_valid()
+        self.query = self.search_form.cleaned_data.get('q', '').strip()
+        self.backend = get_full_text_backend()
+        super().__init__(request_data, full_path, categories)
+
+    def get_search_queryset(self):
+        """
+        Return the products that match the query, categories and selected
+        facets
+        """
+        qs = Product._default_manager.browsable().filter(is_enabled=True)
+        if self.categories:
+            qs = qs.filter(categories__in=self.categories)
+        if self.query:
+            qs = self.backend.filter(qs, self.query)
+        return self.filter_facets(qs)
+
+    def filter_facets(self, queryset):
+        for field_name, values in self.search_form.selected_multi_facets.items():
+            if not field_name.endswith('_exact'):
+                continue
+            lookup = self.facet_lookups.get(field_name[:-len('_exact')])
+            if lookup is None:
+                continue
+            try:
+                queryset = queryset.filter(**{'%s__in' % lookup: values})
+            except (ValueError, ValidationError):
+                # Ignore values that aren't valid for the field
+                continue
+        return queryset
+
+    def get_queryset(self):
+        matches = self.get_search_queryset()
+        self.facet_counts = self.get_facet_counts(matches)
+        qs = Product._default_manager.base_queryset().filter(
+            pk__in=matches.values('pk'))
+        if self.query:
+            qs = self.backend.rank(qs, self.query)
+        return qs.order_by(*self.get_ordering())
+
+    def get_ordering(self):
+        ordering = self.sort_by_map.get(
+            self.search_form.cleaned_data.get('sort_by'))
+        if ordering:
+            return ordering
+        if self.query:
+            return ['-search_rank'] + list(Product._meta.ordering)
+        return Product._meta.ordering
+
+    def get_facet_counts(self, queryset):
+        """
+        Return the facet counts of the matching products in the format of
+        Haystack's ``facet_counts``
+        """
+        fields = OrderedDict()
+        for key, facet in settings.OSCAR_SEARCH_FACETS['fields'].items():
+            lookup = self.facet_lookups.get(facet['field'])
+            if lookup is None:
+                fields[key] = []
+                continue
+            rows = queryset.exclude(**{lookup: None}).order_by().values_list(
+                lookup).annotate(count=Count('pk', distinct=True))
+            fields[key] = sorted(
+                ((str(value), count) for value, count in rows),
+                key=lambda row: (-row[1], row[0]))
+        return {'fields': fields, 'queries': {}}
+
+    def get_search_context_data(self, context_object_name):
+        context = super().get_search_context_data(context_object_name)
+        munger = FacetMunger(
+            self.full_path, self.search_form.selected_multi_facets,
+            self.facet_counts)
+        facet_data = munger.facet_data()
+        context.update({
+            'facet_data': facet_data,
+            'has_facets': any(data['results'] for data in facet_data.values()),
+            'selected_facets': self.request_data.getlist('selected_facets'),
+            'form': self.search_form,
+        })
+        return context
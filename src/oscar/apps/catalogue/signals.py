@@ -2,3 +2,8 @@ import django.dispatch
 
 product_viewed = django.dispatch.Signal(
     providing_args=["product", "user", "request", "response"])
+
+# Moving a category rewrites the paths of its subtree with a queryset, so no
+# post_save signal is sent for the moved categories.
+category_moved = django.dispatch.Signal(
+    providing_args=["category", "old_path"])
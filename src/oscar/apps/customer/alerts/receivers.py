@@ -7,6 +7,12 @@ from oscar.core.loading import get_model
 def send_product_alerts(sender, instance, created, **kwargs):
     if kwargs.get('raw', False):
         return
+    previous_level = getattr(instance, 'previous_net_stock_level', None)
+    if previous_level is not None and not (
+            previous_level <= 0 < instance.net_stock_level):
+        # Only the stock level changed, and the product didn't come back
+        # into stock
+        return
     from oscar.apps.customer.alerts import utils
     utils.send_product_alerts(instance.product)
 
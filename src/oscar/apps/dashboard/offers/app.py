@@ -16,6 +16,7 @@ class OffersDashboardApplication(DashboardApplication):
                                   'OfferRestrictionsView')
     delete_view = get_class('dashboard.offers.views', 'OfferDeleteView')
     detail_view = get_class('dashboard.offers.views', 'OfferDetailView')
+    timings_view = get_class('dashboard.offers.views', 'OfferTimingsView')
 
     def get_urls(self):
         urls = [
@@ -48,6 +49,8 @@ class OffersDashboardApplication(DashboardApplication):
             # Stats
             url(r'^(?P<pk>\d+)/$', self.detail_view.as_view(),
                 name='offer-detail'),
+            url(r'^timings/$', self.timings_view.as_view(),
+                name='offer-timings'),
         ]
         return self.post_process_urls(urls)
 
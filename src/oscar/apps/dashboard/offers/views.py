@@ -9,7 +9,7 @@ from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from django.views.generic import DeleteView, FormView, ListView
+from django.views.generic import DeleteView, FormView, ListView, TemplateView
 
 from oscar.core.loading import get_class, get_classes, get_model
 from oscar.views import sort_queryset
@@ -26,6 +26,7 @@ MetaDataForm, ConditionForm, BenefitForm, RestrictionsForm, OfferSearchForm \
                    'RestrictionsForm', 'OfferSearchForm'])
 OrderDiscountCSVFormatter = get_class(
     'dashboard.offers.reports', 'OrderDiscountCSVFormatter')
+offer_timings = get_class('offer.profiling', 'offer_timings')
 
 
 class OfferListView(ListView):
@@ -376,3 +377,25 @@ class OfferDetailView(ListView):
             return formatter.generate_response(context['order_discounts'],
                                                offer=self.offer)
         return super().render_to_response(context)
+
+
+class OfferTimingsView(TemplateView):
+    """
+    Lists the offers that took the longest to apply to baskets within the
+    profiling window.
+    """
+    template_name = 'dashboard/offers/offer_timings.html'
+    num_offers = 50
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        timings = offer_timings.get_slowest(self.num_offers)
+        for stats in timings:
+            # Durations are recorded in seconds
+            stats['mean_ms'] = stats['mean_duration'] * 1000
+            stats['max_ms'] = stats['max_duration'] * 1000
+            stats['total_ms'] = stats['total_duration'] * 1000
+        ctx['timings'] = timings
+        ctx['is_profiling'] = settings.OSCAR_OFFERS_PROFILE
+        ctx['window_minutes'] = settings.OSCAR_OFFERS_PROFILE_WINDOW // 60
+        return ctx
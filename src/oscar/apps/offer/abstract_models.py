@@ -26,6 +26,7 @@ ActiveOfferManager, BrowsableRangeManager \
     = get_classes('offer.managers', ['ActiveOfferManager', 'BrowsableRangeManager'])
 ZERO_DISCOUNT = get_class('offer.results', 'ZERO_DISCOUNT')
 load_proxy, unit_price = get_classes('offer.utils', ['load_proxy', 'unit_price'])
+record_contains_product = get_class('offer.profiling', 'record_contains_product')
 
 
 class BaseOfferMixin(Model):
@@ -80,6 +81,38 @@ class BaseOfferMixin(Model):
         """
         return self.name
 
+    def prefetch_range_membership(self, basket, range=None):
+        """
+        Resolve which of the basket's products are in the range at once, so
+        range_contains_product() doesn't query the range for every line.
+        """
+        if range is None:
+            range = self.range
+        if range is None:
+            return
+        products = [line.product for line in basket.all_lines()]
+        if not hasattr(self, '_range_membership'):
+            self._range_membership = {}
+        checked_ids, __ = self._range_membership.get(range.pk, ((), ()))
+        if all(product.id in checked_ids for product in products):
+            return
+        self._range_membership[range.pk] = (
+            {product.id for product in products},
+            range.contains_products(products))
+
+    def range_contains_product(self, product, range=None):
+        """
+        Check whether the product is in the range, using the membership
+        resolved by prefetch_range_membership() when available.
+        """
+        if range is None:
+            range = self.range
+        checked_ids, contained_ids = getattr(
+            self, '_range_membership', {}).get(range.pk, ((), ()))
+        if product.id in checked_ids:
+            return product.id in contained_ids
+        return range.contains_product(product)
+
 
 class AbstractConditionalOffer(Model):
     """
@@ -204,6 +237,9 @@ class AbstractConditionalOffer(Model):
     num_orders = models.PositiveIntegerField(
         _("Number of Orders"), default=0)
 
+    # The fields updated when the offer is used in an order
+    usage_fields = ['num_applications', 'total_discount', 'num_orders']
+
     redirect_url = fields.ExtendedURLField(
         _("URL redirect (optional)"), blank=True)
     date_created = models.DateTimeField(_("Date Created"), auto_now_add=True)
@@ -345,7 +381,7 @@ class AbstractConditionalOffer(Model):
         self.num_applications += discount['freq']
         self.total_discount += discount['discount']
         self.num_orders += 1
-        self.save()
+        self.save(update_fields=self.usage_fields)
     record_usage.alters_data = True
 
     def availability_description(self):
@@ -659,11 +695,13 @@ class AbstractBenefit(BaseOfferMixin, Model):
         """
         if range is None:
             range = self.range
+        self.prefetch_range_membership(basket, range)
         line_tuples = []
         for line in basket.all_lines():
             product = line.product
 
-            if (not range.contains_product(product) or not self.can_apply_benefit(line)):
+            if (not self.range_contains_product(product, range)
+                    or not self.can_apply_benefit(line)):
                 continue
 
             price = unit_price(offer, line)
@@ -754,13 +792,14 @@ class AbstractCondition(BaseOfferMixin, Model):
         if not line.stockrecord_id:
             return False
         product = line.product
-        return (self.range.contains_product(product)
+        return (self.range_contains_product(product)
                 and product.get_is_discountable())
 
     def get_applicable_lines(self, offer, basket, most_expensive_first=True):
         """
         Return line data for the lines that can be consumed by this condition
         """
+        self.prefetch_range_membership(basket)
         line_tuples = []
         for line in basket.all_lines():
             if not self.can_apply_condition(line):
@@ -816,11 +855,16 @@ class AbstractRange(Model):
 
     date_created = models.DateTimeField(_("Date Created"), auto_now_add=True)
 
+    # Set once all the memberships of the range have been synced
+    memberships_synced = models.BooleanField(
+        _("Memberships synced"), default=False, editable=False)
+
     __included_product_ids = None
     __excluded_product_ids = None
     __included_categories = None
     __class_ids = None
     __category_ids = None
+    __member_ids = None
 
     objects = models.Manager()
     browsable = BrowsableRangeManager()
@@ -888,11 +932,15 @@ class AbstractRange(Model):
         """
         Check whether the passed product is part of this range.
         """
+        record_contains_product()
 
         # Delegate to a proxy class if one is provided
         if self.proxy:
             return self.proxy.contains_product(product)
 
+        if self.has_memberships:
+            return product.id in self._member_ids()
+
         excluded_product_ids = self._excluded_product_ids()
         if product.id in excluded_product_ids:
             return False
@@ -917,6 +965,81 @@ class AbstractRange(Model):
                         return True
         return False
 
+    def contains_products(self, products):  # noqa (too complex (11))
+        """
+        Return the ids of the passed products that are part of this range.
+
+        This resolves the membership of many products, eg all the products
+        of a basket, in a constant number of queries.
+        """
+        products = list(products)
+        if not products:
+            return set()
+        record_contains_product(len(products))
+
+        # Delegate to a proxy class if one is provided
+        if self.proxy:
+            if hasattr(self.proxy, 'contains_products'):
+                return self.proxy.contains_products(products)
+            return {product.id for product in products
+                    if self.proxy.contains_product(product)}
+
+        if self.has_memberships:
+            product_ids = {product.id for product in products}
+            if self.__member_ids is not None:
+                return product_ids & self.__member_ids
+            return set(self.memberships.filter(
+                product_id__in=product_ids).values_list('product_id', flat=True))
+
+        excluded_product_ids = self._excluded_product_ids()
+        candidates = [product for product in products
+                      if product.id not in excluded_product_ids]
+        if self.includes_all_products:
+            return {product.id for product in candidates}
+
+        # Child products are matched on the class and categories of their
+        # parent, but on their own id too.
+        included_product_ids = self._included_product_ids()
+        matched_ids = set()
+        parent_ids = {}
+        for product in candidates:
+            if (product.id in included_product_ids
+                    or product.parent_id in included_product_ids):
+                matched_ids.add(product.id)
+            else:
+                parent_ids[product.id] = (
+                    product.parent_id if product.is_child else product.id)
+        if not parent_ids:
+            return matched_ids
+
+        Product = get_model('catalogue', 'Product')
+        ProductCategory = get_model('catalogue', 'ProductCategory')
+        class_ids = set(self._class_ids())
+        if class_ids:
+            parent_classes = dict(Product.objects.filter(
+                id__in=set(parent_ids.values())
+            ).values_list('id', 'product_class_id'))
+            for product_id, parent_id in list(parent_ids.items()):
+                if parent_classes.get(parent_id) in class_ids:
+                    matched_ids.add(product_id)
+                    del parent_ids[product_id]
+
+        # A category matches when its materialised path starts with the path
+        # of one of the included categories.
+        test_paths = tuple(
+            category.path for category in self._included_categories())
+        if test_paths and parent_ids:
+            matched_parent_ids = {
+                product_id for product_id, path
+                in ProductCategory.objects.filter(
+                    product_id__in=set(parent_ids.values())
+                ).values_list('product_id', 'category__path')
+                if path.startswith(test_paths)}
+            matched_ids.update(
+                product_id for product_id, parent_id in parent_ids.items()
+                if parent_id in matched_parent_ids)
+        return matched_ids
+
     # Deprecated alias
     @deprecated
     def contains(self, product):
@@ -969,6 +1092,12 @@ class AbstractRange(Model):
                 self.excluded_products)
         return self.__excluded_product_ids
 
+    def _member_ids(self):
+        if self.__member_ids is None:
+            self.__member_ids = set(
+                self.memberships.values_list('product_id', flat=True))
+        return self.__member_ids
+
     def _class_ids(self):
         if self.__class_ids is None:
             self.__class_ids = self.classes.values_list('pk', flat=True)
@@ -992,6 +1121,87 @@ class AbstractRange(Model):
         self.__included_categories = None
         self.__included_product_ids = None
         self.__excluded_product_ids = None
+        self.__class_ids = None
+        self.__member_ids = None
+
+    @property
+    def has_memberships(self):
+        """
+        Test whether the products of this range are read from the
+        denormalised RangeMembership table.
+
+        Ranges are only read from the table once all their memberships have
+        been synced, when the range is saved or by the
+        oscar_update_range_memberships command.
+        """
+        return (settings.OSCAR_OFFERS_RANGE_MEMBERSHIP
+                and self.id is not None
+                and self.memberships_synced
+                and not self.proxy_class
+                and not self.includes_all_products)
+
+    def _member_products(self):
+        """
+        Return a queryset of the products for which contains_product()
+        is true, including child products.
+        """
+        Product = get_model("catalogue", "Product")
+        included_ids = self._included_product_ids()
+        class_ids = self._class_ids()
+        category_ids = self._category_ids()
+        return Product.objects.filter(
+            Q(id__in=included_ids)
+            | Q(parent_id__in=included_ids)
+            | Q(product_class_id__in=class_ids)
+            | Q(parent__product_class_id__in=class_ids)
+            | Q(productcategory__category_id__in=category_ids)
+            | Q(parent__productcategory__category_id__in=category_ids)
+        ).exclude(id__in=self._excluded_product_ids())
+
+    def sync_memberships(self, product_ids=None, add=True, remove=True):
+        """
+        Bring the RangeMembership rows of this range up to date.
+
+        :product_ids: Only update these products and their children.
+        :add: Whether to create missing memberships. Changes that can only
+              shrink the range pass False, which keeps this safe while the
+              products are being deleted.
+        :remove: Whether to delete stale memberships.
+        """
+        RangeMembership = get_model('offer', 'RangeMembership')
+        self.invalidate_cached_ids()
+
+        memberships = RangeMembership.objects.filter(range=self)
+        if product_ids is not None:
+            memberships = memberships.filter(
+                Q(product_id__in=product_ids)
+                | Q(product__parent_id__in=product_ids))
+        existing_ids = set(memberships.values_list('product_id', flat=True))
+
+        member_ids = set()
+        if not self.proxy_class and not self.includes_all_products:
+            products = self._member_products()
+            if product_ids is not None:
+                products = products.filter(
+                    Q(id__in=product_ids) | Q(parent_id__in=product_ids))
+            member_ids = set(products.values_list('id', flat=True))
+
+        stale_ids = existing_ids - member_ids
+        if remove and stale_ids:
+            memberships.filter(product_id__in=stale_ids).delete()
+        missing_ids = member_ids - existing_ids
+        if add and missing_ids:
+            RangeMembership.objects.bulk_create([
+                RangeMembership(range=self, product_id=product_id)
+                for product_id in missing_ids])
+
+        if product_ids is None and add and remove \
+                and not self.memberships_synced:
+            # Don't send post_save, which syncs the range again
+            type(self).objects.filter(pk=self.pk).update(
+                memberships_synced=True)
+            self.memberships_synced = True
+    sync_memberships.alters_data = True
 
     def num_products(self):
         # Delegate to a proxy class if one is provided
@@ -1018,6 +1228,14 @@ class AbstractRange(Model):
             return Product.objects.browsable().exclude(
                 id__in=self._excluded_product_ids())
 
+        if self.has_memberships:
+            # Like below, only the children of included products are listed
+            return Product.objects.filter(range_memberships__range=self).filter(
+                ~Q(structure=Product.CHILD)
+                | Q(includes=self)
+                | Q(parent__includes=self)
+            ).distinct()
+
         return Product.objects.filter(
             Q(id__in=self._included_product_ids())
             | Q(product_class_id__in=self._class_ids())
@@ -1054,6 +1272,34 @@ class AbstractRangeProduct(Model):
         unique_together = ('range', 'product')
 
 
+class AbstractRangeMembership(Model):
+    """
+    Denormalised membership of products in a range, including child
+    products.
+
+    Only maintained when OSCAR_OFFERS_RANGE_MEMBERSHIP is enabled, in which
+    case it is used to look up the products of ranges that don't include all
+    products and don't use a custom class.
+    """
+    range = models.ForeignKey(
+        'offer.Range',
+        on_delete=models.CASCADE,
+        related_name='memberships',
+        verbose_name=_("Range"))
+    product = models.ForeignKey(
+        'catalogue.Product',
+        on_delete=models.CASCADE,
+        related_name='range_memberships',
+        verbose_name=_("Product"))
+
+    class Meta:
+        abstract = True
+        app_label = 'offer'
+        unique_together = ('range', 'product')
+        verbose_name = _("Range membership")
+        verbose_name_plural = _("Range memberships")
+
+
 class AbstractRangeProductFileUpload(Model):
     range = models.ForeignKey(
         'offer.Range',
@@ -1,10 +1,15 @@
 import logging
 from itertools import chain
 
+from django.conf import settings
+
 from oscar.core.loading import get_class, get_model
 
 logger = logging.getLogger('oscar.offers')
 OfferApplications = get_class('offer.results', 'OfferApplications')
+site_offers = get_class('offer.cache', 'site_offers')
+offer_index = get_class('offer.index', 'offer_index')
+OfferProfile = get_class('offer.profiling', 'OfferProfile')
 
 
 class OfferApplicationError(Exception):
@@ -25,24 +30,41 @@ class Applicator(object):
 
     def apply_offers(self, basket, offers):
         applications = OfferApplications()
+        if settings.OSCAR_OFFERS_USE_INDEX:
+            # Skip the offers that can't apply to any product in the basket
+            offers = offer_index.get_candidate_offers(basket, offers)
         for offer in offers:
-            num_applications = 0
-            # Keep applying the offer until either
-            # (a) We reach the max number of applications for the offer.
-            # (b) The benefit can't be applied successfully.
-            while num_applications < offer.get_max_applications(basket.owner):
-                result = offer.apply_benefit(basket)
-                num_applications += 1
-                if not result.is_successful:
-                    break
-                applications.add(offer, result)
-                if result.is_final:
-                    break
+            if settings.OSCAR_OFFERS_PROFILE:
+                with OfferProfile(offer, basket) as profile:
+                    profile.num_applications = self.apply_offer(
+                        basket, offer, applications)
+            else:
+                self.apply_offer(basket, offer, applications)
 
         # Store this list of discounts with the basket so it can be
         # rendered in templates
         basket.offer_applications = applications
 
+    def apply_offer(self, basket, offer, applications):
+        """
+        Apply a single offer to the basket as often as possible and return
+        the number of successful applications.
+        """
+        num_applications = num_successful = 0
+        # Keep applying the offer until either
+        # (a) We reach the max number of applications for the offer.
+        # (b) The benefit can't be applied successfully.
+        while num_applications < offer.get_max_applications(basket.owner):
+            result = offer.apply_benefit(basket)
+            num_applications += 1
+            if not result.is_successful:
+                break
+            applications.add(offer, result)
+            num_successful += 1
+            if result.is_final:
+                break
+        return num_successful
+
     def get_offers(self, basket, user=None, request=None):
         """
         Return all offers to apply to the basket.
@@ -64,6 +86,8 @@ class Applicator(object):
         """
         Return site offers that are available to all users
         """
+        if settings.OSCAR_OFFERS_CACHE_SITE_OFFERS:
+            return site_offers.get_offers()
         ConditionalOffer = get_model('offer', 'ConditionalOffer')
         qs = ConditionalOffer.active.filter(offer_type=ConditionalOffer.SITE)
         # Using select_related with the condition/benefit ranges doesn't seem
@@ -0,0 +1,191 @@
+import hashlib
+import pickle
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Min
+from django.utils.timezone import now
+
+from oscar.core.loading import get_model
+
+OFFERS_VERSION_KEY = 'oscar-offers-version'
+SITE_OFFERS_KEY = 'oscar-site-offers-%s'
+APPLIED_OFFERS_KEY = 'oscar-applied-offers-%s'
+
+
+def get_offers_version():
+    """
+    Return the current version token of the offer configuration.
+
+    The token changes whenever an offer, condition, benefit or range is
+    saved or deleted, so it can be used to key anything derived from the
+    offers.
+    """
+    version = cache.get(OFFERS_VERSION_KEY)
+    if version is None:
+        # Use add() so concurrent processes agree on a single token
+        cache.add(OFFERS_VERSION_KEY, uuid4().hex, None)
+        version = cache.get(OFFERS_VERSION_KEY)
+    return version
+
+
+def invalidate_offers():
+    """
+    Mark every compiled offer set as stale
+    """
+    cache.set(OFFERS_VERSION_KEY, uuid4().hex, None)
+
+
+class CompiledOfferSet(object):
+    """
+    Holds the active site offers with their proxied conditions, benefits and
+    ranges already resolved.
+
+    The compiled set is kept in process memory and shared between processes
+    via the cache backend.  It is rebuilt when the offers version changes or
+    when the start or end date of one of the site offers passes.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.payload = None
+        self.expires = None
+
+    def get_offers(self):
+        """
+        Return a fresh list of the active site offers.
+
+        The offers are unpickled on every call as conditions and ranges cache
+        per-basket state on their instances.
+        """
+        version = get_offers_version()
+        if self.version != version:
+            self.load(version)
+        if self.expires is not None and now() >= self.expires:
+            # An offer has started or ended since the set was compiled
+            invalidate_offers()
+            self.load(get_offers_version())
+        return pickle.loads(self.payload)
+
+    def load(self, version):
+        key = SITE_OFFERS_KEY % version
+        data = cache.get(key)
+        if data is None:
+            offers, expires = self.compile()
+            data = (pickle.dumps(offers, pickle.HIGHEST_PROTOCOL), expires)
+            cache.set(key, data, settings.OSCAR_OFFERS_CACHE_TIMEOUT)
+        self.payload, self.expires = data
+        self.version = version
+
+    def compile(self):
+        """
+        Load the active site offers and return them with the datetime at
+        which the set has to be rebuilt.
+        """
+        ConditionalOffer = get_model('offer', 'ConditionalOffer')
+        cutoff = now()
+        offers = list(
+            ConditionalOffer.active
+            .filter(offer_type=ConditionalOffer.SITE)
+            .select_related(
+                'condition', 'condition__range', 'benefit', 'benefit__range'))
+        for offer in offers:
+            offer.condition = self.get_proxy(offer.condition)
+            offer.benefit = self.get_proxy(offer.benefit)
+
+        boundaries = [offer.end_datetime for offer in offers
+                      if offer.end_datetime]
+        next_start = ConditionalOffer.objects.filter(
+            offer_type=ConditionalOffer.SITE,
+            status=ConditionalOffer.OPEN,
+            start_datetime__gt=cutoff,
+        ).aggregate(start=Min('start_datetime'))['start']
+        if next_start:
+            boundaries.append(next_start)
+        return offers, min(boundaries) if boundaries else None
+
+    def get_proxy(self, instance):
+        """
+        Return the proxy of a condition or benefit.
+
+        BaseOfferMixin.proxy() copies the field values only, so the range
+        that was loaded alongside the instance is assigned again.
+        """
+        proxy = instance.proxy()
+        if proxy is not instance:
+            proxy._state.adding = False
+            proxy._state.db = instance._state.db
+            if instance.range_id:
+                proxy.range = instance.range
+        return proxy
+
+
+site_offers = CompiledOfferSet()
+
+
+class AppliedOffersCache(object):
+    """
+    Stores the offer applications and line discounts of a basket under a
+    fingerprint of everything the offers depend on.
+
+    When the fingerprint of a basket hasn't changed since offers were last
+    applied to it, the stored discounts are restored instead of applying the
+    offers again.
+    """
+
+    def get_fingerprint(self, basket, user=None):
+        """
+        Return a digest of the lines, prices, vouchers, user and groups of
+        the basket, and of the current offers version.
+        """
+        lines = []
+        for line in basket.all_lines():
+            price = line.purchase_info.price
+            lines.append((
+                line.id, line.product_id, line.stockrecord_id, line.quantity,
+                price.excl_tax,
+                price.incl_tax if price.is_tax_known else None))
+        voucher_ids = sorted(basket.vouchers.values_list('id', flat=True))
+        user_id, group_ids = None, []
+        if user is not None and user.is_authenticated:
+            user_id = user.pk
+            group_ids = sorted(user.groups.values_list('id', flat=True))
+        data = repr((lines, voucher_ids, user_id, group_ids,
+                     get_offers_version()))
+        return hashlib.md5(data.encode('utf8')).hexdigest()
+
+    def restore(self, basket, fingerprint):
+        """
+        Restore the stored discounts onto the basket.
+
+        Return ``False`` if nothing was stored for the fingerprint.
+        """
+        data = cache.get(APPLIED_OFFERS_KEY % basket.id)
+        if data is None or data[0] != fingerprint:
+            return False
+        applications, line_states = pickle.loads(data[1])
+        # The line ids are part of the fingerprint so every line has a state
+        for line in basket.all_lines():
+            (line._discount_excl_tax, line._discount_incl_tax,
+             consumer_state) = line_states[line.id]
+            line.consumer.set_state(consumer_state)
+        basket.offer_applications = applications
+        return True
+
+    def store(self, basket, fingerprint):
+        """
+        Store the discounts that were applied to the basket
+        """
+        line_states = {}
+        for line in basket.all_lines():
+            line_states[line.id] = (
+                line._discount_excl_tax, line._discount_incl_tax,
+                line.consumer.get_state())
+        payload = pickle.dumps(
+            (basket.offer_applications, line_states), pickle.HIGHEST_PROTOCOL)
+        cache.set(APPLIED_OFFERS_KEY % basket.id, (fingerprint, payload),
+                  settings.OSCAR_OFFERS_APPLICATIONS_CACHE_TIMEOUT)
+
+
+applied_offers = AppliedOffersCache()
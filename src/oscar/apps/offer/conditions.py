@@ -44,6 +44,7 @@ class CountCondition(Condition):
         """
         Determines whether a given basket meets this condition
         """
+        self.prefetch_range_membership(basket)
         num_matches = 0
         for line in basket.all_lines():
             if (self.can_apply_condition(line)
@@ -56,6 +57,7 @@ class CountCondition(Condition):
     def _get_num_matches(self, basket, offer):
         if hasattr(self, '_num_matches'):
             return getattr(self, '_num_matches')
+        self.prefetch_range_membership(basket)
         num_matches = 0
         for line in basket.all_lines():
             if (self.can_apply_condition(line)
@@ -134,6 +136,7 @@ class CoverageCondition(Condition):
         """
         Determines whether a given basket meets this condition
         """
+        self.prefetch_range_membership(basket)
         covered_ids = []
         for line in basket.all_lines():
             if not line.is_available_for_offer_discount(offer):
@@ -147,6 +150,7 @@ class CoverageCondition(Condition):
         return False
 
     def _get_num_covered_products(self, basket, offer):
+        self.prefetch_range_membership(basket)
         covered_ids = []
         for line in basket.all_lines():
             if not line.is_available_for_offer_discount(offer):
@@ -181,6 +185,7 @@ class CoverageCondition(Condition):
         if to_consume == 0:
             return
 
+        self.prefetch_range_membership(basket)
         for line in basket.all_lines():
             product = line.product
             if not self.can_apply_condition(line):
@@ -197,6 +202,7 @@ class CoverageCondition(Condition):
                 break
 
     def get_value_of_satisfying_items(self, offer, basket):
+        self.prefetch_range_membership(basket)
         covered_ids = []
         value = D('0.00')
         for line in basket.all_lines():
@@ -238,6 +244,7 @@ class ValueCondition(Condition):
         """
         Determine whether a given basket meets this condition
         """
+        self.prefetch_range_membership(basket)
         value_of_matches = D('0.00')
         for line in basket.all_lines():
             if (self.can_apply_condition(line)
@@ -253,6 +260,7 @@ class ValueCondition(Condition):
     def _get_value_of_matches(self, offer, basket):
         if hasattr(self, '_value_of_matches'):
             return getattr(self, '_value_of_matches')
+        self.prefetch_range_membership(basket)
         value_of_matches = D('0.00')
         for line in basket.all_lines():
             if (self.can_apply_condition(line)
@@ -8,4 +8,5 @@ class OfferConfig(AppConfig):
     verbose_name = _('Offer')
 
     def ready(self):
+        from . import receivers  # noqa
         from . import signals  # noqa
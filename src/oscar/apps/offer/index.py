@@ -0,0 +1,118 @@
+import pickle
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from oscar.core.loading import get_class, get_model
+
+get_offers_version = get_class('offer.cache', 'get_offers_version')
+
+OFFER_INDEX_KEY = 'oscar-offer-index-%s'
+
+
+class OfferIndex(object):
+    """
+    Inverted index from products, product classes and categories to the
+    offers whose condition range can contain them.
+
+    The index is used to skip offers that can't be satisfied by a basket.
+    It only ever narrows down candidates: offers that aren't indexed, and
+    offers whose condition doesn't depend on a range of products, are always
+    returned.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.by_product = {}
+        self.by_class = {}
+        self.by_category = {}
+        self.unrestricted = set()
+        self.indexed = set()
+
+    def get_candidate_offers(self, basket, offers):
+        """
+        Return the passed offers, minus the ones that can't apply to the
+        basket.  The order of the offers is preserved.
+        """
+        self.refresh()
+        offer_ids = self.get_offer_ids_for_basket(basket)
+        return [offer for offer in offers
+                if offer.id not in self.indexed
+                or offer.id in self.unrestricted
+                or offer.id in offer_ids]
+
+    def get_offer_ids_for_basket(self, basket):
+        """
+        Return the ids of the indexed offers whose condition range intersects
+        the products of the basket.
+        """
+        product_ids = set()
+        for line in basket.all_lines():
+            product_ids.add(line.product_id)
+            if line.product.parent_id:
+                product_ids.add(line.product.parent_id)
+        if not product_ids:
+            return set()
+
+        Product = get_model('catalogue', 'Product')
+        offer_ids = set()
+        rows = Product.objects.filter(id__in=product_ids).values_list(
+            'product_class_id', 'productcategory__category_id')
+        for class_id, category_id in rows:
+            offer_ids.update(self.by_class.get(class_id, ()))
+            offer_ids.update(self.by_category.get(category_id, ()))
+        for product_id in product_ids:
+            offer_ids.update(self.by_product.get(product_id, ()))
+        return offer_ids
+
+    def refresh(self):
+        version = get_offers_version()
+        if self.version == version:
+            return
+        key = OFFER_INDEX_KEY % version
+        data = cache.get(key)
+        if data is None:
+            data = pickle.dumps(self.build(), pickle.HIGHEST_PROTOCOL)
+            cache.set(key, data, settings.OSCAR_OFFERS_CACHE_TIMEOUT)
+        (self.by_product, self.by_class, self.by_category,
+         self.unrestricted, self.indexed) = pickle.loads(data)
+        self.version = version
+
+    def build(self):
+        """
+        Build the index from the ranges of the active offers' conditions
+        """
+        ConditionalOffer = get_model('offer', 'ConditionalOffer')
+        by_product = defaultdict(set)
+        by_class = defaultdict(set)
+        by_category = defaultdict(set)
+        unrestricted = set()
+        indexed = set()
+
+        ranges = {}
+        offers = ConditionalOffer.active.select_related(
+            'condition', 'condition__range')
+        for offer in offers:
+            indexed.add(offer.id)
+            condition = offer.condition
+            if condition.proxy_class or condition.range_id is None:
+                # Custom conditions may not depend on the range at all
+                unrestricted.add(offer.id)
+                continue
+            range = ranges.setdefault(condition.range_id, condition.range)
+            if range.proxy_class or range.includes_all_products:
+                unrestricted.add(offer.id)
+                continue
+            for product_id in range._included_product_ids():
+                by_product[product_id].add(offer.id)
+            for class_id in range._class_ids():
+                by_class[class_id].add(offer.id)
+            for category_id in range._category_ids():
+                by_category[category_id].add(offer.id)
+
+        return (dict(by_product), dict(by_class), dict(by_category),
+                unrestricted, indexed)
+
+
+offer_index = OfferIndex()
@@ -0,0 +1,32 @@
+# Generated by Django 2.1.15 on 2026-10-18 05:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogue', '0013_auto_20170821_1548'),
+        ('offer', '0009_auto_20181129_1245'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RangeMembership',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='range_memberships', to='catalogue.Product', verbose_name='Product')),
+                ('range', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='offer.Range', verbose_name='Range')),
+            ],
+            options={
+                'verbose_name': 'Range membership',
+                'verbose_name_plural': 'Range memberships',
+                'abstract': False,
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='rangemembership',
+            unique_together={('range', 'product')},
+        ),
+    ]
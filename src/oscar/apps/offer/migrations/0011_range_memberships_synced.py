@@ -0,0 +1,18 @@
+# Generated by Django 2.1.15 on 2026-10-18 07:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('offer', '0010_rangemembership'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='range',
+            name='memberships_synced',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Memberships synced'),
+        ),
+    ]
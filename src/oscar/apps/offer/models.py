@@ -1,6 +1,7 @@
 from oscar.apps.offer.abstract_models import (
     AbstractBenefit, AbstractCondition, AbstractConditionalOffer,
-    AbstractRange, AbstractRangeProduct, AbstractRangeProductFileUpload)
+    AbstractRange, AbstractRangeMembership, AbstractRangeProduct,
+    AbstractRangeProductFileUpload)
 from oscar.apps.offer.results import (
     SHIPPING_DISCOUNT, ZERO_DISCOUNT, BasketDiscount, PostOrderAction,
     ShippingDiscount)
@@ -47,6 +48,13 @@ if not is_model_registered('offer', 'RangeProduct'):
     __all__.append('RangeProduct')
 
 
+if not is_model_registered('offer', 'RangeMembership'):
+    class RangeMembership(AbstractRangeMembership):
+        pass
+
+    __all__.append('RangeMembership')
+
+
 if not is_model_registered('offer', 'RangeProductFileUpload'):
     class RangeProductFileUpload(AbstractRangeProductFileUpload):
         pass
@@ -0,0 +1,176 @@
+import threading
+import time
+
+import django.dispatch
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+OFFER_TIMINGS_KEY = 'oscar-offer-timings-%d'
+# Number of buckets the rolling window of offer timings is split into
+NUM_TIMING_BUCKETS = 12
+
+offer_profiled = django.dispatch.Signal(
+    providing_args=["offer", "basket", "duration", "num_queries",
+                    "num_contains_product", "num_applications"])
+
+_local = threading.local()
+
+
+def record_contains_product(num_products=1):
+    """
+    Count products checked against a range towards the offer being profiled
+    """
+    profile = getattr(_local, 'profile', None)
+    if profile is not None:
+        profile.num_contains_product += num_products
+
+
+class OfferProfile(object):
+    """
+    Context manager that measures applying an offer to a basket.
+
+    The wall time, the number of database queries, the number of products
+    checked against a range and the number of applications are sent with the
+    ``offer_profiled`` signal when the block exits.
+    """
+
+    def __init__(self, offer, basket):
+        self.offer = offer
+        self.basket = basket
+        self.duration = None
+        self.num_queries = 0
+        self.num_contains_product = 0
+        self.num_applications = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Database execute wrapper
+        self.num_queries += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self.parent = getattr(_local, 'profile', None)
+        _local.profile = self
+        connection.execute_wrappers.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.duration = time.perf_counter() - self.start
+        connection.execute_wrappers.remove(self)
+        _local.profile = self.parent
+        if exc_type is None:
+            offer_profiled.send(
+                sender=self.__class__, offer=self.offer, basket=self.basket,
+                duration=self.duration, num_queries=self.num_queries,
+                num_contains_product=self.num_contains_product,
+                num_applications=self.num_applications)
+
+
+class OfferTimings(object):
+    """
+    Aggregates offer profiles over a rolling window in the cache backend.
+
+    Profiles are aggregated in memory for each thread and written to the
+    cache once, when the request finishes.  The window is split into buckets
+    so old profiles expire without having to store each of them.  Updates
+    aren't atomic, so concurrent requests may occasionally lose a profile.
+    """
+    stats_fields = ('count', 'total_duration', 'num_queries',
+                    'num_contains_product', 'num_applications')
+
+    def __init__(self):
+        self._local = threading.local()
+
+    @property
+    def pending(self):
+        if not hasattr(self._local, 'pending'):
+            self._local.pending = {}
+        return self._local.pending
+
+    @property
+    def bucket_length(self):
+        return max(1, settings.OSCAR_OFFERS_PROFILE_WINDOW // NUM_TIMING_BUCKETS)
+
+    def get_bucket(self, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        return int(timestamp // self.bucket_length)
+
+    def record(self, offer, duration, num_queries=0, num_contains_product=0,
+               num_applications=0):
+        """
+        Add the profile of an offer to the pending timings of this thread
+        """
+        self.merge(self.pending, {
+            'offer_id': offer.id,
+            'name': offer.name,
+            'count': 1,
+            'total_duration': duration,
+            'max_duration': duration,
+            'num_queries': num_queries,
+            'num_contains_product': num_contains_product,
+            'num_applications': num_applications,
+        })
+
+    def merge(self, timings, stats):
+        total = timings.get(stats['offer_id'])
+        if total is None:
+            timings[stats['offer_id']] = dict(stats)
+            return
+        total['name'] = stats['name']
+        for field in self.stats_fields:
+            total[field] += stats[field]
+        total['max_duration'] = max(
+            total['max_duration'], stats['max_duration'])
+
+    def flush(self):
+        """
+        Write the pending timings of this thread to the current bucket
+        """
+        pending = self.pending
+        if not pending:
+            return
+        self._local.pending = {}
+        key = OFFER_TIMINGS_KEY % self.get_bucket()
+        timings = cache.get(key) or {}
+        for stats in pending.values():
+            self.merge(timings, stats)
+        cache.set(key, timings,
+                  settings.OSCAR_OFFERS_PROFILE_WINDOW + self.bucket_length)
+
+    def get_timings(self):
+        """
+        Return the aggregated timings of the offers applied within the window
+        """
+        self.flush()
+        current = self.get_bucket()
+        keys = [OFFER_TIMINGS_KEY % bucket for bucket in
+                range(current - NUM_TIMING_BUCKETS + 1, current + 1)]
+        aggregated = {}
+        for timings in cache.get_many(keys).values():
+            for stats in timings.values():
+                self.merge(aggregated, stats)
+        for stats in aggregated.values():
+            stats['mean_duration'] = stats['total_duration'] / stats['count']
+            stats['mean_queries'] = stats['num_queries'] / stats['count']
+        return aggregated.values()
+
+    def get_slowest(self, limit=None):
+        """
+        Return the timings ordered by their mean duration, slowest first
+        """
+        timings = sorted(self.get_timings(),
+                         key=lambda stats: stats['mean_duration'],
+                         reverse=True)
+        return timings[:limit] if limit else timings
+
+    def clear(self):
+        self._local.pending = {}
+        current = self.get_bucket()
+        cache.delete_many([
+            OFFER_TIMINGS_KEY % bucket for bucket in
+            range(current - NUM_TIMING_BUCKETS + 1, current + 1)])
+
+
+offer_timings = OfferTimings()
@@ -0,0 +1,252 @@
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from oscar.core.loading import get_class, get_classes, get_model
+
+category_moved = get_class('catalogue.signals', 'category_moved')
+invalidate_offers = get_class('offer.cache', 'invalidate_offers')
+offer_profiled, offer_timings = get_classes(
+    'offer.profiling', ['offer_profiled', 'offer_timings'])
+
+ConditionalOffer = get_model('offer', 'ConditionalOffer')
+Condition = get_model('offer', 'Condition')
+Benefit = get_model('offer', 'Benefit')
+Range = get_model('offer', 'Range')
+RangeProduct = get_model('offer', 'RangeProduct')
+Category = get_model('catalogue', 'Category')
+Product = get_model('catalogue', 'Product')
+ProductCategory = get_model('catalogue', 'ProductCategory')
+
+
+@receiver(post_save, sender=ConditionalOffer)
+@receiver(post_delete, sender=ConditionalOffer)
+@receiver(post_save, sender=Condition)
+@receiver(post_delete, sender=Condition)
+@receiver(post_save, sender=Benefit)
+@receiver(post_delete, sender=Benefit)
+@receiver(post_save, sender=Range)
+@receiver(post_delete, sender=Range)
+def invalidate_compiled_offers(sender, instance, **kwargs):
+    """
+    Expire the compiled site offers when any part of an offer changes.
+
+    Recording the usage of an offer after each order only updates its usage
+    counters, which don't affect the compiled offers unless the offer has a
+    global application limit.
+    """
+    if kwargs.get('raw', False):
+        return
+    update_fields = kwargs.get('update_fields')
+    if (isinstance(instance, ConditionalOffer) and update_fields
+            and set(update_fields) <= set(instance.usage_fields)
+            and not instance.max_global_applications):
+        return
+    invalidate_offers()
+
+
+@receiver(post_save, sender=RangeProduct)
+@receiver(post_delete, sender=RangeProduct)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_offers_on_range_change(sender, **kwargs):
+    """
+    Expire the offer index when the products covered by a range change.
+
+    Saving a category can add descendants to the categories of a range.
+    """
+    if kwargs.get('raw', False):
+        return
+    invalidate_offers()
+
+
+@receiver(category_moved)
+def invalidate_offers_on_category_move(sender, category, **kwargs):
+    """
+    Moving a category changes the descendants of the categories it's moved
+    out of and into
+    """
+    invalidate_offers()
+
+
+@receiver(m2m_changed, sender=Range.classes.through)
+@receiver(m2m_changed, sender=Range.included_categories.through)
+def invalidate_offers_on_range_m2m_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_offers()
+
+
+# Range memberships
+
+
+def get_membership_ranges(product_ids):
+    """
+    Return the ranges that the passed products, or their children, may join
+    or leave.
+    """
+    products = Product.objects.filter(
+        Q(id__in=product_ids) | Q(children__id__in=product_ids))
+    ids, class_ids = set(), set()
+    for product_id, class_id in products.values_list('id', 'product_class_id'):
+        ids.add(product_id)
+        if class_id:
+            class_ids.add(class_id)
+    paths = Category.objects.filter(
+        productcategory__product_id__in=ids).values_list('path', flat=True)
+    return Range.objects.filter(
+        Q(memberships__product_id__in=product_ids)
+        | Q(memberships__product__parent_id__in=product_ids)
+        | Q(included_products__in=ids)
+        | Q(classes__in=class_ids)
+        | Q(included_categories__path__in=get_ancestor_paths(paths))
+    ).distinct()
+
+
+def get_ancestor_paths(paths):
+    """
+    Return the paths of the passed category paths and of their ancestors
+    """
+    steplen = Category.steplen
+    ancestor_paths = set()
+    for path in paths:
+        ancestor_paths.update(
+            path[:i] for i in range(steplen, len(path) + 1, steplen))
+    return ancestor_paths
+
+
+def sync_product_memberships(product_ids, **kwargs):
+    for range in get_membership_ranges(product_ids):
+        range.sync_memberships(product_ids, **kwargs)
+
+
+def sync_category_memberships(path, ancestor_paths):
+    """
+    Update the memberships of the products in the subtree of a category, for
+    the ranges that include one of the passed categories.
+    """
+    ranges = Range.objects.filter(
+        included_categories__path__in=ancestor_paths).distinct()
+    if not ranges:
+        return
+    product_ids = list(ProductCategory.objects.filter(
+        category__path__startswith=path
+    ).values_list('product_id', flat=True).distinct())
+    if not product_ids:
+        return
+    for range in ranges:
+        range.sync_memberships(product_ids)
+
+
+@receiver(post_save, sender=Range)
+def update_memberships_on_range_save(sender, instance, **kwargs):
+    if not settings.OSCAR_OFFERS_RANGE_MEMBERSHIP or kwargs.get('raw', False):
+        return
+    instance.sync_memberships()
+
+
+@receiver(post_save, sender=RangeProduct)
+@receiver(post_delete, sender=RangeProduct)
+def update_memberships_on_range_product_change(sender, instance, **kwargs):
+    if not settings.OSCAR_OFFERS_RANGE_MEMBERSHIP or kwargs.get('raw', False):
+        return
+    # Adding a product can only grow a range, removing it can only shrink it
+    added = 'created' in kwargs
+    for range in Range.objects.filter(pk=instance.range_id):
+        range.sync_memberships(
+            [instance.product_id], add=added, remove=not added)
+
+
+@receiver(m2m_changed, sender=Range.excluded_products.through)
+def update_memberships_on_exclusion(sender, instance, action, reverse,
+                                    pk_set, **kwargs):
+    if not settings.OSCAR_OFFERS_RANGE_MEMBERSHIP:
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    # Excluding products shrinks a range, removing exclusions grows it
+    shrinks = action == 'post_add'
+    if reverse:
+        ranges = Range.objects.all() if pk_set is None \
+            else Range.objects.filter(pk__in=pk_set)
+        for range in ranges:
+            range.sync_memberships(
+                [instance.pk], add=not shrinks, remove=shrinks)
+    else:
+        product_ids = None if pk_set is None else list(pk_set)
+        instance.sync_memberships(
+            product_ids, add=not shrinks, remove=shrinks)
+
+
+@receiver(m2m_changed, sender=Range.classes.through)
+@receiver(m2m_changed, sender=Range.included_categories.through)
+def update_memberships_on_range_m2m_change(sender, instance, action, reverse,
+                                           pk_set, **kwargs):
+    if not settings.OSCAR_OFFERS_RANGE_MEMBERSHIP:
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    grows = action == 'post_add'
+    if reverse:
+        ranges = Range.objects.all() if pk_set is None \
+            else Range.objects.filter(pk__in=pk_set)
+    else:
+        ranges = [instance]
+    for range in ranges:
+        range.sync_memberships(add=grows, remove=not grows)
+
+
+@receiver(post_save, sender=Product)
+def update_memberships_on_product_save(sender, instance, **kwargs):
+    if not settings.OSCAR_OFFERS_RANGE_MEMBERSHIP or kwargs.get('raw', False):
+        return
+    sync_product_memberships([instance.pk])
+
+
+@receiver(post_save, sender=ProductCategory)
+@receiver(post_delete, sender=ProductCategory)
+def update_memberships_on_product_category_change(sender, instance, **kwargs):
+    if not settings.OSCAR_OFFERS_RANGE_MEMBERSHIP or kwargs.get('raw', False):
+        return
+    # Deleting a category assignment can only shrink ranges, and the product
+    # itself may be in the middle of being deleted.
+    added = 'created' in kwargs
+    sync_product_memberships([instance.product_id], add=added)
+
+
+@receiver(post_save, sender=Category)
+def update_memberships_on_category_save(sender, instance, **kwargs):
+    if not settings.OSCAR_OFFERS_RANGE_MEMBERSHIP or kwargs.get('raw', False):
+        return
+    # The category may have been added below a category of a range
+    sync_category_memberships(
+        instance.path, get_ancestor_paths([instance.path]))
+
+
+@receiver(category_moved)
+def update_memberships_on_category_move(sender, category, old_path,
+                                        **kwargs):
+    if not settings.OSCAR_OFFERS_RANGE_MEMBERSHIP:
+        return
+    # The moved instance keeps its old path
+    path = Category.objects.filter(pk=category.pk).values_list(
+        'path', flat=True).get()
+    # The subtree leaves the ranges of its old ancestors and joins the ranges
+    # of its new ones
+    sync_category_memberships(
+        path, get_ancestor_paths([old_path, path]))
+
+
+@receiver(offer_profiled)
+def record_offer_timing(sender, offer, duration, num_queries,
+                        num_contains_product, num_applications, **kwargs):
+    offer_timings.record(
+        offer, duration, num_queries=num_queries,
+        num_contains_product=num_contains_product,
+        num_applications=num_applications)
+
+
+@receiver(request_finished)
+def write_offer_timings(sender, **kwargs):
+    offer_timings.flush()
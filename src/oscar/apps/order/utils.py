@@ -3,6 +3,7 @@ from decimal import Decimal as D
 from django.conf import settings
 from django.contrib.sites.models import Site
 from django.db import transaction
+from django.db.models import prefetch_related_objects
 from django.utils.translation import gettext_lazy as _
 
 from oscar.apps.order.signals import order_placed
@@ -12,7 +13,10 @@ from . import exceptions
 
 Order = get_model('order', 'Order')
 Line = get_model('order', 'Line')
+LineAttribute = get_model('order', 'LineAttribute')
+LinePrice = get_model('order', 'LinePrice')
 OrderDiscount = get_model('order', 'OrderDiscount')
+StockRecord = get_model('partner', 'StockRecord')
 
 
 class OrderNumberGenerator(object):
@@ -61,9 +65,16 @@ class OrderCreator(object):
             order = self.create_order_model(
                 user, basket, shipping_address, shipping_method, shipping_charge,
                 billing_address, total, order_number, status, request, **kwargs)
-            for line in basket.all_lines():
-                self.create_line_models(order, line)
-                self.update_stock_records(line)
+            if settings.OSCAR_BULK_CREATE_ORDER_LINES \
+                    and not self.overrides_line_hooks():
+                self.create_line_models_in_bulk(order, basket.all_lines())
+            else:
+                for line in basket.all_lines():
+                    self.create_line_models(order, line)
+                    self.update_stock_records(line)
+            if basket.has_strategy:
+                # Stock has been allocated, so availability may have changed
+                basket.strategy.invalidate_purchase_info()
 
             for voucher in basket.vouchers.select_for_update():
                 available_to_user, msg = voucher.is_available_to_user(user=user)
@@ -137,6 +148,18 @@ class OrderCreator(object):
         You can set extra fields by passing a dictionary as the
         extra_line_fields value
         """
+        line_data = self.get_line_data(order, basket_line, extra_line_fields)
+        order_line = Line._default_manager.create(**line_data)
+        self.create_line_price_models(order, order_line, basket_line)
+        self.create_line_attributes(order, order_line, basket_line)
+        self.create_additional_line_models(order, order_line, basket_line)
+
+        return order_line
+
+    def get_line_data(self, order, basket_line, extra_line_fields=None):
+        """
+        Return the fields of the order line of a basket line
+        """
         product = basket_line.product
         stockrecord = basket_line.stockrecord
         if not stockrecord:
@@ -180,13 +203,64 @@ class OrderCreator(object):
                     settings, 'OSCAR_INITIAL_LINE_STATUS')
         if extra_line_fields:
             line_data.update(extra_line_fields)
+        return line_data
 
-        order_line = Line._default_manager.create(**line_data)
-        self.create_line_price_models(order, order_line, basket_line)
-        self.create_line_attributes(order, order_line, basket_line)
-        self.create_additional_line_models(order, order_line, basket_line)
+    def create_line_models_in_bulk(self, order, basket_lines):
+        """
+        Create the order lines of all the basket lines, with their prices and
+        attributes, and allocate their stock in a few queries.
 
-        return order_line
+        This is used instead of calling ``create_line_models`` and
+        ``update_stock_records`` for each line when
+        ``OSCAR_BULK_CREATE_ORDER_LINES`` is enabled.  The
+        ``create_additional_line_models`` hook is still called for each line.
+        """
+        basket_lines = list(basket_lines)
+        prefetch_related_objects(
+            basket_lines, 'stockrecord__partner', 'attributes__option')
+        order_lines = Line._default_manager.bulk_create([
+            Line(**self.get_line_data(order, basket_line))
+            for basket_line in basket_lines])
+        if order_lines and order_lines[0].pk is None:
+            # Not every database returns the ids of bulk-created rows, but the
+            # lines of the new order are the ones just created
+            order_lines = list(order.lines.order_by('pk'))
+
+        prices, attributes = [], []
+        for order_line, basket_line in zip(order_lines, basket_lines):
+            breakdown = basket_line.get_price_breakdown()
+            for price_incl_tax, price_excl_tax, quantity in breakdown:
+                prices.append(LinePrice(
+                    order=order,
+                    line=order_line,
+                    quantity=quantity,
+                    price_incl_tax=price_incl_tax,
+                    price_excl_tax=price_excl_tax))
+            for attr in basket_line.attributes.all():
+                attributes.append(LineAttribute(
+                    line=order_line,
+                    option=attr.option,
+                    type=attr.option.code,
+                    value=attr.value))
+        LinePrice._default_manager.bulk_create(prices)
+        LineAttribute._default_manager.bulk_create(attributes)
+
+        for order_line, basket_line in zip(order_lines, basket_lines):
+            self.create_additional_line_models(order, order_line, basket_line)
+
+        self.update_stock_records_in_bulk(basket_lines)
+        return order_lines
+
+    def overrides_line_hooks(self):
+        """
+        Test whether this creator overrides a method that creates the models
+        of a line one at a time.  Bulk creation would skip it, so lines are
+        then created one at a time.
+        """
+        return any(
+            getattr(type(self), name) is not getattr(OrderCreator, name)
+            for name in ('create_line_models', 'create_line_price_models',
+                         'create_line_attributes', 'update_stock_records'))
 
     def update_stock_records(self, line):
         """
@@ -195,6 +269,20 @@ class OrderCreator(object):
         if line.product.get_product_class().track_stock:
             line.stockrecord.allocate(line.quantity)
 
+    def update_stock_records_in_bulk(self, lines):
+        """
+        Update the stock records of all the lines in one statement
+        """
+        # Load what's needed to tell which stockrecords track stock
+        stockrecords = [line.stockrecord for line in lines]
+        prefetch_related_objects(stockrecords, 'product__product_class')
+        prefetch_related_objects(
+            [stockrecord.product for stockrecord in stockrecords
+             if stockrecord.product.is_child],
+            'parent__product_class')
+        StockRecord._default_manager.allocate(
+            [(line.stockrecord, line.quantity) for line in lines])
+
     def create_additional_line_models(self, order, order_line, basket_line):
         """
         Empty method designed to be overridden.
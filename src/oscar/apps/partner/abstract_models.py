@@ -1,6 +1,9 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models, router
 from django.db.models import F, Value, signals
-from django.db.models.functions import Coalesce
+from django.db.models.functions import Coalesce, Greatest
 from django.utils.functional import cached_property
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
@@ -14,6 +17,7 @@ from oscar.models.fields import AutoSlugField
 
 
 Model = get_class('core.models', 'Model')
+StockRecordQuerySet = get_class('partner.managers', 'StockRecordQuerySet')
 
 
 class AbstractPartner(Model):
@@ -153,6 +157,8 @@ class AbstractStockRecord(Model):
     date_updated = models.DateTimeField(_("Date updated"), auto_now=True,
                                         db_index=True)
 
+    objects = StockRecordQuerySet.as_manager()
+
     def __str__(self):
         msg = "Partner: %s, product: %s" % (
             self.partner.display_name, self.product,)
@@ -189,43 +195,62 @@ class AbstractStockRecord(Model):
 
     # 2-stage stock management model
 
-    def allocate(self, quantity):
+    def _send_pre_save(self):
+        signals.pre_save.send(
+            sender=self.__class__,
+            instance=self,
+            raw=False,
+            using=router.db_for_write(self.__class__, instance=self),
+            update_fields=None)
+
+    def _send_post_save(self, previous_net_stock_level):
+        # Stock is updated with UPDATE statements rather than by saving the
+        # stockrecord, so send the signal explicitly.  The previous stock
+        # level lets receivers tell whether a threshold was crossed.
+        self.previous_net_stock_level = previous_net_stock_level
+        try:
+            signals.post_save.send(
+                sender=self.__class__,
+                instance=self,
+                created=False,
+                raw=False,
+                using=router.db_for_write(self.__class__, instance=self),
+                update_fields=None)
+        finally:
+            del self.previous_net_stock_level
+
+    def allocate(self, quantity, check_stock=False):
         """
         Record a stock allocation.
 
         This normally happens when a product is bought at checkout.  When the
         product is actually shipped, then we 'consume' the allocation.
 
+        The allocation is a single UPDATE statement, so concurrent allocations
+        can't overwrite each other.  If ``check_stock`` is True, stock is only
+        allocated if enough of it is available.  Returns whether the stock was
+        allocated.
         """
         # Doesn't make sense to allocate if stock tracking is off.
         if not self.can_track_allocations:
-            return
-        # Send the pre-save signal
-        signals.pre_save.send(
-            sender=self.__class__,
-            instance=self,
-            created=False,
-            raw=False,
-            using=router.db_for_write(self.__class__, instance=self))
+            return True
+        self._send_pre_save()
 
         # Atomic update
-        (self.__class__.objects
-            .filter(pk=self.pk)
-            .update(num_allocated=(
-                Coalesce(F('num_allocated'), Value(0)) + quantity)))
+        allocated = Coalesce(F('num_allocated'), Value(0))
+        queryset = self.__class__.objects.filter(pk=self.pk)
+        if check_stock:
+            queryset = queryset.filter(num_in_stock__gte=allocated + quantity)
+        if not queryset.update(num_allocated=allocated + quantity):
+            return False
 
         # Make sure the current object is up-to-date
+        previous_level = self.net_stock_level
         if self.num_allocated is None:
             self.num_allocated = 0
         self.num_allocated += quantity
-
-        # Send the post-save signal
-        signals.post_save.send(
-            sender=self.__class__,
-            instance=self,
-            created=False,
-            raw=False,
-            using=router.db_for_write(self.__class__, instance=self))
+        self._send_post_save(previous_level)
+        return True
 
     allocate.alters_data = True
 
@@ -247,18 +272,38 @@ class AbstractStockRecord(Model):
         if not self.is_allocation_consumption_possible(quantity):
             raise InvalidStockAdjustment(
                 _('Invalid stock consumption request'))
+        self._send_pre_save()
+        # The stock may have been consumed since this object was loaded
+        updated = (
+            self.__class__.objects
+            .filter(pk=self.pk, num_allocated__gte=quantity,
+                    num_in_stock__gte=quantity)
+            .update(num_allocated=F('num_allocated') - quantity,
+                    num_in_stock=F('num_in_stock') - quantity,
+                    date_updated=now()))
+        if not updated:
+            raise InvalidStockAdjustment(
+                _('Invalid stock consumption request'))
+        previous_level = self.net_stock_level
         self.num_allocated -= quantity
         self.num_in_stock -= quantity
-        self.save()
+        self._send_post_save(previous_level)
     consume_allocation.alters_data = True
 
     def cancel_allocation(self, quantity):
         if not self.can_track_allocations:
             return
+        self._send_pre_save()
         # We ignore requests that request a cancellation of more than the
         # amount already allocated.
-        self.num_allocated -= min(self.num_allocated, quantity)
-        self.save()
+        (self.__class__.objects
+            .filter(pk=self.pk)
+            .update(num_allocated=Greatest(
+                Coalesce(F('num_allocated'), Value(0)) - quantity, Value(0)),
+                date_updated=now()))
+        previous_level = self.net_stock_level
+        self.num_allocated = max((self.num_allocated or 0) - quantity, 0)
+        self._send_post_save(previous_level)
     cancel_allocation.alters_data = True
 
     @property
@@ -304,3 +349,76 @@ class AbstractStockAlert(Model):
         ordering = ('-date_created',)
         verbose_name = _('Stock alert')
         verbose_name_plural = _('Stock alerts')
+
+
+class AbstractProductPriceSnapshot(Model):
+    """
+    The price and availability of a product, as determined by the strategy
+    for anonymous customers.
+
+    Only maintained when OSCAR_PRICE_SNAPSHOTS is enabled, in which case it
+    is read instead of the stockrecords of children when determining the
+    price and availability of parent products, and when indexing products.
+    """
+    product = models.OneToOneField(
+        'catalogue.Product',
+        on_delete=models.CASCADE,
+        related_name='price_snapshot',
+        verbose_name=_("Product"))
+    stockrecord = models.ForeignKey(
+        'partner.StockRecord',
+        on_delete=models.SET_NULL,
+        related_name='+',
+        blank=True, null=True,
+        verbose_name=_("Stock record"))
+
+    currency = models.CharField(_("Currency"), max_length=12, blank=True)
+    price_excl_tax = models.DecimalField(
+        _("Price (excl. tax)"), decimal_places=2, max_digits=12,
+        blank=True, null=True)
+    price_incl_tax = models.DecimalField(
+        _("Price (incl. tax)"), decimal_places=2, max_digits=12,
+        blank=True, null=True)
+
+    #: The range of prices of the children of a parent product
+    min_price_excl_tax = models.DecimalField(
+        _("Minimum price (excl. tax)"), decimal_places=2, max_digits=12,
+        blank=True, null=True)
+    max_price_excl_tax = models.DecimalField(
+        _("Maximum price (excl. tax)"), decimal_places=2, max_digits=12,
+        blank=True, null=True)
+
+    availability_code = models.CharField(
+        _("Availability code"), max_length=128, blank=True)
+    is_available_to_buy = models.BooleanField(
+        _("Is available to buy"), default=False)
+
+    #: The number available to buy, if the availability depends on stock
+    num_available = models.IntegerField(
+        _("Number available"), blank=True, null=True)
+
+    #: The net stock level of the stockrecord
+    num_in_stock = models.IntegerField(
+        _("Number in stock"), blank=True, null=True)
+
+    date_updated = models.DateTimeField(_("Date updated"), auto_now=True,
+                                        db_index=True)
+
+    class Meta:
+        abstract = True
+        app_label = 'partner'
+        verbose_name = _("Product price snapshot")
+        verbose_name_plural = _("Product price snapshots")
+
+    def __str__(self):
+        return str(self.product)
+
+    @property
+    def is_fresh(self):
+        """
+        Test whether the snapshot is recent enough to be used
+        """
+        max_age = settings.OSCAR_PRICE_SNAPSHOT_MAX_AGE
+        if max_age is None:
+            return True
+        return self.date_updated >= now() - timedelta(seconds=max_age)
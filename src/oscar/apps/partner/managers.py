@@ -0,0 +1,61 @@
+from collections import OrderedDict
+
+from django.db import models, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Coalesce
+
+
+class StockRecordQuerySet(models.query.QuerySet):
+
+    def allocate(self, allocations, check_stock=False):
+        """
+        Record the stock allocations of several stockrecords, eg for all the
+        lines of an order, with a single UPDATE statement.
+
+        ``allocations`` is a list of ``(stockrecord, quantity)`` pairs.
+        Stockrecords whose product doesn't track stock are ignored.  If
+        ``check_stock`` is True, nothing is allocated unless every stockrecord
+        has enough stock available.  Returns whether the stock was allocated.
+        """
+        quantities = OrderedDict()
+        instances = OrderedDict()
+        for stockrecord, quantity in allocations:
+            if not stockrecord.can_track_allocations:
+                continue
+            quantities[stockrecord.pk] = (
+                quantities.get(stockrecord.pk, 0) + quantity)
+            instances.setdefault(stockrecord.pk, {})[id(stockrecord)] = \
+                stockrecord
+        if not quantities:
+            return True
+
+        for records in instances.values():
+            for stockrecord in records.values():
+                stockrecord._send_pre_save()
+
+        allocated = Coalesce(F('num_allocated'), Value(0))
+        quantity = Case(
+            *[When(pk=pk, then=Value(value))
+              for pk, value in quantities.items()],
+            output_field=IntegerField())
+        queryset = self.filter(pk__in=list(quantities))
+        if check_stock:
+            with transaction.atomic(using=self.db):
+                updated = queryset.filter(
+                    num_in_stock__gte=allocated + quantity
+                ).update(num_allocated=allocated + quantity)
+                if updated < len(quantities):
+                    # Some stockrecords don't have enough stock
+                    transaction.set_rollback(True, using=self.db)
+                    return False
+        else:
+            updated = queryset.update(num_allocated=allocated + quantity)
+
+        # Make sure the passed objects are up-to-date
+        for pk, records in instances.items():
+            for stockrecord in records.values():
+                previous_level = stockrecord.net_stock_level
+                stockrecord.num_allocated = (
+                    (stockrecord.num_allocated or 0) + quantities[pk])
+                stockrecord._send_post_save(previous_level)
+        return updated == len(quantities)
@@ -0,0 +1,38 @@
+# Generated by Django 2.1.15 on 2026-10-18 06:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogue', '0013_auto_20170821_1548'),
+        ('partner', '0005_auto_20181115_1953'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductPriceSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(blank=True, max_length=12, verbose_name='Currency')),
+                ('price_excl_tax', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, verbose_name='Price (excl. tax)')),
+                ('price_incl_tax', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, verbose_name='Price (incl. tax)')),
+                ('min_price_excl_tax', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, verbose_name='Minimum price (excl. tax)')),
+                ('max_price_excl_tax', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, verbose_name='Maximum price (excl. tax)')),
+                ('availability_code', models.CharField(blank=True, max_length=128, verbose_name='Availability code')),
+                ('is_available_to_buy', models.BooleanField(default=False, verbose_name='Is available to buy')),
+                ('num_available', models.IntegerField(blank=True, null=True, verbose_name='Number available')),
+                ('num_in_stock', models.IntegerField(blank=True, null=True, verbose_name='Number in stock')),
+                ('date_updated', models.DateTimeField(auto_now=True, db_index=True, verbose_name='Date updated')),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='price_snapshot', to='catalogue.Product', verbose_name='Product')),
+                ('stockrecord', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='partner.StockRecord', verbose_name='Stock record')),
+            ],
+            options={
+                'verbose_name': 'Product price snapshot',
+                'verbose_name_plural': 'Product price snapshots',
+                'abstract': False,
+            },
+        ),
+    ]
@@ -1,10 +1,17 @@
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from oscar.core.loading import get_classes
+from oscar.core.loading import get_class, get_classes
 
 StockRecord, StockAlert = get_classes('partner.models', ['StockRecord',
                                                          'StockAlert'])
+PriceSnapshotUpdater = get_class('partner.snapshots', 'PriceSnapshotUpdater')
+
+# The stockrecord fields that price snapshots are built from
+SNAPSHOT_FIELDS = ['product', 'partner', 'price_currency', 'price_excl_tax',
+                   'num_in_stock', 'num_allocated']
 
 
 @receiver(post_save, sender=StockRecord)
@@ -15,6 +22,15 @@ def update_stock_alerts(sender, instance, created, **kwargs):
     if created or kwargs.get('raw', False):
         return
     stockrecord = instance
+    previous_level = getattr(stockrecord, 'previous_net_stock_level', None)
+    if previous_level is not None:
+        # Only the stock level changed, so alerts only need updating if it
+        # crossed the threshold
+        threshold = stockrecord.low_stock_threshold
+        was_below_threshold = (
+            threshold is not None and previous_level < threshold)
+        if was_below_threshold == stockrecord.is_below_threshold:
+            return
     try:
         alert = StockAlert.objects.get(stockrecord=stockrecord,
                                        status=StockAlert.OPEN)
@@ -26,3 +42,28 @@ def update_stock_alerts(sender, instance, created, **kwargs):
                                   threshold=stockrecord.low_stock_threshold)
     elif not stockrecord.is_below_threshold and alert:
         alert.close()
+
+
+@receiver(post_save, sender=StockRecord)
+@receiver(post_delete, sender=StockRecord)
+def update_price_snapshots(sender, instance, **kwargs):
+    """
+    Update the price snapshots of the product and its parent when the price,
+    currency or stock of a stockrecord changed
+    """
+    if not settings.OSCAR_PRICE_SNAPSHOTS or kwargs.get('raw', False):
+        return
+    update_fields = kwargs.get('update_fields')
+    if update_fields and not set(update_fields) & set(SNAPSHOT_FIELDS):
+        return
+    previous_level = getattr(instance, 'previous_net_stock_level', None)
+    if previous_level is not None:
+        # Only stock was allocated or consumed, so the snapshot only needs
+        # updating if the product went in or out of stock.  The stock levels
+        # of snapshots are refreshed by oscar_update_price_snapshots.
+        if (previous_level > 0) == (instance.net_stock_level > 0):
+            return
+    # Wait for the transaction to commit, as the product may be being deleted
+    product_ids = [instance.product_id]
+    transaction.on_commit(
+        lambda: PriceSnapshotUpdater().update_for_product_ids(product_ids))
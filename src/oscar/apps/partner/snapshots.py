@@ -0,0 +1,97 @@
+from django.db import transaction
+
+from oscar.core.loading import get_class, get_model
+
+Product = get_model('catalogue', 'Product')
+ProductPriceSnapshot = get_model('partner', 'ProductPriceSnapshot')
+Selector = get_class('partner.strategy', 'Selector')
+
+
+class PriceSnapshotUpdater(object):
+    """
+    Rebuilds the price snapshots of products from their stockrecords, using
+    the strategy for anonymous customers.
+    """
+    batch_size = 500
+
+    def get_strategy(self):
+        strategy = Selector().strategy()
+        # Snapshots must be computed from the stockrecords, not from
+        # themselves
+        strategy.use_price_snapshots = False
+        return strategy
+
+    def update(self, products):
+        """
+        Rebuild the snapshots of the passed products
+        """
+        products = list(products)
+        if not products:
+            return
+        strategy = self.get_strategy()
+        parents = [product for product in products if product.is_parent]
+        infos = strategy.fetch_for_products(
+            [product for product in products if not product.is_parent])
+        infos.update(strategy.fetch_for_parents(parents))
+
+        # Children have been prefetched by fetch_for_parents
+        children = [child for parent in parents
+                    for child in parent.children.all()]
+        child_infos = strategy.fetch_for_products(children)
+        snapshots = []
+        for product in products:
+            snapshot = self.get_snapshot(product, infos[product.id])
+            if product.is_parent:
+                prices = [
+                    child_infos[child.id].price.excl_tax
+                    for child in product.children.all()
+                    if child_infos[child.id].price.exists]
+                if prices:
+                    snapshot.min_price_excl_tax = min(prices)
+                    snapshot.max_price_excl_tax = max(prices)
+            snapshots.append(snapshot)
+
+        with transaction.atomic():
+            ProductPriceSnapshot.objects.filter(
+                product_id__in=[product.id for product in products]).delete()
+            ProductPriceSnapshot.objects.bulk_create(snapshots)
+
+    def get_snapshot(self, product, info):
+        price, availability = info.price, info.availability
+        snapshot = ProductPriceSnapshot(
+            product=product,
+            stockrecord=info.stockrecord,
+            availability_code=availability.code,
+            is_available_to_buy=availability.is_available_to_buy,
+            num_available=getattr(availability, 'num_available', None))
+        if price.exists:
+            snapshot.currency = price.currency
+            snapshot.price_excl_tax = price.excl_tax
+            if price.is_tax_known:
+                snapshot.price_incl_tax = price.incl_tax
+        if info.stockrecord is not None:
+            snapshot.num_in_stock = info.stockrecord.net_stock_level
+        return snapshot
+
+    def update_for_product_ids(self, product_ids):
+        """
+        Rebuild the snapshots of products, and of the parents of any child
+        products among them
+        """
+        products = Product.objects.filter(id__in=product_ids)
+        parent_ids = products.exclude(parent=None).values_list(
+            'parent_id', flat=True)
+        self.update(Product.objects.filter(
+            id__in=set(product_ids) | set(parent_ids)))
+
+    def update_all(self):
+        """
+        Rebuild the snapshots of all products in batches and return the
+        number of products
+        """
+        product_ids = list(Product.objects.order_by('id').values_list(
+            'id', flat=True))
+        for start in range(0, len(product_ids), self.batch_size):
+            self.update(Product.objects.filter(
+                id__in=product_ids[start:start + self.batch_size]))
+        return len(product_ids)
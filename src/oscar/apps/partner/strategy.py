@@ -1,6 +1,10 @@
 from collections import namedtuple
 from decimal import Decimal as D
 
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import prefetch_related_objects
+
 from oscar.core.loading import get_class
 
 Unavailable = get_class('partner.availability', 'Unavailable')
@@ -55,11 +59,83 @@ class Base(object):
     - An availability policy instance
     """
 
+    #: Whether the purchase info of each product and stockrecord is only
+    #: computed once per request.  Only enable this for strategies whose
+    #: prices and availability don't change while a request is handled.
+    #: Defaults to the ``OSCAR_STRATEGY_MEMOIZE_PURCHASE_INFO`` setting.
+    memoize_purchase_info = None
+
+    #: Whether the price snapshots of products are read instead of the
+    #: stockrecords of their children.  Snapshots are only read for anonymous
+    #: customers.  Defaults to the ``OSCAR_PRICE_SNAPSHOTS`` setting.
+    use_price_snapshots = None
+
     def __init__(self, request=None):
         self.request = request
         self.user = None
         if request and request.user.is_authenticated:
             self.user = request.user
+        self._purchase_info = {}
+
+    def is_memoizing_purchase_info(self):
+        if self.memoize_purchase_info is None:
+            return settings.OSCAR_STRATEGY_MEMOIZE_PURCHASE_INFO
+        return self.memoize_purchase_info
+
+    def get_memoized_purchase_info(self, key, fetch):
+        """
+        Return the purchase info memoized for a key, calling ``fetch`` to
+        compute it the first time.
+
+        Keys are tuples that start with the product id.  Purchase info is
+        only memoized for strategies created for a request, as strategies
+        used by offline processes can live much longer.
+        """
+        if not self.is_memoizing_purchase_info() or self.request is None:
+            return fetch()
+        try:
+            return self._purchase_info[key]
+        except KeyError:
+            info = self._purchase_info[key] = fetch()
+            return info
+
+    def invalidate_purchase_info(self, product=None):
+        """
+        Forget the memoized purchase info of a product, or of all products.
+
+        This needs calling when stock levels change while handling a request,
+        for example when stock is allocated as an order is placed.
+        """
+        if not self.is_memoizing_purchase_info():
+            return
+        if product is None:
+            self._purchase_info.clear()
+            return
+        # The purchase info of a parent depends on its children
+        product_ids = {product.id, product.parent_id}
+        for key in list(self._purchase_info):
+            if key[0] in product_ids:
+                del self._purchase_info[key]
+
+    def is_using_price_snapshots(self):
+        if self.user is not None:
+            return False
+        if self.use_price_snapshots is None:
+            return settings.OSCAR_PRICE_SNAPSHOTS
+        return self.use_price_snapshots
+
+    def get_price_snapshot(self, product):
+        """
+        Return the price snapshot of a product if it should be used, or None
+        """
+        if not self.is_using_price_snapshots():
+            return None
+        try:
+            snapshot = product.price_snapshot
+        except ObjectDoesNotExist:
+            return None
+        if snapshot.is_fresh:
+            return snapshot
 
     def fetch_for_product(self, product, stockrecord=None):
         """
@@ -90,6 +166,27 @@ class Base(object):
             "information."
         )
 
+    def fetch_for_products(self, products):
+        """
+        Given a list of products, return a dict of ``PurchaseInfo`` instances
+        keyed by product id.
+
+        This is used to fetch the purchase info of a whole page of products
+        at once.  Strategies that can look up the stockrecords of many
+        products in a few queries should override it; by default the
+        purchase info of each product is fetched in turn.
+        """
+        return {product.id: self.fetch_for_product(product)
+                for product in products}
+
+    def fetch_for_parents(self, products):
+        """
+        Given a list of parent products, return a dict of ``PurchaseInfo``
+        instances keyed by product id.
+        """
+        return {product.id: self.fetch_for_parent(product)
+                for product in products}
+
     def fetch_for_line(self, line, stockrecord=None):
         """
         Given a basket line instance, fetch a ``PurchaseInfo`` instance.
@@ -115,27 +212,66 @@ class Structured(Base):
     #) An availability policy
     """
 
+    # Related objects that the policies read, which are loaded for all the
+    # products passed to fetch_for_products and fetch_for_parents at once
+    product_prefetch_lookups = ('product_class', 'stockrecords')
+    child_prefetch_lookups = ('parent__product_class',)
+    parent_prefetch_lookups = ('product_class', 'children__stockrecords')
+
     def fetch_for_product(self, product, stockrecord=None):
         """
         Return the appropriate ``PurchaseInfo`` instance.
 
         This method is not intended to be overridden.
         """
-        if stockrecord is None:
-            stockrecord = self.select_stockrecord(product)
-        return PurchaseInfo(
-            price=self.pricing_policy(product, stockrecord),
-            availability=self.availability_policy(product, stockrecord),
-            stockrecord=stockrecord)
+        def fetch():
+            selected = stockrecord
+            if selected is None:
+                selected = self.select_stockrecord(product)
+            return PurchaseInfo(
+                price=self.pricing_policy(product, selected),
+                availability=self.availability_policy(product, selected),
+                stockrecord=selected)
+
+        key = (product.id, 'product', stockrecord.id if stockrecord else None)
+        return self.get_memoized_purchase_info(key, fetch)
 
     def fetch_for_parent(self, product):
-        # Select children and associated stockrecords
-        children_stock = self.select_children_stockrecords(product)
-        return PurchaseInfo(
-            price=self.parent_pricing_policy(product, children_stock),
-            availability=self.parent_availability_policy(
-                product, children_stock),
-            stockrecord=None)
+        def fetch():
+            snapshot = self.get_price_snapshot(product)
+            if snapshot is not None:
+                return PurchaseInfo(
+                    price=self.snapshot_pricing_policy(product, snapshot),
+                    availability=self.snapshot_availability_policy(
+                        product, snapshot),
+                    stockrecord=None)
+            # Select children and associated stockrecords
+            children_stock = self.select_children_stockrecords(product)
+            return PurchaseInfo(
+                price=self.parent_pricing_policy(product, children_stock),
+                availability=self.parent_availability_policy(
+                    product, children_stock),
+                stockrecord=None)
+
+        return self.get_memoized_purchase_info((product.id, 'parent'), fetch)
+
+    def fetch_for_products(self, products):
+        products = list(products)
+        prefetch_related_objects(products, *self.product_prefetch_lookups)
+        prefetch_related_objects(
+            [product for product in products if product.is_child],
+            *self.child_prefetch_lookups)
+        return super().fetch_for_products(products)
+
+    def fetch_for_parents(self, products):
+        products = list(products)
+        missing = products
+        if self.is_using_price_snapshots():
+            prefetch_related_objects(products, 'price_snapshot')
+            missing = [product for product in products
+                       if self.get_price_snapshot(product) is None]
+        prefetch_related_objects(missing, *self.parent_prefetch_lookups)
+        return super().fetch_for_parents(products)
 
     def select_stockrecord(self, product):
         """
@@ -155,6 +291,30 @@ class Structured(Base):
             records.append((child, self.select_stockrecord(child)))
         return records
 
+    def snapshot_pricing_policy(self, product, snapshot):
+        """
+        Return the pricing policy recorded by a price snapshot
+        """
+        if snapshot.price_excl_tax is None:
+            return UnavailablePrice()
+        tax = None
+        if snapshot.price_incl_tax is not None:
+            tax = snapshot.price_incl_tax - snapshot.price_excl_tax
+        return FixedPrice(
+            currency=snapshot.currency,
+            excl_tax=snapshot.price_excl_tax,
+            tax=tax)
+
+    def snapshot_availability_policy(self, product, snapshot):
+        """
+        Return the availability policy recorded by a price snapshot
+        """
+        if snapshot.num_available is not None:
+            return StockRequiredAvailability(snapshot.num_available)
+        if snapshot.is_available_to_buy:
+            return Available()
+        return Unavailable()
+
     def pricing_policy(self, product, stockrecord):
         """
         Return the appropriate pricing policy
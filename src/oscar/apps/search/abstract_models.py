@@ -0,0 +1,53 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from oscar.core.loading import get_class
+
+Model = get_class('core.models', 'Model')
+
+
+class AbstractProductChange(Model):
+    """
+    A journal entry recording that a product, or something indexed with it,
+    has changed since the search index was last updated.
+
+    The product isn't a foreign key, so deleted products can be removed from
+    the index too.
+    """
+    product_id = models.IntegerField(_("Product ID"))
+    date_created = models.DateTimeField(_("Date Created"), auto_now_add=True)
+
+    class Meta:
+        abstract = True
+        app_label = 'search'
+        ordering = ['pk']
+        verbose_name = _('Product change')
+        verbose_name_plural = _('Product changes')
+
+    def __str__(self):
+        return _("Change of product #%s") % self.product_id
+
+
+class AbstractProductSearchDocument(Model):
+    """
+    The text of a browsable product that is searched by the database's full
+    text search: its title, UPC, description, attribute values and category
+    names, and those of its children.
+
+    The full text index of the document is maintained by the full text
+    backend of the database (see ``search.fulltext``).
+    """
+    product = models.OneToOneField(
+        'catalogue.Product', on_delete=models.CASCADE, primary_key=True,
+        related_name='search_document', verbose_name=_("Product"))
+    document = models.TextField(_("Document"))
+    date_updated = models.DateTimeField(_("Date Updated"), auto_now=True)
+
+    class Meta:
+        abstract = True
+        app_label = 'search'
+        verbose_name = _('Product search document')
+        verbose_name_plural = _('Product search documents')
+
+    def __str__(self):
+        return _("Search document of product #%s") % self.product_id
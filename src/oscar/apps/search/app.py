@@ -5,25 +5,47 @@ from oscar.apps.search import facets
 from oscar.core.application import Application
 from oscar.core.loading import get_class
 
+get_product_search_handler_class = get_class(
+    'catalogue.search_handlers', 'get_product_search_handler_class')
+
 
 class SearchApplication(Application):
     name = 'search'
     search_view = get_class('search.views', 'FacetedSearchView')
     search_form = get_class('search.forms', 'SearchForm')
+    full_text_search_view = get_class('search.views', 'FullTextSearchView')
 
     def get_urls(self):
 
         # The form class has to be passed to the __init__ method as that is how
         # Haystack works.  It's slightly different to normal CBVs.
+        haystack_view = search_view_factory(
+            view_class=self.search_view,
+            form_class=self.search_form,
+            searchqueryset=self.get_sqs())
+        full_text_view = self.full_text_search_view.as_view()
+
+        def search_view(request, *args, **kwargs):
+            # The handler depends on settings, so pick the view per request
+            if self.uses_full_text_search():
+                return full_text_view(request, *args, **kwargs)
+            return haystack_view(request, *args, **kwargs)
+
         urlpatterns = [
-            url(r'^$', search_view_factory(
-                view_class=self.search_view,
-                form_class=self.search_form,
-                searchqueryset=self.get_sqs()),
-                name='search'),
+            url(r'^$', search_view, name='search'),
         ]
         return self.post_process_urls(urlpatterns)
 
+    def uses_full_text_search(self):
+        """
+        Test whether products are searched with the database full text search
+        handler rather than Haystack
+        """
+        return issubclass(
+            get_product_search_handler_class(),
+            get_class('catalogue.search_handlers',
+                      'DatabaseProductSearchHandler'))
+
     def get_sqs(self):
         """
         Return the SQS required by a the Haystack search view
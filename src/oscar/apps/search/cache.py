@@ -0,0 +1,155 @@
+import hashlib
+from uuid import uuid4
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from haystack import connections
+
+SEARCH_VERSION_KEY = 'oscar-search-version'
+SEARCH_RESULTS_KEY = 'oscar-search-results-%s'
+
+
+def get_search_version():
+    """
+    Return the current version token of the search index.
+
+    The token changes whenever the products of the index are updated.
+    """
+    version = cache.get(SEARCH_VERSION_KEY)
+    if version is None:
+        # Use add() so concurrent processes agree on a single token
+        cache.add(SEARCH_VERSION_KEY, uuid4().hex, None)
+        version = cache.get(SEARCH_VERSION_KEY)
+    return version
+
+
+def invalidate_search_results():
+    """
+    Mark every cached page of search results as stale
+    """
+    cache.set(SEARCH_VERSION_KEY, uuid4().hex, None)
+
+
+def normalise_query(query):
+    """
+    Return a query with its case and whitespace normalised, so equivalent
+    queries share their cached results
+    """
+    return ' '.join((query or '').lower().split())
+
+
+class CachedResult(object):
+    """
+    Stands in for a Haystack ``SearchResult`` of a cached page
+    """
+
+    def __init__(self, model, pk):
+        self.model = model
+        self.pk = pk
+        self._object = None
+
+    @property
+    def object(self):
+        return self._object
+
+
+class CachedSearchResults(object):
+    """
+    A page of search results loaded from the cache.
+
+    It behaves enough like a ``SearchQuerySet`` to be paginated and to
+    provide facet counts: its length is the total number of results, and
+    slicing it returns the results of the cached page that fall into the
+    slice.
+    """
+
+    def __init__(self, total, offset, results, facet_counts):
+        self.total = total
+        self.offset = offset
+        self.results = results
+        self._facet_counts = facet_counts
+
+    def count(self):
+        return self.total
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, k):
+        if not isinstance(k, slice):
+            return self.results[k - self.offset]
+        start = max((k.start or 0) - self.offset, 0)
+        stop = None if k.stop is None else max(k.stop - self.offset, 0)
+        return self.results[start:stop]
+
+    def facet_counts(self):
+        return self._facet_counts
+
+    def load_objects(self, using):
+        """
+        Load the objects of the cached results with the read querysets of
+        their search indexes, dropping the results whose object was deleted
+        """
+        models_pks = {}
+        for result in self.results:
+            models_pks.setdefault(result.model, []).append(result.pk)
+        unified_index = connections[using].get_unified_index()
+        loaded_objects = {}
+        for model, pks in models_pks.items():
+            index = unified_index.get_index(model)
+            loaded_objects[model] = index.read_queryset(
+                using=using).in_bulk(pks)
+        for result in self.results:
+            result._object = loaded_objects[result.model].get(int(result.pk))
+        self.results = [
+            result for result in self.results if result._object is not None]
+
+
+class SearchResultCache(object):
+    """
+    Caches pages of search results: the models and primary keys of the
+    results of the page, the total number of results and the facet counts.
+
+    The objects of a page aren't cached, only their keys, so they are loaded
+    from the database for every request and are never stale.  Cached pages
+    expire after ``OSCAR_SEARCH_CACHE_TIMEOUT`` seconds or when the products
+    are reindexed.
+    """
+
+    def is_enabled(self):
+        return settings.OSCAR_SEARCH_CACHE_RESULTS
+
+    def get_key(self, key_parts):
+        digest = hashlib.md5(repr(
+            (get_search_version(),) + tuple(key_parts)).encode('utf8'))
+        return SEARCH_RESULTS_KEY % digest.hexdigest()
+
+    def get(self, key_parts):
+        """
+        Return the cached results of a page, or ``None``
+        """
+        data = cache.get(self.get_key(key_parts))
+        if data is None:
+            return None
+        results = [
+            CachedResult(apps.get_model(label), pk)
+            for label, pk in data['results']]
+        return CachedSearchResults(
+            data['total'], data['offset'], results, data['facet_counts'])
+
+    def set(self, key_parts, page, facet_counts):
+        """
+        Cache a page of search results
+        """
+        cache.set(self.get_key(key_parts), {
+            'total': page.paginator.count,
+            'offset': page.start_index() - 1 if page.object_list else 0,
+            'results': [
+                (result.model._meta.label_lower, result.pk)
+                for result in page.object_list],
+            'facet_counts': facet_counts,
+        }, settings.OSCAR_SEARCH_CACHE_TIMEOUT)
+
+
+search_result_cache = SearchResultCache()
@@ -0,0 +1,117 @@
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils.html import strip_tags
+
+from oscar.core.loading import get_class, get_model
+
+Product = get_model('catalogue', 'Product')
+ProductAttributeValue = get_model('catalogue', 'ProductAttributeValue')
+ProductSearchDocument = get_model('search', 'ProductSearchDocument')
+category_tree = get_class('catalogue.cache', 'category_tree')
+
+
+class ProductDocumentBuilder(object):
+    """
+    Builds and stores the search documents of browsable products, which the
+    database full text search handler searches.
+
+    The document of a product holds its title, UPC, description, attribute
+    values and the names of its categories and their ancestors, and the
+    titles, UPCs and attribute values of its children.  Documents are built
+    in batches, loading the related objects of each batch with a few
+    queries.
+    """
+    batch_size = 500
+
+    def __init__(self, batch_size=None):
+        if batch_size is not None:
+            self.batch_size = batch_size
+
+    def get_attribute_values_queryset(self):
+        return ProductAttributeValue._default_manager.select_related(
+            'attribute', 'value_option').prefetch_related('value_multi_option')
+
+    def get_queryset(self):
+        attribute_values = Prefetch(
+            'attribute_values',
+            queryset=self.get_attribute_values_queryset())
+        children = Prefetch(
+            'children', queryset=Product._default_manager.prefetch_related(
+                attribute_values))
+        return Product._default_manager.browsable().prefetch_related(
+            'categories', attribute_values, children).order_by('pk')
+
+    def get_document(self, product, tree):
+        parts = [product.title, product.upc, strip_tags(product.description)]
+        parts.extend(self.get_attribute_texts(product))
+        for child in product.children.all():
+            parts.extend([child.title, child.upc])
+            parts.extend(self.get_attribute_texts(child))
+        for category in product.categories.all():
+            ancestors = tree.get_ancestors(category) or []
+            parts.extend(ancestor.name for ancestor in ancestors)
+            parts.append(category.name)
+        return '\n'.join(str(part) for part in parts if part)
+
+    def get_attribute_texts(self, product):
+        return [value.value_as_text for value in product.attribute_values.all()]
+
+    def write(self, products, product_ids):
+        """
+        Replace the documents of a list of product ids with the documents of
+        a list of products
+        """
+        tree = category_tree.get()
+        documents = [
+            ProductSearchDocument(
+                product=product, document=self.get_document(product, tree))
+            for product in products]
+        with transaction.atomic():
+            ProductSearchDocument._default_manager.filter(
+                pk__in=product_ids).delete()
+            ProductSearchDocument._default_manager.bulk_create(documents)
+
+    def update(self, product_ids):
+        """
+        Rebuild the documents of products, and of the parents of child
+        products, and return the number of products processed
+        """
+        rows = Product._default_manager.filter(
+            pk__in=set(product_ids)).values_list('pk', 'parent_id')
+        # Child products have no document of their own, but the one they had
+        # before becoming a child is removed
+        product_ids = set()
+        for pk, parent_id in rows:
+            product_ids.add(pk)
+            if parent_id is not None:
+                product_ids.add(parent_id)
+        product_ids = sorted(product_ids)
+        for start in range(0, len(product_ids), self.batch_size):
+            batch_ids = product_ids[start:start + self.batch_size]
+            self.write(
+                list(self.get_queryset().filter(pk__in=batch_ids)), batch_ids)
+        return len(product_ids)
+
+    def rebuild(self):
+        """
+        Rebuild the documents of all browsable products and return their
+        number
+        """
+        ProductSearchDocument._default_manager.exclude(
+            product__parent=None).delete()
+        queryset = self.get_queryset()
+        num_products = 0
+        start_pk = None
+        while True:
+            batch = queryset
+            if start_pk is not None:
+                batch = batch.filter(pk__gt=start_pk)
+            batch = list(batch[:self.batch_size])
+            if not batch:
+                return num_products
+            self.write(batch, [product.pk for product in batch])
+            num_products += len(batch)
+            start_pk = batch[-1].pk
+
+
+document_builder = ProductDocumentBuilder()
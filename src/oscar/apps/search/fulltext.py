@@ -0,0 +1,212 @@
+import sqlite3
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import FloatField, Value
+from django.db.models.expressions import RawSQL
+
+from oscar.core.loading import get_model
+
+ProductSearchDocument = get_model('search', 'ProductSearchDocument')
+
+
+class RawSubquery(RawSQL):
+    """
+    A raw subquery to use with the ``in`` lookup, which adds the parentheses
+    itself. Doubled parentheses would make it a scalar subquery.
+    """
+
+    def as_sql(self, compiler, connection):
+        return self.sql, self.params
+
+
+class FullTextBackend(object):
+    """
+    Searches the search documents of products with the full text search of a
+    database.
+
+    This backend works with any database: it matches the documents that
+    contain every term of the query, and doesn't rank them.
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+        self.connection = connections[using]
+
+    def quote_name(self, name):
+        return self.connection.ops.quote_name(name)
+
+    def get_document_table(self):
+        return ProductSearchDocument._meta.db_table
+
+    def get_pk_column(self, queryset):
+        opts = queryset.model._meta
+        return '%s.%s' % (self.quote_name(opts.db_table),
+                          self.quote_name(opts.pk.column))
+
+    def install(self):
+        """
+        Create the full text index of the search documents if it doesn't
+        exist yet
+        """
+
+    def uninstall(self):
+        """
+        Drop the full text index of the search documents
+        """
+
+    def filter(self, queryset, query):
+        """
+        Return the products of a queryset whose search document matches a
+        query
+        """
+        for term in query.split():
+            queryset = queryset.filter(
+                search_document__document__icontains=term)
+        return queryset
+
+    def rank(self, queryset, query):
+        """
+        Annotate the products of a queryset with the relevance of their
+        search document to a query, as ``search_rank``
+        """
+        return queryset.annotate(
+            search_rank=Value(0.0, output_field=FloatField()))
+
+
+class PostgresFullTextBackend(FullTextBackend):
+    """
+    Uses a GIN index of the ``tsvector`` of the search documents.  Queries
+    are parsed with ``plainto_tsquery`` and ranked with ``ts_rank``, using
+    the ``OSCAR_SEARCH_FULLTEXT_CONFIG`` text search configuration.
+    """
+    # The index is on this expression, so queries must use it verbatim
+    vector_sql = 'to_tsvector(%s::regconfig, document)'
+    query_sql = 'plainto_tsquery(%s::regconfig, %s)'
+
+    def get_index_name(self):
+        return '%s_fts' % self.get_document_table()
+
+    def install(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE INDEX IF NOT EXISTS %s ON %s USING GIN (%s)' % (
+                    self.quote_name(self.get_index_name()),
+                    self.quote_name(self.get_document_table()),
+                    self.vector_sql),
+                [settings.OSCAR_SEARCH_FULLTEXT_CONFIG])
+
+    def uninstall(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute('DROP INDEX IF EXISTS %s' % self.quote_name(
+                self.get_index_name()))
+
+    def filter(self, queryset, query):
+        config = settings.OSCAR_SEARCH_FULLTEXT_CONFIG
+        return queryset.filter(pk__in=RawSubquery(
+            'SELECT product_id FROM %s WHERE %s @@ %s' % (
+                self.quote_name(self.get_document_table()),
+                self.vector_sql, self.query_sql),
+            [config, config, query]))
+
+    def rank(self, queryset, query):
+        config = settings.OSCAR_SEARCH_FULLTEXT_CONFIG
+        return queryset.annotate(search_rank=RawSQL(
+            'SELECT ts_rank(%s, %s) FROM %s WHERE product_id = %s' % (
+                self.vector_sql, self.query_sql,
+                self.quote_name(self.get_document_table()),
+                self.get_pk_column(queryset)),
+            [config, config, query], output_field=FloatField()))
+
+
+class SQLiteFullTextBackend(FullTextBackend):
+    """
+    Uses an FTS5 table that indexes the search documents, kept in sync by
+    triggers.  Documents must contain every term of a query and are ranked
+    with ``bm25``.
+    """
+
+    def get_fts_table(self):
+        return '%s_fts' % self.get_document_table()
+
+    def install(self):
+        table = self.quote_name(self.get_document_table())
+        fts_table = self.quote_name(self.get_fts_table())
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [self.get_fts_table()])
+            if cursor.fetchone():
+                return
+            cursor.execute(
+                "CREATE VIRTUAL TABLE %s USING fts5(document, content=%s, "
+                "content_rowid='product_id')" % (fts_table, table))
+            for name, event, statements in [
+                    ('insert', 'INSERT', ['insert']),
+                    ('delete', 'DELETE', ['delete']),
+                    ('update', 'UPDATE', ['delete', 'insert'])]:
+                cursor.execute(
+                    'CREATE TRIGGER %s AFTER %s ON %s BEGIN %s END' % (
+                        self.quote_name('%s_%s' % (self.get_fts_table(), name)),
+                        event, table, ' '.join(
+                            self.get_trigger_sql(statement)
+                            for statement in statements)))
+            # Index the existing documents
+            cursor.execute(
+                "INSERT INTO %s(%s) VALUES ('rebuild')" % (fts_table, fts_table))
+
+    def get_trigger_sql(self, statement):
+        fts_table = self.quote_name(self.get_fts_table())
+        if statement == 'insert':
+            return ('INSERT INTO %s(rowid, document) '
+                    'VALUES (new.product_id, new.document);' % fts_table)
+        return ("INSERT INTO %s(%s, rowid, document) "
+                "VALUES ('delete', old.product_id, old.document);" % (
+                    fts_table, fts_table))
+
+    def uninstall(self):
+        with self.connection.cursor() as cursor:
+            for name in ['insert', 'delete', 'update']:
+                cursor.execute('DROP TRIGGER IF EXISTS %s' % self.quote_name(
+                    '%s_%s' % (self.get_fts_table(), name)))
+            cursor.execute('DROP TABLE IF EXISTS %s' % self.quote_name(
+                self.get_fts_table()))
+
+    def get_match(self, query):
+        # Quote each term so it isn't parsed as FTS5 query syntax
+        return ' '.join(
+            '"%s"' % term.replace('"', '""') for term in query.split())
+
+    def filter(self, queryset, query):
+        fts_table = self.quote_name(self.get_fts_table())
+        return queryset.filter(pk__in=RawSubquery(
+            'SELECT rowid FROM %s WHERE %s MATCH %%s' % (fts_table, fts_table),
+            [self.get_match(query)]))
+
+    def rank(self, queryset, query):
+        fts_table = self.quote_name(self.get_fts_table())
+        # bm25() is lower for better matches
+        return queryset.annotate(search_rank=RawSQL(
+            'SELECT -bm25(%s) FROM %s WHERE %s MATCH %%s AND rowid = %s' % (
+                fts_table, fts_table, fts_table,
+                self.get_pk_column(queryset)),
+            [self.get_match(query)], output_field=FloatField()))
+
+
+@lru_cache()
+def supports_fts5():
+    options = sqlite3.connect(':memory:').execute('PRAGMA compile_options')
+    return ('ENABLE_FTS5',) in options.fetchall()
+
+
+def get_full_text_backend(using=DEFAULT_DB_ALIAS):
+    """
+    Return the best full text backend for a database
+    """
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        return PostgresFullTextBackend(using)
+    if connection.vendor == 'sqlite' and supports_fts5():
+        return SQLiteFullTextBackend(using)
+    return FullTextBackend(using)
@@ -0,0 +1,164 @@
+import multiprocessing
+
+from django import db
+from haystack import connections
+from haystack.constants import DEFAULT_ALIAS
+
+from oscar.core.loading import get_class, get_model
+
+Product = get_model('catalogue', 'Product')
+ProductChange = get_model('search', 'ProductChange')
+invalidate_search_results = get_class(
+    'search.cache', 'invalidate_search_results')
+
+
+def index_range(using, batch_size, start_pk, end_pk):
+    """
+    Index the products of a range of primary keys in a worker process
+    """
+    # Don't share the database connections of the parent process
+    db.connections.close_all()
+    return ProductIndexer(using, batch_size).index_range(start_pk, end_pk)
+
+
+class ProductIndexer(object):
+    """
+    Rebuilds the product search index in batches.
+
+    Products are streamed in batches ordered by primary key, so the database
+    never has to skip over the rows of previous batches.  The related objects,
+    purchase info and category names of each batch are loaded with a few
+    queries by ``ProductIndex.prepare_batch`` before the batch is sent to the
+    search backend.  Ranges of primary keys can be indexed by a pool of
+    worker processes.
+
+    The indexer also drains the journal of changed products, updating or
+    removing only the products that changed.
+    """
+    batch_size = 500
+
+    def __init__(self, using=DEFAULT_ALIAS, batch_size=None, workers=1):
+        self.using = using
+        if batch_size is not None:
+            self.batch_size = batch_size
+        self.workers = workers
+
+    def get_index(self):
+        return connections[self.using].get_unified_index().get_index(Product)
+
+    def get_queryset(self, index):
+        return index.index_queryset(using=self.using).order_by('pk')
+
+    def iter_batches(self, queryset, start_pk=None, end_pk=None):
+        """
+        Yield lists of products with primary keys greater than ``start_pk``
+        and no greater than ``end_pk``
+        """
+        if end_pk is not None:
+            queryset = queryset.filter(pk__lte=end_pk)
+        while True:
+            batch = queryset
+            if start_pk is not None:
+                batch = batch.filter(pk__gt=start_pk)
+            batch = list(batch[:self.batch_size])
+            if not batch:
+                return
+            yield batch
+            start_pk = batch[-1].pk
+
+    def index_range(self, start_pk=None, end_pk=None):
+        """
+        Index the products of a range of primary keys and return their
+        number
+        """
+        index = self.get_index()
+        backend = connections[self.using].get_backend()
+        num_products = 0
+        for batch in self.iter_batches(
+                self.get_queryset(index), start_pk, end_pk):
+            backend.update(index, index.prepare_batch(batch))
+            num_products += len(batch)
+        return num_products
+
+    def get_ranges(self, num_ranges):
+        """
+        Split the primary keys of the products to index into ranges of
+        ``(start_pk, end_pk)`` with about the same number of products
+        """
+        pks = list(self.get_queryset(self.get_index()).values_list(
+            'pk', flat=True))
+        if not pks:
+            return []
+        size = -(-len(pks) // num_ranges)
+        ranges, start_pk = [], None
+        for i in range(size - 1, len(pks), size):
+            ranges.append((start_pk, pks[i]))
+            start_pk = pks[i]
+        if start_pk != pks[-1]:
+            ranges.append((start_pk, pks[-1]))
+        return ranges
+
+    def run(self):
+        """
+        Index all products and return their number
+        """
+        if self.workers <= 1:
+            num_products = self.index_range()
+            invalidate_search_results()
+            return num_products
+        # Give each worker a few ranges so a slow range doesn't hold up the
+        # others for long
+        ranges = self.get_ranges(self.workers * 4)
+        db.connections.close_all()
+        with multiprocessing.Pool(self.workers) as pool:
+            counts = pool.starmap(index_range, [
+                (self.using, self.batch_size, start_pk, end_pk)
+                for start_pk, end_pk in ranges])
+        invalidate_search_results()
+        return sum(counts)
+
+    def index_changes(self):
+        """
+        Update the index for the products in the change journal, removing
+        the ones that no longer exist or are no longer indexed, and return
+        the number of journal entries processed
+        """
+        index = self.get_index()
+        backend = connections[self.using].get_backend()
+        num_changes = 0
+        while True:
+            changes = list(ProductChange._default_manager.order_by(
+                'pk').values_list('pk', 'product_id')[:self.batch_size])
+            if not changes:
+                if num_changes:
+                    invalidate_search_results()
+                return num_changes
+            product_ids = {product_id for __, product_id in changes}
+
+            # Changes to child products update their parent
+            indexed_ids = set()
+            existing = Product._default_manager.filter(
+                pk__in=product_ids).values_list('pk', 'parent_id')
+            for product_id, parent_id in existing:
+                indexed_ids.add(parent_id or product_id)
+                product_ids.discard(product_id)
+
+            products = list(
+                self.get_queryset(index).filter(pk__in=indexed_ids))
+            if products:
+                backend.update(index, index.prepare_batch(products))
+            # Products that were deleted, or are no longer browsable
+            removed_ids = product_ids | (
+                indexed_ids - {product.pk for product in products})
+            for product_id in removed_ids:
+                backend.remove(self.get_identifier(product_id))
+
+            # Only delete the changes that were read, as a transaction that
+            # is still open may have journalled a change with a lower pk
+            ProductChange._default_manager.filter(
+                pk__in=[pk for pk, __ in changes]).delete()
+            num_changes += len(changes)
+
+    def get_identifier(self, product_id):
+        opts = Product._meta
+        return '%s.%s.%s' % (opts.app_label, opts.model_name, product_id)
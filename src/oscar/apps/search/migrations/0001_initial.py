@@ -0,0 +1,28 @@
+# Generated by Django 2.1.15 on 2026-10-18 06:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductChange',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_id', models.IntegerField(verbose_name='Product ID')),
+                ('date_created', models.DateTimeField(auto_now_add=True, verbose_name='Date Created')),
+            ],
+            options={
+                'verbose_name': 'Product change',
+                'verbose_name_plural': 'Product changes',
+                'ordering': ['pk'],
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 2.1.15 on 2026-10-18 07:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def install_full_text_index(apps, schema_editor):
+    from oscar.apps.search.fulltext import get_full_text_backend
+    get_full_text_backend(schema_editor.connection.alias).install()
+
+
+def uninstall_full_text_index(apps, schema_editor):
+    from oscar.apps.search.fulltext import get_full_text_backend
+    get_full_text_backend(schema_editor.connection.alias).uninstall()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogue', '0013_auto_20170821_1548'),
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchDocument',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='catalogue.Product', verbose_name='Product')),
+                ('document', models.TextField(verbose_name='Document')),
+                ('date_updated', models.DateTimeField(auto_now=True, verbose_name='Date Updated')),
+            ],
+            options={
+                'verbose_name': 'Product search document',
+                'verbose_name_plural': 'Product search documents',
+                'abstract': False,
+            },
+        ),
+        migrations.RunPython(
+            install_full_text_index, uninstall_full_text_index),
+    ]
@@ -0,0 +1,19 @@
+from oscar.apps.search.abstract_models import (
+    AbstractProductChange, AbstractProductSearchDocument)
+from oscar.core.loading import is_model_registered
+
+__all__ = []
+
+
+if not is_model_registered('search', 'ProductChange'):
+    class ProductChange(AbstractProductChange):
+        pass
+
+    __all__.append('ProductChange')
+
+
+if not is_model_registered('search', 'ProductSearchDocument'):
+    class ProductSearchDocument(AbstractProductSearchDocument):
+        pass
+
+    __all__.append('ProductSearchDocument')
@@ -0,0 +1,124 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from oscar.core.loading import get_class, get_model
+
+category_moved = get_class('catalogue.signals', 'category_moved')
+Category = get_model('catalogue', 'Category')
+Product = get_model('catalogue', 'Product')
+ProductAttributeValue = get_model('catalogue', 'ProductAttributeValue')
+ProductCategory = get_model('catalogue', 'ProductCategory')
+ProductChange = get_model('search', 'ProductChange')
+StockRecord = get_model('partner', 'StockRecord')
+document_builder = get_class('search.documents', 'document_builder')
+
+
+def _record_changes(product_ids):
+    ProductChange._default_manager.bulk_create([
+        ProductChange(product_id=product_id)
+        for product_id in set(product_ids) if product_id is not None])
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def record_product_change(sender, instance, **kwargs):
+    """
+    Journal changed products for the search index. Updating the rating of a
+    product after a review changes saves the product too.
+    """
+    if kwargs.get('raw', False) or not settings.OSCAR_SEARCH_CHANGE_JOURNAL:
+        return
+    # The parent of a deleted child can't be looked up later
+    _record_changes([instance.id, instance.parent_id])
+
+
+@receiver(post_save, sender=StockRecord)
+@receiver(post_delete, sender=StockRecord)
+@receiver(post_save, sender=ProductCategory)
+@receiver(post_delete, sender=ProductCategory)
+@receiver(post_save, sender=ProductAttributeValue)
+@receiver(post_delete, sender=ProductAttributeValue)
+def record_related_change(sender, instance, **kwargs):
+    """
+    Journal the products whose prices, stock, categories or attributes
+    changed for the search index
+    """
+    if kwargs.get('raw', False) or not settings.OSCAR_SEARCH_CHANGE_JOURNAL:
+        return
+    _record_changes([instance.product_id])
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductCategory)
+@receiver(post_delete, sender=ProductCategory)
+@receiver(post_save, sender=ProductAttributeValue)
+@receiver(post_delete, sender=ProductAttributeValue)
+def update_search_document(sender, instance, **kwargs):
+    """
+    Rebuild the search documents of changed products once the transaction
+    is committed
+    """
+    if kwargs.get('raw', False) or not settings.OSCAR_SEARCH_FULLTEXT:
+        return
+    if isinstance(instance, Product):
+        product_ids = [instance.id, instance.parent_id]
+    else:
+        product_ids = [instance.product_id]
+    transaction.on_commit(lambda: document_builder.update(product_ids))
+
+
+def _update_category_documents(category_id):
+    # Moved categories keep their old path, so read it once committed
+    path = Category._default_manager.filter(
+        pk=category_id).values_list('path', flat=True).first()
+    if path is None:
+        return
+    document_builder.update(ProductCategory._default_manager.filter(
+        category__path__startswith=path
+    ).values_list('product_id', flat=True).distinct())
+
+
+def _is_name_saved(instance, update_fields):
+    return (instance.pk is not None
+            and (update_fields is None or 'name' in update_fields))
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_name(sender, instance, **kwargs):
+    """
+    Remember the stored name of a category, to tell whether saving it
+    renames it
+    """
+    if kwargs.get('raw', False) or not settings.OSCAR_SEARCH_FULLTEXT:
+        return
+    if _is_name_saved(instance, kwargs.get('update_fields')):
+        instance._stored_name = Category._default_manager.filter(
+            pk=instance.pk).values_list('name', flat=True).first()
+
+
+@receiver(post_save, sender=Category)
+def update_search_documents_on_category_save(sender, instance, **kwargs):
+    """
+    Rebuild the search documents of the products in the subtree of a
+    renamed category, as they include its name
+    """
+    stored_name = instance.__dict__.pop('_stored_name', None)
+    if kwargs.get('raw', False) or not settings.OSCAR_SEARCH_FULLTEXT:
+        return
+    if kwargs.get('created', False) or stored_name in (None, instance.name):
+        return
+    transaction.on_commit(lambda: _update_category_documents(instance.pk))
+
+
+@receiver(category_moved)
+def update_search_documents_on_category_move(sender, category, **kwargs):
+    """
+    Rebuild the search documents of the products in the subtree of a moved
+    category, as they include the names of its ancestors
+    """
+    if not settings.OSCAR_SEARCH_FULLTEXT:
+        return
+    transaction.on_commit(lambda: _update_category_documents(category.pk))
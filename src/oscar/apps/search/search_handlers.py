@@ -2,11 +2,13 @@ from django.core.paginator import InvalidPage, Paginator
 from django.utils.translation import gettext_lazy as _
 from haystack import connections
 
-from oscar.core.loading import get_class
+from oscar.core.loading import get_class, get_classes
 
 from . import facets
 
 FacetMunger = get_class('search.facets', 'FacetMunger')
+normalise_query, search_result_cache = get_classes(
+    'search.cache', ['normalise_query', 'search_result_cache'])
 
 
 class SearchHandler(object):
@@ -28,6 +30,14 @@ class SearchHandler(object):
         found_objects = handler.get_paginated_objects()
         context = handler.get_search_context_data()
 
+    Caching:
+
+        If ``OSCAR_SEARCH_CACHE_RESULTS`` is set, the results of each page
+        are cached, keyed by the normalised query, selected facets, sort
+        order and page number (see ``get_cache_key_parts``).  Cached pages
+        skip the search backend; their objects are still loaded from the
+        database.
+
     Error handling:
 
         You need to catch an InvalidPage exception which gets thrown when an
@@ -48,11 +58,20 @@ class SearchHandler(object):
         search_queryset = self.get_search_queryset()
         self.search_form = self.get_search_form(
             request_data, search_queryset)
-        self.results = self.get_search_results(self.search_form)
+        self.results = None
+        if search_result_cache.is_enabled():
+            self.results = search_result_cache.get(self.get_cache_key_parts())
+        is_cached = self.results is not None
+        if not is_cached:
+            self.results = self.get_search_results(self.search_form)
         # If below raises an UnicodeDecodeError, you're running pysolr < 3.2
         # with Solr 4.
         self.paginator, self.page = self.paginate_queryset(
             self.results, request_data)
+        if search_result_cache.is_enabled() and not is_cached:
+            search_result_cache.set(
+                self.get_cache_key_parts(), self.page,
+                self.results.facet_counts())
 
     # Search related methods
 
@@ -85,6 +104,20 @@ class SearchHandler(object):
             sqs = sqs.models(*self.model_whitelist)
         return sqs
 
+    def get_cache_key_parts(self):
+        """
+        Return the values that identify a page of search results in the
+        cache. Extend this if the results depend on anything else.
+        """
+        return (
+            '%s.%s' % (type(self).__module__, type(self).__qualname__),
+            normalise_query(self.request_data.get('q')),
+            sorted(set(self.request_data.getlist('selected_facets'))),
+            self.request_data.get('sort_by', ''),
+            str(self.request_data.get(self.page_kwarg, 1)),
+            self.paginate_by,
+        )
+
     # Pagination related methods
 
     def paginate_queryset(self, queryset, request_data):
@@ -135,7 +168,8 @@ class SearchHandler(object):
         for result in paginated_results:
             models_pks.setdefault(result.model, []).append(result.pk)
 
-        search_backend_alias = self.results.query.backend.connection_alias
+        search_queryset = self.search_form.searchqueryset
+        search_backend_alias = search_queryset.query.backend.connection_alias
         for model in models_pks:
             ui = connections[search_backend_alias].get_unified_index()
             index = ui.get_index(model)
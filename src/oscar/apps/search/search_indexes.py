@@ -1,3 +1,4 @@
+from django.db.models import prefetch_related_objects
 from haystack import indexes
 
 from oscar.core.loading import get_class, get_model
@@ -5,6 +6,7 @@ from oscar.core.loading import get_class, get_model
 # Load default strategy (without a user/request)
 is_solr_supported = get_class('search.features', 'is_solr_supported')
 Selector = get_class('partner.strategy', 'Selector')
+category_tree = get_class('catalogue.cache', 'category_tree')
 
 
 class ProductIndex(indexes.SearchIndex, indexes.Indexable):
@@ -34,12 +36,26 @@ class ProductIndex(indexes.SearchIndex, indexes.Indexable):
 
     _strategy = None
 
+    # Lookups prefetched for each batch of products
+    prefetch_lookups = ('categories', 'stockrecords')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Maps product ids to the product and its purchase info
+        self._purchase_info = {}
+        self._category_tree = None
+        self._category_names = {}
+
     def get_model(self):
         return get_model('catalogue', 'Product')
 
     def index_queryset(self, using=None):
         # Only index browsable products (not each individual child product)
-        return self.get_model().browsable.order_by('-date_updated')
+        queryset = self.get_model().browsable.select_related(
+            'product_class').order_by('-date_updated')
+        if self.get_strategy().is_using_price_snapshots():
+            queryset = queryset.select_related('price_snapshot')
+        return queryset
 
     def read_queryset(self, using=None):
         return self.get_model().browsable.base_queryset()
@@ -50,7 +66,12 @@ class ProductIndex(indexes.SearchIndex, indexes.Indexable):
     def prepare_category(self, obj):
         categories = obj.categories.all()
         if len(categories) > 0:
-            return [category.full_name for category in categories]
+            return [self.get_category_name(category) for category in categories]
+
+    def get_category_name(self, category):
+        if category.pk in self._category_names:
+            return self._category_names[category.pk]
+        return category.full_name
 
     def prepare_rating(self, obj):
         if obj.rating is not None:
@@ -65,26 +86,74 @@ class ProductIndex(indexes.SearchIndex, indexes.Indexable):
             self._strategy = Selector().strategy()
         return self._strategy
 
+    def prepare_batch(self, products):
+        """
+        Load the related objects, purchase info and category names of a list
+        of products with a few queries, before preparing each of them.
+        """
+        products = list(products)
+        prefetch_related_objects(products, *self.prefetch_lookups)
+        strategy = self.get_strategy()
+        products_to_fetch = [
+            product for product in products
+            if strategy.get_price_snapshot(product) is None]
+        infos = strategy.fetch_for_parents(
+            [product for product in products_to_fetch if product.is_parent])
+        infos.update(strategy.fetch_for_products(
+            [product for product in products_to_fetch
+             if not product.is_parent and product.stockrecords.all()]))
+        self._purchase_info = {
+            product.id: (product, infos.get(product.id))
+            for product in products}
+
+        tree = category_tree.get()
+        if tree is not self._category_tree:
+            # Categories of the tree know their ancestors
+            self._category_names = {
+                category.pk: category.full_name
+                for category in tree.categories}
+            self._category_tree = tree
+        return products
+
+    def get_purchase_info(self, obj):
+        """
+        Return the purchase info of a product, fetching it only once however
+        many fields need it
+        """
+        product, result = self._purchase_info.get(obj.id, (None, None))
+        if product is not obj:
+            strategy = self.get_strategy()
+            result = None
+            if obj.is_parent:
+                result = strategy.fetch_for_parent(obj)
+            elif obj.has_stockrecords:
+                result = strategy.fetch_for_product(obj)
+            # Only keep the purchase info of the product being prepared
+            self._purchase_info = {obj.id: (obj, result)}
+        return result
+
     def prepare_price(self, obj):
         strategy = self.get_strategy()
-        result = None
-        if obj.is_parent:
-            result = strategy.fetch_for_parent(obj)
-        elif obj.has_stockrecords:
-            result = strategy.fetch_for_product(obj)
+        snapshot = strategy.get_price_snapshot(obj)
+        if snapshot is not None:
+            if snapshot.price_incl_tax is not None:
+                return snapshot.price_incl_tax
+            return snapshot.price_excl_tax
 
+        result = self.get_purchase_info(obj)
         if result:
             if result.price.is_tax_known:
                 return result.price.incl_tax
             return result.price.excl_tax
 
     def prepare_num_in_stock(self, obj):
-        strategy = self.get_strategy()
         if obj.is_parent:
             # Don't return a stock level for parent products
             return None
-        elif obj.has_stockrecords:
-            result = strategy.fetch_for_product(obj)
+        # Price snapshots aren't updated when stock is allocated, so read the
+        # stock level from the stockrecord
+        result = self.get_purchase_info(obj)
+        if result is not None and result.stockrecord is not None:
             return result.stockrecord.net_stock_level
 
     def prepare(self, obj):
@@ -1,10 +1,14 @@
+from django.utils.translation import gettext_lazy as _
 from haystack import views
 
 from oscar.apps.search.signals import user_search
-from oscar.core.loading import get_class, get_model
+from oscar.core.loading import get_class, get_classes, get_model
 
 Product = get_model('catalogue', 'Product')
+CatalogueView = get_class('catalogue.views', 'CatalogueView')
 FacetMunger = get_class('search.facets', 'FacetMunger')
+normalise_query, search_result_cache = get_classes(
+    'search.cache', ['normalise_query', 'search_result_cache'])
 
 
 class FacetedSearchView(views.FacetedSearchView):
@@ -39,7 +43,7 @@ class FacetedSearchView(views.FacetedSearchView):
 
         # Show suggestion no matter what.  Haystack 2.1 only shows a suggestion
         # if there are some results, which seems a bit weird to me.
-        if self.results.query.backend.include_spelling:
+        if self.form.searchqueryset.query.backend.include_spelling:
             # Note, this triggers an extra call to the search backend
             suggestion = self.form.get_suggestion()
             if suggestion != self.query:
@@ -63,6 +67,64 @@ class FacetedSearchView(views.FacetedSearchView):
         return extra
 
     def get_results(self):
+        self.cached_results = None
+        if search_result_cache.is_enabled():
+            self.cached_results = search_result_cache.get(
+                self.get_cache_key_parts())
+            if self.cached_results is not None:
+                # Cached pages only know the keys of their results.  Load
+                # them before paginating, so deleted products are dropped
+                # from the page.
+                self.cached_results.load_objects(
+                    self.form.searchqueryset.query.backend.connection_alias)
+                return self.cached_results
         # We're only interested in products (there might be other content types
         # in the Solr index).
         return super().get_results().models(Product)
+
+    def get_cache_key_parts(self):
+        """
+        Return the values that identify a page of search results in the
+        cache
+        """
+        return (
+            '%s.%s' % (type(self).__module__, type(self).__qualname__),
+            normalise_query(self.query),
+            sorted(set(self.request.GET.getlist('selected_facets'))),
+            self.request.GET.get('sort_by', ''),
+            self.request.GET.get('page', '1'),
+            self.results_per_page,
+        )
+
+    def build_page(self):
+        paginator, page = super().build_page()
+        if self.cached_results is None and search_result_cache.is_enabled():
+            search_result_cache.set(
+                self.get_cache_key_parts(), page, self.results.facet_counts())
+        return paginator, page
+
+
+class FullTextSearchView(CatalogueView):
+    """
+    Searches products with the database full text search handler, which the
+    search box uses instead of Haystack when ``OSCAR_SEARCH_FULLTEXT`` is
+    set and no Haystack backend is configured.
+    """
+    search_signal = user_search
+
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        query = getattr(getattr(self, 'search_handler', None), 'query', '')
+        if query:
+            # Raise a signal for other apps to hook into for analytics
+            self.search_signal.send(
+                sender=self, session=request.session, user=request.user,
+                query=query)
+        return response
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        if self.search_handler.query:
+            ctx['summary'] = _('Products matching "%(query)s"') % {
+                'query': self.search_handler.query}
+        return ctx
@@ -17,12 +17,32 @@ OSCAR_BASKET_COOKIE_OPEN = 'oscar_open_basket'
 OSCAR_BASKET_COOKIE_SECURE = False
 OSCAR_MAX_BASKET_QUANTITY_THRESHOLD = 10000
 
+# Cache the summary rendered in the mini basket so pages can show it without
+# loading the basket. Requires a cache backend that is shared between
+# processes.
+OSCAR_BASKET_CACHE_SUMMARY = False
+OSCAR_BASKET_SUMMARY_CACHE_TIMEOUT = 5 * 60
+
+# Trust the signed basket cookie of anonymous visitors until their basket is
+# needed, and remember closed basket ids to reject stale cookies.
+OSCAR_BASKET_TRUST_SIGNED_COOKIE = False
+OSCAR_BASKET_CLOSED_CACHE_TIMEOUT = 60 * 60
+
 # Recently-viewed products
 OSCAR_RECENTLY_VIEWED_COOKIE_LIFETIME = 7 * 24 * 60 * 60
 OSCAR_RECENTLY_VIEWED_COOKIE_NAME = 'oscar_history'
 OSCAR_RECENTLY_VIEWED_COOKIE_SECURE = False
 OSCAR_RECENTLY_VIEWED_PRODUCTS = 20
 
+# Compute the purchase info of each product once per request
+OSCAR_STRATEGY_MEMOIZE_PURCHASE_INFO = False
+
+# Store the price and availability of each product for anonymous customers in
+# the ProductPriceSnapshot table. Run the oscar_update_price_snapshots command
+# after enabling it. Snapshots older than the max age (in seconds) are ignored.
+OSCAR_PRICE_SNAPSHOTS = False
+OSCAR_PRICE_SNAPSHOT_MAX_AGE = 24 * 60 * 60
+
 # Currency
 OSCAR_DEFAULT_CURRENCY = 'GBP'
 
@@ -55,6 +75,11 @@ OSCAR_DASHBOARD_ITEMS_PER_PAGE = 20
 # Checkout
 OSCAR_ALLOW_ANON_CHECKOUT = False
 
+# Create the lines of placed orders with bulk inserts and allocate their stock
+# in one statement. The per-line hooks of OrderCreator, except
+# create_additional_line_models, aren't called.
+OSCAR_BULK_CREATE_ORDER_LINES = False
+
 # Promotions
 OSCAR_PROMOTION_POSITIONS = (('page', 'Top of page'),
                              ('right', 'Right-hand sidebar'),
@@ -100,9 +125,64 @@ OSCAR_SLUG_ALLOW_UNICODE = False
 # Cookies
 OSCAR_COOKIES_DELETE_ON_LOGOUT = ['oscar_recently_viewed_products', ]
 
+# Categories
+# Keep the category tree in memory and in the cache backend so the category
+# menu doesn't query the categories on every request. Requires a cache backend
+# that is shared between processes.
+OSCAR_CATEGORIES_CACHE_TREE = False
+OSCAR_CATEGORIES_CACHE_TIMEOUT = 24 * 60 * 60
+
 # Offers
 OSCAR_OFFERS_INCL_TAX = False
 
+# Keep the active site offers compiled in memory and in the cache backend so
+# applying offers doesn't query them on every request. Requires a cache
+# backend that is shared between processes.
+OSCAR_OFFERS_CACHE_SITE_OFFERS = False
+OSCAR_OFFERS_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Only evaluate offers whose condition range intersects the basket products.
+OSCAR_OFFERS_USE_INDEX = False
+
+# Read range products from the denormalised RangeMembership table. Run the
+# oscar_update_range_memberships command after enabling it.
+OSCAR_OFFERS_RANGE_MEMBERSHIP = False
+
+# Cache the offers applied to each basket and reuse them for as long as the
+# lines, vouchers, user and offers stay the same. The timeout bounds how long
+# an offer that starts or ends may go unnoticed.
+OSCAR_OFFERS_CACHE_APPLICATIONS = False
+OSCAR_OFFERS_APPLICATIONS_CACHE_TIMEOUT = 5 * 60
+
+# Measure each offer applied to a basket and send the offer_profiled signal.
+# The timings are aggregated over the window (in seconds) and listed in the
+# dashboard.
+OSCAR_OFFERS_PROFILE = False
+OSCAR_OFFERS_PROFILE_WINDOW = 60 * 60
+
+# Analytics
+# Queue analytics events in each process and write them in aggregated batches
+# when the buffer reaches the flush size, every flush interval (in seconds) and
+# when the process exits. The oldest events are dropped once the buffer holds
+# the max size.
+OSCAR_ANALYTICS_BUFFER = False
+OSCAR_ANALYTICS_BUFFER_FLUSH_SIZE = 1000
+OSCAR_ANALYTICS_BUFFER_MAX_SIZE = 100000
+OSCAR_ANALYTICS_FLUSH_INTERVAL = 10
+
+# Record product activity per period (in seconds) and calculate popularity
+# scores that halve every half-life (in seconds) without new activity.
+OSCAR_ANALYTICS_DECAYING_SCORES = False
+OSCAR_ANALYTICS_ACTIVITY_PERIOD = 60 * 60
+OSCAR_ANALYTICS_SCORE_HALF_LIFE = 7 * 24 * 60 * 60
+# The number of days product activity is kept for before it's folded into the
+# scores of products. None keeps it forever.
+OSCAR_ANALYTICS_ACTIVITY_RETENTION_DAYS = 30
+
+# The number of days the oscar_compact_product_views command keeps the product
+# views of users for. None keeps them forever.
+OSCAR_ANALYTICS_VIEW_RETENTION_DAYS = 365
+
 # Hidden Oscar features, e.g. wishlists or reviews
 OSCAR_HIDDEN_FEATURES = []
 
@@ -279,6 +359,20 @@ OSCAR_SEARCH_FACETS = {
 OSCAR_PROMOTIONS_ENABLED = True
 OSCAR_PRODUCT_SEARCH_HANDLER = None
 
+# Journal the products whose prices, stock, categories or attributes change,
+# so the oscar_index_product_changes command can update them in the search
+# index.
+OSCAR_SEARCH_CHANGE_JOURNAL = False
+
+# Cache the pages of search results
+OSCAR_SEARCH_CACHE_RESULTS = False
+OSCAR_SEARCH_CACHE_TIMEOUT = 300
+
+# Search products with the database's full text search when no Haystack
+# search backend is supported
+OSCAR_SEARCH_FULLTEXT = False
+OSCAR_SEARCH_FULLTEXT_CONFIG = 'english'
+
 # Stripe
 STRIPE_ENABLED = False
 STRIPE_CONNECT_CLIENT_ID = os.environ.get('STRIPE_CONNECT_CLIENT_ID')
@@ -12,5 +12,15 @@ logger = logging.getLogger(__name__)
 class Command(BaseCommand):
     help = 'Calculate product scores based on analytics data'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            dest='incremental',
+            default=False,
+            help='Only recalculate the scores of products with activity '
+                 'since the last run. Requires '
+                 'OSCAR_ANALYTICS_DECAYING_SCORES')
+
     def handle(self, *args, **options):
-        Calculator(logger).run()
+        Calculator(logger, incremental=options['incremental']).run()
@@ -0,0 +1,38 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from oscar.core.loading import get_class
+
+ProductViewCompactor = get_class(
+    'analytics.compaction', 'ProductViewCompactor')
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = """Collapse the repeated views of a product by a user on the same
+              day into one record, and delete views older than
+              OSCAR_ANALYTICS_VIEW_RETENTION_DAYS. Should be run daily."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            dest='days',
+            type=int,
+            default=7,
+            help='Compact the views of the last DAYS complete days')
+        parser.add_argument(
+            '--retention-days',
+            dest='retention_days',
+            type=int,
+            default=None,
+            help='Delete views older than RETENTION_DAYS, instead of '
+                 'OSCAR_ANALYTICS_VIEW_RETENTION_DAYS')
+
+    def handle(self, *args, **options):
+        compactor = ProductViewCompactor()
+        num_pruned = compactor.prune(options['retention_days'])
+        logger.info("Deleted %d old product views", num_pruned)
+        num_compacted = compactor.compact(options['days'])
+        logger.info("Compacted %d product views", num_compacted)
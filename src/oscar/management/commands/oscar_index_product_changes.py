@@ -0,0 +1,35 @@
+import logging
+
+from django.core.management.base import BaseCommand
+from haystack.constants import DEFAULT_ALIAS
+
+from oscar.core.loading import get_class
+
+ProductIndexer = get_class('search.indexing', 'ProductIndexer')
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = """Update the product search index for the products journalled
+              since the last run. Requires OSCAR_SEARCH_CHANGE_JOURNAL and
+              should be run every few minutes."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            dest='batch_size',
+            type=int,
+            default=None,
+            help='Number of journal entries to process at a time')
+        parser.add_argument(
+            '--using',
+            dest='using',
+            default=DEFAULT_ALIAS,
+            help='The Haystack connection to update')
+
+    def handle(self, *args, **options):
+        indexer = ProductIndexer(
+            options['using'], batch_size=options['batch_size'])
+        num_changes = indexer.index_changes()
+        logger.info("Indexed %d product changes", num_changes)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from oscar.core.loading import get_class
+
+PriceSnapshotUpdater = get_class('partner.snapshots', 'PriceSnapshotUpdater')
+
+
+class Command(BaseCommand):
+    help = """Rebuild the denormalised ProductPriceSnapshot table. Should be
+              run after enabling OSCAR_PRICE_SNAPSHOTS, and regularly if
+              stock levels are updated without saving stockrecords."""
+
+    def handle(self, *args, **options):
+        num_products = PriceSnapshotUpdater().update_all()
+        self.stdout.write(
+            'Successfully updated %s price snapshots\n' % num_products)
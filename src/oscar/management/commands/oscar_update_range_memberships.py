@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from oscar.core.loading import get_model
+
+Range = get_model('offer', 'Range')
+
+
+class Command(BaseCommand):
+    help = """Rebuild the denormalised RangeMembership table. Should be run
+              after enabling OSCAR_OFFERS_RANGE_MEMBERSHIP."""
+
+    def handle(self, *args, **options):
+        ranges = Range.objects.all()
+        for range in ranges:
+            range.sync_memberships()
+        self.stdout.write(
+            'Successfully updated %s ranges\n' % ranges.count())
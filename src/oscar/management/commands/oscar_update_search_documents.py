@@ -0,0 +1,31 @@
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from oscar.core.loading import get_class
+
+ProductDocumentBuilder = get_class('search.documents', 'ProductDocumentBuilder')
+get_full_text_backend = get_class('search.fulltext', 'get_full_text_backend')
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = """Rebuild the search documents of all products, which are searched
+              when OSCAR_SEARCH_FULLTEXT is set, and create their full text
+              index if it doesn't exist."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            dest='batch_size',
+            type=int,
+            default=None,
+            help='Number of products to process at a time')
+
+    def handle(self, *args, **options):
+        get_full_text_backend(DEFAULT_DB_ALIAS).install()
+        builder = ProductDocumentBuilder(batch_size=options['batch_size'])
+        num_products = builder.rebuild()
+        logger.info("Built the search documents of %d products", num_products)
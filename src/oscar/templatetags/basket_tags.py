@@ -1,9 +1,11 @@
 from django import template
 
-from oscar.core.loading import get_class, get_model
+from oscar.core.loading import get_class, get_classes, get_model
 
 AddToBasketForm = get_class('basket.forms', 'AddToBasketForm')
 SimpleAddToBasketForm = get_class('basket.forms', 'SimpleAddToBasketForm')
+BasketLinesSummary, BasketSummary = get_classes(
+    'basket.summary', ['BasketLinesSummary', 'BasketSummary'])
 Product = get_model('catalogue', 'product')
 
 register = template.Library()
@@ -27,3 +29,27 @@ def basket_form(request, product, quantity_type=QNT_MULTIPLE):
     form = form_class(request.basket, product=product, initial=initial)
 
     return form
+
+
+@register.simple_tag
+def basket_summary(request):
+    """
+    Return the summary of the request's basket, to render the mini basket
+    without loading the basket when the summary is cached.
+    """
+    summary = getattr(request, 'basket_summary', None)
+    if summary is None:
+        return BasketSummary(getattr(request, 'basket', None))
+    return summary
+
+
+@register.simple_tag
+def basket_lines_summary(request):
+    """
+    Return the lines summary of the request's basket, to render the basket
+    dropdown without loading the basket when the summary is cached.
+    """
+    summary = getattr(request, 'basket_lines_summary', None)
+    if summary is None:
+        return BasketLinesSummary(getattr(request, 'basket', None))
+    return summary
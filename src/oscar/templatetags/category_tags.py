@@ -1,9 +1,10 @@
 from django import template
 
-from oscar.core.loading import get_model
+from oscar.core.loading import get_class, get_model
 
 register = template.Library()
 Category = get_model('catalogue', 'category')
+category_tree = get_class('catalogue.cache', 'category_tree')
 
 
 @register.simple_tag(name="category_tree")
@@ -20,12 +21,13 @@ def get_annotated_list(depth=None, parent=None):
     annotated_categories = []
 
     start_depth, prev_depth = (None, None)
+    tree = category_tree.get()
     if parent:
-        categories = parent.get_descendants()
+        categories = tree.get_descendants(parent)
         if max_depth is not None:
             max_depth += parent.get_depth()
     else:
-        categories = Category.get_tree()
+        categories = tree.categories
 
     info = {}
     for node in categories:
@@ -34,9 +36,9 @@ def get_annotated_list(depth=None, parent=None):
             start_depth = node_depth
         if max_depth is not None and node_depth > max_depth:
             continue
-        
+
         # If this node or any parent nodes are not enabled skip this node
-        if node.is_disabled():
+        if tree.is_disabled(node):
             continue
 
         # Update previous node's info
@@ -12,6 +12,20 @@ def purchase_info_for_product(request, product):
     return request.strategy.fetch_for_product(product)
 
 
+@register.simple_tag
+def prefetch_purchase_info(request, products):
+    """
+    Fetch the purchase info of a list of products at once, so that rendering
+    the price and availability of each of them needs no further queries.
+    """
+    products = [product for product in products if product]
+    request.strategy.fetch_for_products(
+        [product for product in products if not product.is_parent])
+    request.strategy.fetch_for_parents(
+        [product for product in products if product.is_parent])
+    return ''
+
+
 @register.simple_tag
 def purchase_info_for_line(request, line):
     return request.strategy.fetch_for_line(line)
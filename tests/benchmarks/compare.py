@@ -0,0 +1,65 @@
+"""
+Compare two benchmark result files written by ``tests.benchmarks.run``::
+
+    python -m tests.benchmarks.compare before.json after.json
+
+Exits with a non-zero status if any benchmark got slower by more than the
+threshold.
+"""
+import argparse
+import json
+import sys
+
+
+def load_results(path):
+    with open(path) as f:
+        data = json.load(f)
+    results = {}
+    for result in data['results']:
+        params = tuple(sorted(result['params'].items()))
+        results[(result['name'], params)] = result
+    return data['meta'], results
+
+
+def compare(before, after, threshold):
+    """
+    Return the rows of the comparison and whether any benchmark regressed
+    """
+    rows = []
+    regressed = False
+    for key in sorted(set(before) & set(after)):
+        old, new = before[key]['median'], after[key]['median']
+        ratio = new / old if old else float('inf')
+        if ratio > 1 + threshold:
+            regressed = True
+        rows.append((key, old, new, ratio,
+                     before[key]['queries'], after[key]['queries']))
+    return rows, regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare two offer engine benchmark result files")
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="Relative slowdown treated as a regression")
+    args = parser.parse_args(argv)
+
+    before_meta, before = load_results(args.before)
+    after_meta, after = load_results(args.after)
+    rows, regressed = compare(before, after, args.threshold)
+
+    sys.stdout.write('%s -> %s\n' % (
+        before_meta.get('revision'), after_meta.get('revision')))
+    for (name, params), old, new, ratio, old_queries, new_queries in rows:
+        params = ', '.join('%s=%s' % item for item in params)
+        sys.stdout.write(
+            '%-28s %-24s %9.2fms -> %9.2fms  x%.2f  queries %d -> %d\n' % (
+                name, params, old * 1000, new * 1000, ratio,
+                old_queries, new_queries))
+    return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
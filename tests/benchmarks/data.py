@@ -0,0 +1,210 @@
+"""
+Generators for the synthetic catalogues, offers and baskets the benchmarks
+run against.
+
+Rows are inserted with ``bulk_create`` where possible so catalogues with
+hundreds of thousands of products can be generated in reasonable time.
+Everything is derived from a seeded random number generator so two runs with
+the same parameters produce the same data.
+"""
+import datetime
+import random
+from decimal import Decimal as D
+
+from django.utils import timezone
+
+from oscar.core.loading import get_class, get_model
+
+Basket = get_model('basket', 'Basket')
+Category = get_model('catalogue', 'Category')
+Product = get_model('catalogue', 'Product')
+ProductCategory = get_model('catalogue', 'ProductCategory')
+ProductClass = get_model('catalogue', 'ProductClass')
+Benefit = get_model('offer', 'Benefit')
+Condition = get_model('offer', 'Condition')
+ConditionalOffer = get_model('offer', 'ConditionalOffer')
+Range = get_model('offer', 'Range')
+RangeProduct = get_model('offer', 'RangeProduct')
+Partner = get_model('partner', 'Partner')
+StockRecord = get_model('partner', 'StockRecord')
+Default = get_class('partner.strategy', 'Default')
+
+BATCH_SIZE = 1000
+
+
+class Catalogue(object):
+    """
+    The ids, ranges and offers of a generated catalogue
+    """
+
+    def __init__(self):
+        self.product_ids = []
+        self.class_ids = []
+        self.category_ids = []
+        self.leaf_category_ids = []
+        self.ranges = []
+        self.offers = []
+
+
+def batched(iterable, size=BATCH_SIZE):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def create_categories(catalogue, depth, branching):
+    """
+    Create a category tree that is ``depth`` levels deep, where each
+    category has ``branching`` children.
+    """
+    level = [Category.add_root(name="Category %d" % i)
+             for i in range(branching)]
+    catalogue.category_ids.extend(category.id for category in level)
+    for __ in range(depth - 1):
+        children = []
+        for parent in level:
+            for i in range(branching):
+                children.append(parent.add_child(
+                    name="%s.%d" % (parent.name, i)))
+        catalogue.category_ids.extend(category.id for category in children)
+        level = children
+    catalogue.leaf_category_ids = [category.id for category in level]
+
+
+def create_products(catalogue, num_products, num_classes, rng):
+    """
+    Create standalone products with a stock record each and assign each to a
+    random leaf category.
+    """
+    classes = [ProductClass.objects.create(name="Class %d" % i)
+               for i in range(num_classes)]
+    catalogue.class_ids = [product_class.id for product_class in classes]
+    partner = Partner.objects.create(name="Benchmark partner")
+
+    for batch in batched(range(num_products)):
+        products = Product.objects.bulk_create([
+            Product(
+                title="Product %d" % i, slug="product-%d" % i,
+                upc="BENCH%d" % i, product_class=rng.choice(classes))
+            for i in batch])
+        if products[0].pk is None:
+            # Not every database returns the ids of bulk-created rows
+            products = list(Product.objects.filter(
+                upc__in=[product.upc for product in products]))
+        StockRecord.objects.bulk_create([
+            StockRecord(
+                product=product, partner=partner,
+                partner_sku=product.upc,
+                price_excl_tax=D(rng.randint(100, 10000)) / 100,
+                num_in_stock=1000000)
+            for product in products])
+        if catalogue.leaf_category_ids:
+            ProductCategory.objects.bulk_create([
+                ProductCategory(
+                    product=product,
+                    category_id=rng.choice(catalogue.leaf_category_ids))
+                for product in products])
+        catalogue.product_ids.extend(product.pk for product in products)
+
+
+def create_ranges(catalogue, num_ranges, products_per_range, rng):
+    """
+    Create ranges of each kind: ranges of explicitly included products,
+    ranges of product classes, ranges of categories and ranges that include
+    all products.
+    """
+    ranges = []
+    for i in range(num_ranges):
+        kind = i % 4
+        if kind == 3:
+            ranges.append(Range.objects.create(
+                name="Range %d (all products)" % i,
+                includes_all_products=True))
+            continue
+        product_range = Range.objects.create(name="Range %d" % i)
+        if kind == 0:
+            product_ids = rng.sample(
+                catalogue.product_ids,
+                min(products_per_range, len(catalogue.product_ids)))
+            RangeProduct.objects.bulk_create([
+                RangeProduct(range=product_range, product_id=product_id,
+                             display_order=order)
+                for order, product_id in enumerate(product_ids)])
+        elif kind == 1:
+            product_range.classes.add(rng.choice(catalogue.class_ids))
+        else:
+            # Pick any category, not just a leaf, so subtrees are included
+            product_range.included_categories.add(
+                rng.choice(catalogue.category_ids))
+        # Exclude a few products to exercise the exclusion lookups
+        product_range.excluded_products.add(*rng.sample(
+            catalogue.product_ids, min(5, len(catalogue.product_ids))))
+        ranges.append(product_range)
+    return ranges
+
+
+def create_offers(ranges, num_offers, rng):
+    """
+    Create open site offers with a mix of condition and benefit types
+    """
+    conditions = [
+        (Condition.COUNT, D('2')),
+        (Condition.VALUE, D('50.00')),
+        (Condition.COVERAGE, D('2')),
+    ]
+    benefits = [
+        (Benefit.PERCENTAGE, D('10')),
+        (Benefit.FIXED, D('5.00')),
+        (Benefit.MULTIBUY, None),
+        (Benefit.FIXED_PRICE, D('20.00')),
+    ]
+    start = timezone.now() - datetime.timedelta(days=1)
+    end = timezone.now() + datetime.timedelta(days=30)
+    offers = []
+    for i in range(num_offers):
+        condition_type, condition_value = conditions[i % len(conditions)]
+        benefit_type, benefit_value = benefits[i % len(benefits)]
+        condition = Condition.objects.create(
+            range=rng.choice(ranges), type=condition_type,
+            value=condition_value)
+        benefit = Benefit.objects.create(
+            range=rng.choice(ranges), type=benefit_type, value=benefit_value)
+        offers.append(ConditionalOffer.objects.create(
+            name="Offer %d" % i, offer_type=ConditionalOffer.SITE,
+            condition=condition, benefit=benefit, priority=rng.randint(0, 10),
+            start_datetime=start, end_datetime=end))
+    return offers
+
+
+def create_basket(catalogue, num_lines, rng):
+    """
+    Create a basket with ``num_lines`` distinct products
+    """
+    basket = Basket.objects.create()
+    basket.strategy = Default()
+    product_ids = rng.sample(catalogue.product_ids, num_lines)
+    products = Product.objects.filter(id__in=product_ids)
+    for product in products:
+        basket.add_product(product, quantity=rng.randint(1, 3))
+    return basket
+
+
+def create_catalogue(num_products, num_classes=10, category_depth=4,
+                     category_branching=4, num_ranges=100,
+                     products_per_range=100, num_offers=200, seed=0):
+    """
+    Create a complete synthetic catalogue and return its ids and ranges
+    """
+    rng = random.Random(seed)
+    catalogue = Catalogue()
+    create_categories(catalogue, category_depth, category_branching)
+    create_products(catalogue, num_products, num_classes, rng)
+    catalogue.ranges = create_ranges(
+        catalogue, num_ranges, products_per_range, rng)
+    catalogue.offers = create_offers(catalogue.ranges, num_offers, rng)
+    return catalogue
@@ -0,0 +1,242 @@
+"""
+Run the offer engine benchmarks against a synthetic catalogue.
+
+The benchmarks run in a throwaway test database using the test settings, so
+they can be pointed at SQLite or PostgreSQL the same way as the test suite::
+
+    python -m tests.benchmarks.run --sqlite --products 10000 \\
+        --output results.json
+
+Settings can be overridden to compare optional features::
+
+    python -m tests.benchmarks.run --sqlite \\
+        --setting OSCAR_OFFERS_USE_INDEX=True --output index.json
+
+Use ``python -m tests.benchmarks.compare`` to compare two result files.
+"""
+import argparse
+import ast
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+
+class DisableMigrations(object):
+    # Create the tables straight from the models, which is a lot faster
+    def __contains__(self, item):
+        return True
+
+    def __getitem__(self, item):
+        return None
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the offer engine against synthetic data")
+    parser.add_argument('--sqlite', action='store_true',
+                        help="Use an in-memory SQLite database")
+    parser.add_argument('--products', type=int, default=10000)
+    parser.add_argument('--classes', type=int, default=10)
+    parser.add_argument('--category-depth', type=int, default=4)
+    parser.add_argument('--category-branching', type=int, default=4)
+    parser.add_argument('--ranges', type=int, default=100)
+    parser.add_argument('--products-per-range', type=int, default=100)
+    parser.add_argument('--offers', type=int, default=200)
+    parser.add_argument('--basket-sizes', default='1,10,50',
+                        help="Comma-separated numbers of basket lines")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--setting', action='append', default=[],
+                        metavar='NAME=VALUE',
+                        help="Override a setting, eg OSCAR_OFFERS_USE_INDEX=True")
+    parser.add_argument('--output', help="Write the results as JSON to a file")
+    return parser
+
+
+def parse_settings(values):
+    overrides = {}
+    for value in values:
+        name, __, literal = value.partition('=')
+        try:
+            overrides[name] = ast.literal_eval(literal)
+        except (ValueError, SyntaxError):
+            overrides[name] = literal
+    return overrides
+
+
+def get_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+            cwd=os.path.dirname(__file__)).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Timer(object):
+    """
+    Collects the wall time and query count of each run of a benchmark
+    """
+
+    def __init__(self, name, **params):
+        self.name = name
+        self.params = params
+        self.times = []
+        self.queries = []
+
+    def measure(self, func):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            func()
+            self.times.append(time.perf_counter() - start)
+        self.queries.append(len(context.captured_queries))
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'params': self.params,
+            'times': self.times,
+            'min': min(self.times),
+            'median': statistics.median(self.times),
+            'mean': statistics.mean(self.times),
+            'queries': statistics.median(self.queries),
+        }
+
+
+def run_benchmarks(args):
+    from django.db import transaction
+    from oscar.core.loading import get_class
+
+    from tests.benchmarks import data
+
+    Applicator = get_class('offer.applicator', 'Applicator')
+    OrderCreator = get_class('order.utils', 'OrderCreator')
+    OrderTotalCalculator = get_class(
+        'checkout.calculators', 'OrderTotalCalculator')
+    Free = get_class('shipping.methods', 'Free')
+
+    start = time.perf_counter()
+    catalogue = data.create_catalogue(
+        args.products, num_classes=args.classes,
+        category_depth=args.category_depth,
+        category_branching=args.category_branching,
+        num_ranges=args.ranges, products_per_range=args.products_per_range,
+        num_offers=args.offers, seed=args.seed)
+    sys.stderr.write("Generated catalogue in %.1fs\n" % (
+        time.perf_counter() - start))
+
+    rng = random.Random(args.seed)
+    results = []
+    for size in [int(size) for size in args.basket_sizes.split(',')]:
+        basket = data.create_basket(catalogue, size, rng)
+
+        def load_basket():
+            fresh = data.Basket.objects.get(pk=basket.pk)
+            fresh.strategy = data.Default()
+            return fresh
+
+        timer = Timer('applicator_apply', basket_lines=size)
+        for __ in range(args.repeat):
+            fresh = load_basket()
+            timer.measure(lambda: Applicator().apply(fresh))
+        results.append(timer)
+
+        timer = Timer('basket_total_incl_tax', basket_lines=size)
+        for __ in range(args.repeat):
+            fresh = load_basket()
+            Applicator().apply(fresh)
+            timer.measure(lambda: fresh.total_incl_tax)
+        results.append(timer)
+
+        timer = Timer('place_order', basket_lines=size)
+        for i in range(args.repeat):
+            fresh = load_basket()
+            Applicator().apply(fresh)
+            shipping_method = Free()
+            shipping_charge = shipping_method.calculate(fresh)
+            total = OrderTotalCalculator().calculate(fresh, shipping_charge)
+
+            def place_order():
+                OrderCreator().place_order(
+                    basket=fresh, total=total,
+                    shipping_method=shipping_method,
+                    shipping_charge=shipping_charge,
+                    order_number='BENCH-%d-%d' % (size, i))
+            # Roll back so the basket can be ordered again
+            with transaction.atomic():
+                timer.measure(place_order)
+                transaction.set_rollback(True)
+        results.append(timer)
+
+    # The first four ranges are one of each kind created by the generator
+    kinds = ['products', 'classes', 'categories', 'all']
+    for kind, product_range in zip(kinds, catalogue.ranges):
+        timer = Timer('range_all_products_count', range_kind=kind)
+        for __ in range(args.repeat):
+            timer.measure(lambda: product_range.all_products().count())
+        results.append(timer)
+
+    return [timer.as_dict() for timer in results]
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+    if args.sqlite:
+        os.environ['DATABASE_ENGINE'] = 'django.db.backends.sqlite3'
+        os.environ['DATABASE_NAME'] = ':memory:'
+
+    import django
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import (
+        override_settings, setup_databases, setup_test_environment,
+        teardown_databases, teardown_test_environment)
+
+    django.setup()
+    settings.MIGRATION_MODULES = DisableMigrations()
+    overrides = parse_settings(args.setting)
+
+    setup_test_environment(debug=False)
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        with override_settings(**overrides):
+            results = run_benchmarks(args)
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+    output = {
+        'meta': {
+            'revision': get_revision(),
+            'database': connection.vendor,
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'arguments': vars(args),
+            'settings': overrides,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2, default=str)
+    for result in results:
+        params = ', '.join('%s=%s' % item for item in
+                           sorted(result['params'].items()))
+        sys.stdout.write('%-28s %-24s median %9.2fms  queries %5d\n' % (
+            result['name'], params, result['median'] * 1000,
+            result['queries']))
+
+
+if __name__ == '__main__':
+    main()
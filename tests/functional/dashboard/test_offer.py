@@ -3,6 +3,7 @@ from django.utils import timezone
 
 from oscar.test import testcases, factories
 from oscar.apps.offer import models
+from oscar.apps.offer.profiling import offer_timings
 
 
 class TestAnAdmin(testcases.WebTestCase):
@@ -210,3 +211,14 @@ class TestAnAdmin(testcases.WebTestCase):
 
         self.assertFalse('range' in condition_page.errors)
         self.assertEqual(len(condition_page.errors), 0)
+
+    def test_can_view_the_slowest_offers(self):
+        offer = factories.create_offer(name="Slow offer")
+        offer_timings.clear()
+        offer_timings.record(offer, 0.25, num_queries=4)
+
+        list_page = self.get(reverse('dashboard:offer-list'))
+        timings_page = list_page.click('Offer timings')
+
+        self.assertContains(timings_page, "Slow offer")
+        self.assertContains(timings_page, "250.00")
@@ -0,0 +1,106 @@
+from decimal import Decimal as D
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from oscar.apps.analytics import receivers
+from oscar.apps.analytics.buffer import EventBuffer, EventFlusher
+from oscar.apps.analytics.models import (
+    ProductRecord, UserProductView, UserRecord, UserSearch)
+from oscar.apps.analytics.receivers import (
+    receive_basket_addition, receive_order_placed, receive_product_search,
+    receive_product_view)
+from oscar.test import factories
+
+
+@override_settings(
+    OSCAR_ANALYTICS_BUFFER=True, OSCAR_ANALYTICS_FLUSH_INTERVAL=None)
+class TestBufferedAnalytics(TestCase):
+
+    def setUp(self):
+        self.buffer = EventBuffer()
+        self.original_buffer = receivers.event_buffer
+        receivers.event_buffer = self.buffer
+        self.user = factories.UserFactory()
+        self.product = factories.create_product(price=D('10.00'))
+
+    def tearDown(self):
+        receivers.event_buffer = self.original_buffer
+
+    def test_does_not_write_events_until_flushed(self):
+        receive_product_view(None, product=self.product, user=self.user)
+        receive_product_search(None, query='shirt', user=self.user)
+        self.assertFalse(ProductRecord.objects.exists())
+        self.assertFalse(UserSearch.objects.exists())
+        self.assertEqual(4, self.buffer.flush())
+        self.assertEqual(0, len(self.buffer.events))
+        self.assertEqual(1, UserProductView.objects.count())
+        self.assertEqual(1, UserSearch.objects.count())
+
+    def test_aggregates_counters_per_record(self):
+        for __ in range(3):
+            receive_product_view(None, product=self.product, user=self.user)
+        receive_basket_addition(None, product=self.product, user=None)
+        self.buffer.flush()
+        record = ProductRecord.objects.get(product=self.product)
+        self.assertEqual(3, record.num_views)
+        self.assertEqual(1, record.num_basket_additions)
+        self.assertEqual(
+            3, UserRecord.objects.get(user=self.user).num_product_views)
+        self.assertEqual(3, UserProductView.objects.get().num_views)
+
+        receive_product_view(None, product=self.product, user=None)
+        self.buffer.flush()
+        record.refresh_from_db()
+        self.assertEqual(4, record.num_views)
+
+    def test_records_placed_orders(self):
+        basket = factories.create_basket(empty=True)
+        basket.add_product(self.product, quantity=2)
+        order = factories.create_order(basket=basket, user=self.user)
+        # Discard the events of placing the order
+        self.buffer.drain()
+        receive_order_placed(None, order=order, user=self.user)
+        receive_order_placed(None, order=order, user=self.user)
+        self.buffer.flush()
+        self.assertEqual(
+            4, ProductRecord.objects.get(product=self.product).num_purchases)
+        record = UserRecord.objects.get(user=self.user)
+        self.assertEqual(2, record.num_orders)
+        self.assertEqual(4, record.num_order_items)
+        self.assertEqual(order.total_incl_tax * 2, record.total_spent)
+        self.assertEqual(order.date_placed, record.date_last_order)
+
+    def test_wakes_the_flusher_when_full(self):
+        with mock.patch.object(EventFlusher, 'start'), \
+                self.settings(OSCAR_ANALYTICS_BUFFER_FLUSH_SIZE=2):
+            receive_product_view(None, product=self.product, user=None)
+            self.assertIsNone(self.buffer.flusher)
+            receive_product_view(None, product=self.product, user=None)
+            self.assertTrue(self.buffer.flusher.woken.is_set())
+        # The events aren't written on the request thread
+        self.assertFalse(ProductRecord.objects.exists())
+        self.assertEqual(2, self.buffer.flush())
+        self.assertEqual(
+            2, ProductRecord.objects.get(product=self.product).num_views)
+
+    def test_retries_failed_events_once(self):
+        receive_product_view(None, product=self.product, user=None)
+        with mock.patch.object(EventBuffer, 'write', side_effect=ValueError):
+            self.assertEqual(0, self.buffer.flush())
+            self.assertEqual(1, len(self.buffer.failed_events))
+            receive_product_view(None, product=self.product, user=None)
+            self.assertEqual(0, self.buffer.flush())
+        # The retried events are dropped, the new ones are retried
+        self.assertEqual(1, len(self.buffer.failed_events))
+        self.assertEqual(1, self.buffer.flush())
+        self.assertEqual(
+            1, ProductRecord.objects.get(product=self.product).num_views)
+
+    def test_drops_oldest_events_when_at_max_size(self):
+        buffer = EventBuffer(max_size=2)
+        for user_id in range(3):
+            buffer.record_user(user_id, 'num_product_views')
+        self.assertEqual(1, buffer.num_dropped)
+        self.assertEqual(
+            [1, 2], [args[0] for __, args in buffer.drain()])
@@ -0,0 +1,68 @@
+import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from oscar.apps.analytics.compaction import ProductViewCompactor
+from oscar.apps.analytics.models import UserProductView
+from oscar.test import factories
+
+
+class TestProductViewCompactor(TestCase):
+
+    def setUp(self):
+        self.user = factories.UserFactory()
+        self.product = factories.create_product()
+        self.compactor = ProductViewCompactor()
+        self.yesterday = timezone.now() - datetime.timedelta(days=1)
+
+    def add_view(self, date_created, product=None, user=None):
+        view = UserProductView.objects.create(
+            user=user or self.user, product=product or self.product)
+        UserProductView.objects.filter(pk=view.pk).update(
+            date_created=date_created)
+        return view
+
+    def test_collapses_views_of_the_same_day(self):
+        start = self.compactor.get_day_start(
+            timezone.localdate() - datetime.timedelta(days=1))
+        first = self.add_view(start)
+        self.add_view(start + datetime.timedelta(hours=1))
+        self.add_view(start + datetime.timedelta(hours=2))
+        other_product = self.add_view(
+            start, product=factories.create_product())
+        other_day = self.add_view(start - datetime.timedelta(hours=1))
+
+        self.assertEqual(2, self.compactor.compact(days=1))
+        first.refresh_from_db()
+        self.assertEqual(3, first.num_views)
+        self.assertEqual(start + datetime.timedelta(hours=2),
+                         first.date_created)
+        self.assertEqual(
+            {first.pk, other_product.pk, other_day.pk},
+            set(UserProductView.objects.values_list('pk', flat=True)))
+
+    def test_does_not_compact_today(self):
+        self.add_view(timezone.now())
+        self.add_view(timezone.now())
+        self.assertEqual(0, self.compactor.compact())
+        self.assertEqual(2, UserProductView.objects.count())
+
+    def test_prunes_old_views_in_batches(self):
+        self.compactor.batch_size = 2
+        old = timezone.now() - datetime.timedelta(days=40)
+        for __ in range(3):
+            self.add_view(old)
+        recent = self.add_view(self.yesterday)
+        self.assertEqual(3, self.compactor.prune(days=30))
+        self.assertEqual([recent], list(UserProductView.objects.all()))
+
+    def test_command_prunes_and_compacts(self):
+        self.add_view(timezone.now() - datetime.timedelta(days=400))
+        self.add_view(self.yesterday)
+        self.add_view(self.yesterday)
+        with self.settings(OSCAR_ANALYTICS_VIEW_RETENTION_DAYS=365):
+            call_command('oscar_compact_product_views', stdout=StringIO())
+        self.assertEqual(2, UserProductView.objects.get().num_views)
@@ -0,0 +1,94 @@
+from decimal import Decimal as D
+
+from django.test import TestCase
+from django.utils import timezone
+
+from oscar.apps.analytics.counters import (
+    CounterBackend, UpsertCounterBackend, get_counter_backend)
+from oscar.apps.analytics.models import ProductRecord, UserRecord
+from oscar.apps.analytics.receivers import _record_products_in_order
+from oscar.test import factories
+
+
+class CounterBackendTests(object):
+    backend_class = None
+
+    def setUp(self):
+        self.backend = self.backend_class()
+        self.products = [factories.create_product() for __ in range(3)]
+
+    def test_creates_and_updates_records(self):
+        first, second, third = self.products
+        ProductRecord.objects.create(product=first, num_views=2, score=1.5)
+        self.backend.increment(ProductRecord, 'product', {
+            first.id: {'num_views': 1},
+            second.id: {'num_views': 3, 'num_purchases': 2}})
+        first_record = ProductRecord.objects.get(product=first)
+        self.assertEqual(3, first_record.num_views)
+        self.assertEqual(0, first_record.num_purchases)
+        self.assertEqual(1.5, first_record.score)
+        second_record = ProductRecord.objects.get(product=second)
+        self.assertEqual(3, second_record.num_views)
+        self.assertEqual(2, second_record.num_purchases)
+        self.assertFalse(ProductRecord.objects.filter(product=third).exists())
+
+    def test_sets_values(self):
+        user, other_user = factories.UserFactory(), factories.UserFactory()
+        date_placed = timezone.now()
+        UserRecord.objects.create(user=other_user, date_last_order=date_placed)
+        self.backend.increment(
+            UserRecord, 'user',
+            {user.id: {'num_orders': 1, 'total_spent': D('12.50')},
+             other_user.id: {'num_orders': 1}},
+            {user.id: {'date_last_order': date_placed}})
+        record = UserRecord.objects.get(user=user)
+        self.assertEqual(1, record.num_orders)
+        self.assertEqual(D('12.50'), record.total_spent)
+        self.assertEqual(date_placed, record.date_last_order)
+        self.assertEqual(
+            date_placed,
+            UserRecord.objects.get(user=other_user).date_last_order)
+
+    def test_creates_missing_records_without_increments(self):
+        first, second, __ = self.products
+        ProductRecord.objects.create(product=first, num_views=2)
+        self.backend.increment(ProductRecord, 'product', {
+            first.id: {}, second.id: {}})
+        self.assertEqual(
+            2, ProductRecord.objects.get(product=first).num_views)
+        self.assertEqual(
+            0, ProductRecord.objects.get(product=second).num_views)
+
+
+class TestCounterBackend(CounterBackendTests, TestCase):
+    backend_class = CounterBackend
+
+
+class TestUpsertCounterBackend(CounterBackendTests, TestCase):
+    backend_class = UpsertCounterBackend
+
+    def test_updates_all_records_in_one_statement(self):
+        increments = {product.id: {'num_purchases': 1}
+                      for product in self.products}
+        with self.assertNumQueries(1):
+            self.backend.increment(ProductRecord, 'product', increments)
+
+    def test_is_used_by_default(self):
+        self.assertIsInstance(get_counter_backend(), UpsertCounterBackend)
+
+
+class TestRecordingOrders(TestCase):
+
+    def test_records_all_lines_of_an_order(self):
+        basket = factories.create_basket(empty=True)
+        products = [factories.create_product(price=D('5.00'))
+                    for __ in range(3)]
+        for product in products:
+            basket.add_product(product, quantity=2)
+        order = factories.create_order(basket=basket)
+        ProductRecord.objects.all().delete()
+        with self.assertNumQueries(2):
+            _record_products_in_order(order)
+        self.assertEqual(
+            [2, 2, 2], [record.num_purchases for record in
+                        ProductRecord.objects.filter(product__in=products)])
@@ -0,0 +1,102 @@
+import datetime
+import logging
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from oscar.apps.analytics.models import ProductActivity, ProductRecord
+from oscar.apps.analytics.receivers import receive_product_view
+from oscar.apps.analytics.scores import (
+    Calculator, get_period_start, record_product_activity)
+from oscar.test import factories
+
+logger = logging.getLogger(__name__)
+
+HOUR = datetime.timedelta(hours=1)
+
+
+@override_settings(OSCAR_ANALYTICS_DECAYING_SCORES=True)
+class TestDecayingScores(TestCase):
+
+    def setUp(self):
+        self.old, self.recent = factories.create_product(), \
+            factories.create_product()
+        self.now = get_period_start(timezone.now())
+
+    def add_activity(self, product, hours_ago, **counts):
+        ProductActivity.objects.create(
+            product=product, period_start=self.now - hours_ago * HOUR,
+            **counts)
+
+    def get_score(self, product):
+        return ProductRecord.objects.get(product=product).score
+
+    def test_records_activity_per_period(self):
+        receive_product_view(None, product=self.old, user=None)
+        receive_product_view(None, product=self.old, user=None)
+        record_product_activity({self.old.id: {'num_purchases': 2}})
+        activity = ProductActivity.objects.get()
+        self.assertEqual(self.now, activity.period_start)
+        self.assertEqual(2, activity.num_views)
+        self.assertEqual(2, activity.num_purchases)
+
+    def test_recent_activity_weighs_more(self):
+        # Ten purchases two weeks ago weigh less than three purchases now
+        self.add_activity(self.old, 24 * 14, num_purchases=10)
+        self.add_activity(self.recent, 0, num_purchases=3)
+        Calculator(logger).run()
+        self.assertGreater(self.get_score(self.recent), self.get_score(self.old))
+
+    def test_scores_halve_every_half_life(self):
+        other = factories.create_product()
+        self.add_activity(self.old, 24 * 7, num_purchases=2)
+        self.add_activity(other, 0, num_purchases=1)
+        Calculator(logger).run()
+        self.assertAlmostEqual(self.get_score(other), self.get_score(self.old))
+
+    def test_incremental_run_only_scores_new_activity(self):
+        self.add_activity(self.old, 0, num_views=1)
+        Calculator(logger).run()
+        ProductActivity.objects.update(
+            date_updated=timezone.now() - HOUR)
+        self.add_activity(self.recent, 0, num_views=1)
+        date_scored = ProductRecord.objects.get(product=self.old).date_scored
+        Calculator(logger, incremental=True).run()
+        self.assertEqual(
+            date_scored,
+            ProductRecord.objects.get(product=self.old).date_scored)
+        self.assertAlmostEqual(
+            self.get_score(self.old), self.get_score(self.recent))
+
+    def test_command_supports_incremental_mode(self):
+        self.add_activity(self.old, 0, num_views=1)
+        call_command(
+            'oscar_calculate_scores', incremental=True, stdout=StringIO())
+        self.assertGreater(self.get_score(self.old), 0)
+
+    def test_folds_old_activity_into_the_scores(self):
+        self.add_activity(self.old, 24 * 60, num_purchases=4)
+        self.add_activity(self.old, 24 * 40, num_views=3)
+        self.add_activity(self.old, 0, num_views=1)
+        self.add_activity(self.recent, 24 * 45, num_purchases=1)
+        with self.settings(OSCAR_ANALYTICS_ACTIVITY_RETENTION_DAYS=None):
+            Calculator(logger).run()
+        scores = [self.get_score(self.old), self.get_score(self.recent)]
+
+        with self.settings(OSCAR_ANALYTICS_ACTIVITY_RETENTION_DAYS=30):
+            Calculator(logger).run()
+            self.assertEqual(1, ProductActivity.objects.count())
+            for product, score in zip([self.old, self.recent], scores):
+                self.assertAlmostEqual(score, self.get_score(product))
+
+            # Folding again and scoring incrementally keeps the scores
+            self.add_activity(self.old, 24 * 35, num_views=2)
+            Calculator(logger).run()
+            self.add_activity(self.recent, 0, num_views=1)
+            Calculator(logger, incremental=True).run()
+        self.assertEqual(
+            ProductActivity.objects.filter(product=self.old).count(), 1)
+        self.assertGreater(self.get_score(self.old), scores[0])
+        self.assertGreater(self.get_score(self.recent), scores[1])
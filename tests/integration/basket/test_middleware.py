@@ -1,9 +1,25 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.signing import Signer
+from django.db import connection
 from django.http import HttpResponse
-from django.test import TestCase
+from django.template import Context, Template
+from django.test import TestCase, override_settings
 from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import AnonymousUser
 
 from oscar.apps.basket import middleware
+from oscar.apps.basket.models import Basket
+from oscar.apps.catalogue.models import Product
+from oscar.apps.partner.strategy import Default
+from oscar.test.factories import create_basket, create_offer
+
+# The basket figures rendered by the header on every page
+HEADER_TEMPLATE = Template(
+    '{% load basket_tags %}{% basket_summary request as summary %}'
+    '{{ summary.num_items }} {{ summary.total_incl_tax }}')
 
 
 class TestBasketMiddleware(TestCase):
@@ -37,3 +53,182 @@ class TestBasketMiddleware(TestCase):
 
         self.assertEqual(None, cookie_basket)
         self.assertIn("oscar_open_basket", request.cookies_to_delete)
+
+
+@override_settings(OSCAR_OFFERS_CACHE_APPLICATIONS=True)
+class TestBasketMiddlewareOfferCache(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.middleware = middleware.BasketMiddleware(
+            TestBasketMiddleware.get_response_for_test)
+        self.request = RequestFactory().get('/')
+        self.request.user = AnonymousUser()
+        self.offer = create_offer()
+        self.basket = create_basket()
+
+    def apply_offers(self):
+        basket = Basket.objects.get(pk=self.basket.pk)
+        basket.strategy = Default()
+        self.middleware.apply_offers_to_basket(self.request, basket)
+        return basket
+
+    def test_restores_discounts_when_basket_is_unchanged(self):
+        first = self.apply_offers()
+        with mock.patch.object(middleware.Applicator, 'apply') as apply:
+            second = self.apply_offers()
+        self.assertFalse(apply.called)
+        self.assertTrue(first.total_discount > 0)
+        self.assertEqual(first.total_discount, second.total_discount)
+        self.assertEqual(
+            list(first.applied_offers()), list(second.applied_offers()))
+        line = second.all_lines()[0]
+        self.assertEqual(
+            first.all_lines()[0].consumer.get_state()[1:],
+            line.consumer.get_state()[1:])
+        self.assertEqual(0, line.quantity_without_discount)
+
+    def test_applies_offers_when_a_quantity_changes(self):
+        self.apply_offers()
+        line = self.basket.all_lines()[0]
+        line.quantity = 2
+        line.save()
+        with mock.patch.object(middleware.Applicator, 'apply') as apply:
+            self.apply_offers()
+        self.assertTrue(apply.called)
+
+    def test_applies_offers_when_an_offer_changes(self):
+        self.apply_offers()
+        self.offer.suspend()
+        basket = self.apply_offers()
+        self.assertEqual(0, basket.total_discount)
+
+
+@override_settings(OSCAR_BASKET_CACHE_SUMMARY=True)
+class TestBasketSummary(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.middleware = middleware.BasketMiddleware(
+            TestBasketMiddleware.get_response_for_test)
+        self.basket = create_basket()
+        self.cookie = Signer().sign(self.basket.id)
+
+    def get_request(self, cookie=None):
+        request_factory = RequestFactory()
+        if cookie:
+            request_factory.cookies['oscar_open_basket'] = cookie
+        request = request_factory.get('/')
+        request.user = AnonymousUser()
+        self.middleware(request)
+        return request
+
+    def test_is_empty_without_a_basket(self):
+        request = self.get_request()
+        with self.assertNumQueries(0):
+            self.assertTrue(request.basket_summary.is_empty)
+
+    def test_is_cached_per_basket(self):
+        request = self.get_request(self.cookie)
+        self.assertEqual(1, request.basket_summary.num_items)
+        total = self.basket.total_incl_tax
+        request = self.get_request(self.cookie)
+        with self.assertNumQueries(0):
+            summary = request.basket_summary
+            self.assertEqual(1, summary.num_lines)
+            self.assertEqual(total, summary.total_incl_tax)
+
+    def test_caches_the_lines_apart_from_the_totals(self):
+        request = self.get_request(self.cookie)
+        request.basket_summary.num_items
+        with mock.patch.object(Product, 'primary_image') as primary_image:
+            request = self.get_request(self.cookie)
+            with self.assertNumQueries(0):
+                request.basket_summary.num_items
+            self.assertFalse(primary_image.called)
+
+        line, = list(self.get_request(self.cookie).basket_lines_summary)
+        request = self.get_request(self.cookie)
+        with self.assertNumQueries(0):
+            self.assertEqual([line], list(request.basket_lines_summary))
+        self.assertEqual(1, line['quantity'])
+
+    def test_header_reads_only_the_cached_totals(self):
+        self.get_request(self.cookie).basket_summary.num_items
+        request = self.get_request(self.cookie)
+        with self.assertNumQueries(0):
+            HEADER_TEMPLATE.render(Context({'request': request}))
+
+    @override_settings(OSCAR_BASKET_CACHE_SUMMARY=False)
+    def test_header_reads_the_basket_totals_without_caching(self):
+        request = self.get_request(self.cookie)
+        with CaptureQueriesContext(connection) as basket_queries:
+            request.basket.total_incl_tax
+
+        request = self.get_request(self.cookie)
+        with mock.patch.object(Product, 'primary_image') as primary_image:
+            with self.assertNumQueries(len(basket_queries)):
+                HEADER_TEMPLATE.render(Context({'request': request}))
+        self.assertFalse(primary_image.called)
+
+    def test_is_invalidated_when_a_line_changes(self):
+        self.get_request(self.cookie).basket_summary.num_items
+        line = self.basket.all_lines()[0]
+        line.quantity = 3
+        line.save()
+        request = self.get_request(self.cookie)
+        self.assertEqual(3, request.basket_summary.num_items)
+
+    def test_includes_offer_discounts(self):
+        self.get_request(self.cookie).basket_summary.num_items
+        create_offer()
+        request = self.get_request(self.cookie)
+        self.assertEqual(
+            request.basket.total_incl_tax, request.basket_summary.total_incl_tax)
+        self.assertTrue(request.basket.total_discount > 0)
+
+
+@override_settings(OSCAR_BASKET_TRUST_SIGNED_COOKIE=True)
+class TestTrustedBasketCookie(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.middleware = middleware.BasketMiddleware(
+            TestBasketMiddleware.get_response_for_test)
+        self.basket = create_basket()
+
+    def get_request(self, basket_id):
+        request_factory = RequestFactory()
+        request_factory.cookies['oscar_open_basket'] = Signer().sign(basket_id)
+        request = request_factory.get('/')
+        request.user = AnonymousUser()
+        self.middleware(request)
+        return request
+
+    def test_basket_hash_is_read_from_the_cookie(self):
+        request = self.get_request(self.basket.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                Signer().sign(self.basket.id), str(request.basket_hash))
+
+    def test_rejects_closed_baskets_without_a_query(self):
+        self.basket.set_as_submitted()
+        request = self.get_request(self.basket.id)
+        with self.assertNumQueries(0):
+            basket = self.middleware.get_cookie_basket(
+                'oscar_open_basket', request, Basket.open)
+        self.assertIsNone(basket)
+        self.assertIn('oscar_open_basket', request.cookies_to_delete)
+
+    def test_remembers_missing_baskets(self):
+        request = self.get_request(12345)
+        self.assertIsNone(self.middleware.get_cookie_basket(
+            'oscar_open_basket', request, Basket.open))
+        request = self.get_request(12345)
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.middleware.get_cookie_basket(
+                'oscar_open_basket', request, Basket.open))
+
+    def test_loads_open_baskets(self):
+        request = self.get_request(self.basket.id)
+        self.assertEqual(self.basket, request.basket)
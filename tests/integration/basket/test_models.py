@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 from decimal import Decimal as D
 
+from django.core.exceptions import PermissionDenied
 from django.test import TestCase
 
 from oscar.apps.basket.models import Basket
@@ -308,6 +309,65 @@ class TestMergingTwoBaskets(TestCase):
         self.assertEqual(Basket.MERGED, self.merge_basket.status)
 
 
+class TestMergingBasketsWithManyLines(TestCase):
+
+    def setUp(self):
+        self.main_basket = Basket.objects.create()
+        self.main_basket.strategy = strategy.Default()
+        self.merge_basket = Basket.objects.create()
+        self.merge_basket.strategy = strategy.Default()
+
+    def add_products(self, num_products):
+        for __ in range(num_products):
+            product = factories.create_product()
+            factories.create_stockrecord(product, num_in_stock=10)
+            self.main_basket.add(product, quantity=2)
+            self.merge_basket.add(product, quantity=3)
+            self.merge_basket.add(factories.create_product(
+                price=D('5.00'), num_in_stock=10))
+
+    def test_uses_the_same_number_of_queries_for_any_number_of_lines(self):
+        self.add_products(1)
+        with self.assertNumQueries(12):
+            self.main_basket.merge(self.merge_basket)
+
+        self.main_basket = Basket.objects.create()
+        self.main_basket.strategy = strategy.Default()
+        self.merge_basket = Basket.objects.create()
+        self.merge_basket.strategy = strategy.Default()
+        self.add_products(5)
+        with self.assertNumQueries(12):
+            self.main_basket.merge(self.merge_basket)
+        self.assertEqual(0, self.merge_basket.lines.count())
+
+    def test_adds_quantities(self):
+        self.add_products(2)
+        self.main_basket.merge(self.merge_basket)
+        self.assertEqual(4, self.main_basket.num_lines)
+        self.assertEqual(12, self.main_basket.num_items)
+        self.assertEqual(0, self.merge_basket.lines.count())
+
+    def test_keeps_the_maximum_quantity(self):
+        self.add_products(2)
+        self.main_basket.merge(self.merge_basket, add_quantities=False)
+        self.assertEqual(4, self.main_basket.num_lines)
+        self.assertEqual(8, self.main_basket.num_items)
+
+    def test_moves_line_attributes(self):
+        self.merge_basket.add(factories.create_product(
+            price=D('5.00'), num_in_stock=10))
+        line = self.merge_basket.lines.get()
+        BasketLineAttributeFactory(line=line, value='red')
+        self.main_basket.merge(self.merge_basket)
+        self.assertEqual([line], list(self.main_basket.lines.all()))
+        self.assertEqual(1, self.main_basket.lines.get().attributes.count())
+
+    def test_cannot_merge_into_a_submitted_basket(self):
+        self.main_basket.submit()
+        with self.assertRaises(PermissionDenied):
+            self.main_basket.merge(self.merge_basket)
+
+
 class TestASubmittedBasket(TestCase):
 
     def setUp(self):
@@ -251,3 +251,86 @@ class TestCategoryTemplateTags(TestCase):
         actual_categories = self.get_category_names(depth=1, parent=parent)
         expected_categories = {'Horror', 'Comedy'}
         self.assertEqual(expected_categories, actual_categories)
+
+    def test_disabled_categories_are_excluded_with_their_descendants(self):
+        Category.objects.filter(name='Fiction').update(is_enabled=False)
+        self.assertEqual(
+            {'Books', 'Non-fiction', 'Biography', 'Programming', 'Children'},
+            self.get_category_names())
+
+    def test_builds_the_tree_with_a_single_query(self):
+        with self.assertNumQueries(1):
+            get_annotated_list()
+
+
+@override_settings(OSCAR_CATEGORIES_CACHE_TREE=True)
+class TestCachedCategoryTree(TestCase):
+
+    def setUp(self):
+        create_from_breadcrumbs('Books > Fiction > Horror')
+
+    def tearDown(self):
+        cache.clear()
+
+    def get_category_names(self):
+        return [category.name for category, __ in get_annotated_list()]
+
+    def test_does_not_query_categories_once_cached(self):
+        get_annotated_list()
+        with self.assertNumQueries(0):
+            get_annotated_list()
+
+    def test_is_rebuilt_when_a_category_is_saved_or_deleted(self):
+        self.get_category_names()
+        create_from_breadcrumbs('Books > Children')
+        self.assertIn('Children', self.get_category_names())
+        Category.objects.get(name='Horror').delete()
+        self.assertNotIn('Horror', self.get_category_names())
+
+    def test_is_rebuilt_when_a_category_is_moved(self):
+        create_from_breadcrumbs('Comics')
+        self.get_category_names()
+        Category.objects.get(name='Horror').move(
+            Category.objects.get(name='Comics'), pos='first-child')
+        self.assertEqual(
+            ['Books', 'Fiction', 'Comics', 'Horror'], self.get_category_names())
+
+    def test_computes_full_names_and_urls_without_queries(self):
+        horror = Category.objects.get(name='Horror')
+        get_annotated_list()
+        with self.assertNumQueries(0):
+            self.assertEqual('Books > Fiction > Horror', horror.full_name)
+            self.assertEqual('books/fiction/horror', horror.full_slug)
+            self.assertIn('books/fiction/horror', horror.get_absolute_url())
+
+    def test_urls_change_when_an_ancestor_is_renamed(self):
+        horror = Category.objects.get(name='Horror')
+        horror.get_absolute_url()
+        fiction = Category.objects.get(name='Fiction')
+        fiction.slug = 'novels'
+        fiction.save()
+        self.assertIn('books/novels/horror', horror.get_absolute_url())
+
+
+class TestCategoryUrlCache(TestCase):
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_urls_change_when_an_ancestor_is_renamed(self):
+        create_from_breadcrumbs('Books > Fiction > Horror')
+        horror = Category.objects.get(name='Horror')
+        horror.get_absolute_url()
+        fiction = Category.objects.get(name='Fiction')
+        fiction.slug = 'novels'
+        fiction.save()
+        horror = Category.objects.get(name='Horror')
+        self.assertIn('books/novels/horror', horror.get_absolute_url())
+
+    def test_categories_of_the_tree_know_their_ancestors(self):
+        create_from_breadcrumbs('Books > Fiction > Horror')
+        categories = [category for category, __ in get_annotated_list()]
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                ['books', 'books/fiction', 'books/fiction/horror'],
+                [category.full_slug for category in categories])
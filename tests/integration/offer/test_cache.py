@@ -0,0 +1,96 @@
+import datetime
+from decimal import Decimal as D
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from oscar.apps.offer import models
+from oscar.apps.offer.applicator import Applicator
+from oscar.apps.offer.cache import CompiledOfferSet
+from oscar.test.factories import (
+    BenefitFactory, ConditionalOfferFactory, ConditionFactory, RangeFactory)
+
+
+@override_settings(OSCAR_OFFERS_CACHE_SITE_OFFERS=True)
+class TestCompiledOfferSet(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.range = RangeFactory(includes_all_products=True)
+        self.condition = ConditionFactory(
+            range=self.range, type=models.Condition.COUNT, value=1)
+        self.benefit = BenefitFactory(
+            range=self.range, type=models.Benefit.PERCENTAGE, value=10)
+        self.offer = ConditionalOfferFactory(
+            condition=self.condition, benefit=self.benefit)
+        self.offers = CompiledOfferSet()
+
+    def test_returns_active_site_offers(self):
+        ConditionalOfferFactory(
+            name='Session offer', condition=self.condition,
+            benefit=self.benefit,
+            offer_type=models.ConditionalOffer.SESSION)
+        offers = self.offers.get_offers()
+        self.assertEqual([self.offer.pk], [offer.pk for offer in offers])
+
+    def test_costs_no_queries_once_compiled(self):
+        self.offers.get_offers()
+        with self.assertNumQueries(0):
+            offers = self.offers.get_offers()
+            offer = offers[0]
+            self.assertIsInstance(
+                offer.condition.proxy(), models.CountCondition)
+            self.assertIsInstance(
+                offer.benefit.proxy(), models.PercentageDiscountBenefit)
+            self.assertEqual(self.range, offer.condition.proxy().range)
+            self.assertEqual(self.range, offer.benefit.proxy().range)
+
+    def test_returns_new_instances_on_each_call(self):
+        first = self.offers.get_offers()[0]
+        second = self.offers.get_offers()[0]
+        self.assertIsNot(first.condition, second.condition)
+
+    def test_is_invalidated_when_an_offer_is_saved(self):
+        self.offers.get_offers()
+        self.offer.suspend()
+        self.assertEqual([], self.offers.get_offers())
+
+    def test_is_not_invalidated_when_usage_is_recorded(self):
+        self.offers.get_offers()
+        self.offer.record_usage({'freq': 1, 'discount': D('5.00')})
+        with self.assertNumQueries(0):
+            self.offers.get_offers()
+
+    def test_is_invalidated_when_usage_of_a_limited_offer_is_recorded(self):
+        self.offer.max_global_applications = 1
+        self.offer.save()
+        self.offers.get_offers()
+        self.offer.record_usage({'freq': 1, 'discount': D('5.00')})
+        offer = self.offers.get_offers()[0]
+        self.assertEqual(1, offer.num_applications)
+        self.assertFalse(offer.is_available())
+
+    def test_is_invalidated_when_a_benefit_is_saved(self):
+        self.offers.get_offers()
+        self.benefit.value = 20
+        self.benefit.save()
+        offer = self.offers.get_offers()[0]
+        self.assertEqual(D('20'), offer.benefit.value)
+
+    def test_is_refreshed_when_an_offer_starts(self):
+        start = timezone.now() + datetime.timedelta(hours=1)
+        ConditionalOfferFactory(
+            name='Upcoming', condition=self.condition, benefit=self.benefit,
+            start_datetime=start)
+        self.assertEqual(1, len(self.offers.get_offers()))
+        self.assertEqual(start, self.offers.expires)
+
+        self.offers.expires = timezone.now()
+        models.ConditionalOffer.objects.filter(name='Upcoming').update(
+            start_datetime=timezone.now())
+        self.assertEqual(2, len(self.offers.get_offers()))
+
+    def test_is_used_by_the_applicator(self):
+        offers = Applicator().get_site_offers()
+        self.assertEqual([self.offer.pk], [offer.pk for offer in offers])
@@ -2,7 +2,9 @@ import pytest
 from decimal import Decimal as D
 from unittest import mock
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from oscar.apps.basket.models import Basket
 from oscar.apps.offer import custom, models
@@ -259,3 +261,34 @@ class TestCustomCondition(TestCase):
     def test_is_satisfied_by_match(self):
         self.basket.owner = factories.UserFactory(first_name="Barry")
         self.assertTrue(self.offer.is_condition_satisfied(self.basket))
+
+
+class TestConditionRangeMembership(TestCase):
+
+    def setUp(self):
+        self.range = factories.RangeFactory()
+        self.basket = factories.create_basket(empty=True)
+        self.offer = mock.Mock()
+
+    def add_products(self, num_products):
+        for __ in [None] * num_products:
+            product = factories.create_product()
+            self.range.add_product(product)
+            add_product(self.basket, product=product)
+        # Load the lines up front so only the range lookups are counted
+        self.basket.reset_offer_applications()
+        list(self.basket.all_lines())
+
+    def count_queries(self):
+        condition = models.CountCondition(
+            range=models.Range.objects.get(pk=self.range.pk),
+            type="Count", value=100)
+        with CaptureQueriesContext(connection) as context:
+            self.assertFalse(condition.is_satisfied(self.offer, self.basket))
+        return len(context.captured_queries)
+
+    def test_number_of_queries_does_not_depend_on_number_of_lines(self):
+        self.add_products(2)
+        num_queries = self.count_queries()
+        self.add_products(10)
+        self.assertEqual(num_queries, self.count_queries())
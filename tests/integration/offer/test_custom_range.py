@@ -49,3 +49,10 @@ class TestACustomRange(TestCase):
         rng = custom.create_range(CustomRange)
         test_product = create_product(title="B tale")
         self.assertFalse(rng.contains_product(test_product))
+
+    def test_contains_products_delegates_to_contains_product(self):
+        rng = custom.create_range(CustomRange)
+        match = create_product(title="A tale")
+        nonmatch = create_product(title="B tale")
+        self.assertEqual(
+            {match.id}, rng.contains_products([match, nonmatch]))
@@ -0,0 +1,127 @@
+from decimal import Decimal as D
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from oscar.apps.offer import models
+from oscar.apps.offer.applicator import Applicator
+from oscar.apps.offer.index import OfferIndex
+from oscar.test.basket import add_product
+from oscar.test.factories import (
+    BasketFactory, BenefitFactory, CategoryFactory, ConditionalOfferFactory,
+    ConditionFactory, ProductCategoryFactory, ProductClassFactory,
+    ProductFactory, RangeFactory, create_product)
+
+
+def create_offer(name, range, proxy_class=None):
+    condition = ConditionFactory(
+        range=range, type=models.Condition.COUNT, value=1,
+        proxy_class=proxy_class)
+    benefit = BenefitFactory(
+        range=range, type=models.Benefit.PERCENTAGE, value=10)
+    return ConditionalOfferFactory(
+        name=name, condition=condition, benefit=benefit)
+
+
+class TestOfferIndex(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.index = OfferIndex()
+        self.basket = BasketFactory()
+
+    def get_candidates(self, *offers):
+        return self.index.get_candidate_offers(self.basket, offers)
+
+    def test_includes_offers_for_included_products(self):
+        product = create_product()
+        rng = RangeFactory(products=[product])
+        offer = create_offer('Product offer', rng)
+        other = create_offer('Other offer', RangeFactory(name='Other'))
+        add_product(self.basket, product=product)
+        self.assertEqual([offer], self.get_candidates(offer, other))
+
+    def test_includes_offers_for_parents_of_child_products(self):
+        parent = create_product(structure='parent')
+        child = create_product(parent=parent)
+        offer = create_offer('Parent offer', RangeFactory(products=[parent]))
+        add_product(self.basket, product=child)
+        self.assertEqual([offer], self.get_candidates(offer))
+
+    def test_includes_offers_for_product_classes(self):
+        product_class = ProductClassFactory(name='Shirts')
+        rng = RangeFactory()
+        rng.classes.add(product_class)
+        offer = create_offer('Class offer', rng)
+        add_product(self.basket, product=ProductFactory(
+            product_class=product_class))
+        self.assertEqual([offer], self.get_candidates(offer))
+
+    def test_includes_offers_for_ancestor_categories(self):
+        parent = CategoryFactory()
+        child = parent.add_child(name='Child')
+        rng = RangeFactory()
+        rng.included_categories.add(parent)
+        offer = create_offer('Category offer', rng)
+        product = ProductFactory(categories=None)
+        ProductCategoryFactory(product=product, category=child)
+        add_product(self.basket, product=product)
+        self.assertEqual([offer], self.get_candidates(offer))
+
+    def test_always_includes_unrestricted_offers(self):
+        all_products = create_offer(
+            'All products', RangeFactory(includes_all_products=True))
+        custom = create_offer(
+            'Custom', RangeFactory(name='Custom'),
+            proxy_class='tests._site.model_tests_app.models.BasketOwnerCalledBarry')
+        add_product(self.basket, product=create_product())
+        self.assertEqual(
+            [all_products, custom], self.get_candidates(all_products, custom))
+
+    def test_always_includes_offers_that_are_not_indexed(self):
+        offer = models.ConditionalOffer(name='Unsaved')
+        add_product(self.basket, product=create_product())
+        self.assertEqual([offer], self.get_candidates(offer))
+
+    def test_is_rebuilt_when_range_products_change(self):
+        product = create_product()
+        rng = RangeFactory()
+        offer = create_offer('Product offer', rng)
+        add_product(self.basket, product=product)
+        self.assertEqual([], self.get_candidates(offer))
+
+        rng.add_product(product)
+        self.assertEqual([offer], self.get_candidates(offer))
+
+    def test_is_rebuilt_when_a_category_is_moved(self):
+        parent = CategoryFactory()
+        other = CategoryFactory()
+        child = other.add_child(name='Child')
+        rng = RangeFactory()
+        rng.included_categories.add(parent)
+        offer = create_offer('Category offer', rng)
+        product = ProductFactory(categories=None)
+        ProductCategoryFactory(product=product, category=child)
+        add_product(self.basket, product=product)
+        self.assertEqual([], self.get_candidates(offer))
+
+        child.move(parent, 'last-child')
+        self.assertEqual([offer], self.get_candidates(offer))
+
+
+@override_settings(OSCAR_OFFERS_USE_INDEX=True)
+class TestApplicatorWithOfferIndex(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_applies_relevant_offers(self):
+        product = create_product()
+        offer = create_offer('Product offer', RangeFactory(products=[product]))
+        create_offer('Other offer', RangeFactory(name='Other'))
+        basket = BasketFactory()
+        add_product(basket, D('10.00'), product=product)
+
+        Applicator().apply(basket)
+        self.assertEqual([offer], list(basket.applied_offers().values()))
+        self.assertEqual(D('9.00'), basket.total_excl_tax)
@@ -0,0 +1,106 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.signals import request_finished
+from django.test import TestCase, override_settings
+
+from oscar.apps.offer.applicator import Applicator
+from oscar.apps.offer.profiling import (
+    OfferTimings, offer_profiled, offer_timings)
+from oscar.test.factories import create_basket, create_offer
+
+
+@override_settings(OSCAR_OFFERS_PROFILE=True)
+class TestOfferProfiling(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.offer = create_offer()
+        self.basket = create_basket()
+        self.profiles = []
+        offer_profiled.connect(self.receive_profile)
+
+    def tearDown(self):
+        offer_profiled.disconnect(self.receive_profile)
+
+    def receive_profile(self, sender, **kwargs):
+        self.profiles.append(kwargs)
+
+    def test_sends_a_profile_for_each_offer(self):
+        Applicator().apply_offers(self.basket, [self.offer])
+        self.assertEqual(1, len(self.profiles))
+        profile = self.profiles[0]
+        self.assertEqual(self.offer, profile['offer'])
+        self.assertEqual(self.basket, profile['basket'])
+        self.assertEqual(1, profile['num_applications'])
+        self.assertTrue(profile['duration'] > 0)
+        self.assertTrue(profile['num_queries'] > 0)
+        self.assertTrue(profile['num_contains_product'] > 0)
+
+    def test_records_timings(self):
+        offer_timings.clear()
+        Applicator().apply_offers(self.basket, [self.offer])
+        self.basket.reset_offer_applications()
+        Applicator().apply_offers(self.basket, [self.offer])
+        stats, = offer_timings.get_slowest()
+        self.assertEqual(self.offer.id, stats['offer_id'])
+        self.assertEqual(2, stats['count'])
+        self.assertEqual(2, stats['num_applications'])
+
+    @override_settings(OSCAR_OFFERS_PROFILE=False)
+    def test_is_disabled_by_default(self):
+        Applicator().apply_offers(self.basket, [self.offer])
+        self.assertEqual([], self.profiles)
+
+
+class TestOfferTimings(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.timings = OfferTimings()
+
+    def test_orders_offers_by_mean_duration(self):
+        fast = create_offer(name="Fast")
+        slow = create_offer(name="Slow")
+        self.timings.record(fast, 0.01)
+        self.timings.record(fast, 0.03)
+        self.timings.record(slow, 0.5)
+        slowest = self.timings.get_slowest()
+        self.assertEqual(["Slow", "Fast"], [s['name'] for s in slowest])
+        self.assertAlmostEqual(0.02, slowest[1]['mean_duration'])
+        self.assertAlmostEqual(0.03, slowest[1]['max_duration'])
+
+    def test_aggregates_over_buckets_within_the_window(self):
+        offer = create_offer()
+        with self.settings(OSCAR_OFFERS_PROFILE_WINDOW=120):
+            bucket = self.timings.get_bucket()
+            self.timings.record(offer, 0.1)
+            self.timings.flush()
+            cache.set('oscar-offer-timings-%d' % (bucket - 1),
+                      cache.get('oscar-offer-timings-%d' % bucket))
+            cache.set('oscar-offer-timings-%d' % (bucket - 20),
+                      cache.get('oscar-offer-timings-%d' % bucket))
+            stats, = self.timings.get_slowest()
+        self.assertEqual(2, stats['count'])
+
+    def test_writes_the_timings_of_a_request_once(self):
+        offer = create_offer()
+        with mock.patch('oscar.apps.offer.profiling.cache') as mock_cache:
+            mock_cache.get.return_value = None
+            self.timings.record(offer, 0.1)
+            self.timings.record(offer, 0.3)
+            self.assertFalse(mock_cache.set.called)
+            self.timings.flush()
+            self.timings.flush()
+        self.assertEqual(1, mock_cache.set.call_count)
+        timings = mock_cache.set.call_args[0][1]
+        self.assertEqual(2, timings[offer.id]['count'])
+        self.assertAlmostEqual(0.3, timings[offer.id]['max_duration'])
+
+    def test_is_written_when_a_request_finishes(self):
+        offer = create_offer()
+        offer_timings.clear()
+        offer_timings.record(offer, 0.1)
+        request_finished.send(sender=self.__class__)
+        self.assertIsNotNone(
+            cache.get('oscar-offer-timings-%d' % offer_timings.get_bucket()))
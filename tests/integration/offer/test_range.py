@@ -224,3 +224,66 @@ class TestRangeModel(TestCase):
         first_range.name = "Bar"
         first_range.save()
         models.Range.objects.create(name="Foo")
+
+
+class TestContainsProducts(TestCase):
+
+    def setUp(self):
+        self.range = models.Range.objects.create(name="Partial range")
+        self.parent = create_product(structure='parent')
+        self.child = create_product(structure='child', parent=self.parent)
+        self.product = create_product(product_class='Other')
+
+    def test_returns_empty_set_for_empty_range(self):
+        self.assertEqual(set(), self.range.contains_products(
+            [self.parent, self.child, self.product]))
+
+    def test_includes_children_of_included_products(self):
+        self.range.add_product(self.parent)
+        self.assertEqual({self.parent.id, self.child.id},
+                         self.range.contains_products(
+                             [self.parent, self.child, self.product]))
+
+    def test_matches_children_on_parent_class(self):
+        self.range.classes.add(self.parent.get_product_class())
+        self.assertEqual({self.parent.id, self.child.id},
+                         self.range.contains_products(
+                             [self.parent, self.child, self.product]))
+
+    def test_matches_descendant_categories(self):
+        parent_category = catalogue_models.Category.add_root(name="parent")
+        child_category = parent_category.add_child(name="child")
+        catalogue_models.ProductCategory.objects.create(
+            product=self.parent, category=child_category)
+        self.range.included_categories.add(parent_category)
+        self.assertEqual({self.parent.id, self.child.id},
+                         self.range.contains_products(
+                             [self.parent, self.child, self.product]))
+
+    def test_respects_excluded_products(self):
+        self.range.classes.add(self.parent.get_product_class())
+        self.range.excluded_products.add(self.parent)
+        self.assertEqual(set(), self.range.contains_products(
+            [self.parent, self.child]))
+
+    def test_agrees_with_contains_product(self):
+        category = catalogue_models.Category.add_root(name="root")
+        catalogue_models.ProductCategory.objects.create(
+            product=self.product, category=category)
+        self.range.included_categories.add(category)
+        self.range.add_product(self.child)
+        products = [self.parent, self.child, self.product]
+        expected = {product.id for product in products
+                    if self.range.contains_product(product)}
+        self.assertEqual(expected, self.range.contains_products(products))
+
+    def test_uses_a_constant_number_of_queries(self):
+        category = catalogue_models.Category.add_root(name="root")
+        self.range.included_categories.add(category)
+        self.range.classes.add(self.parent.get_product_class())
+        self.range.add_product(self.product)
+        products = [create_product(product_class='Books')
+                    for __ in range(10)]
+        rng = models.Range.objects.get(pk=self.range.pk)
+        with self.assertNumQueries(6):
+            rng.contains_products(products + [self.child])
@@ -0,0 +1,159 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from oscar.apps.offer import models
+from oscar.test.factories import (
+    CategoryFactory, ProductCategoryFactory, ProductClassFactory,
+    RangeFactory, create_product)
+
+
+def member_ids(range):
+    return set(range.memberships.values_list('product_id', flat=True))
+
+
+@override_settings(OSCAR_OFFERS_RANGE_MEMBERSHIP=True)
+class TestRangeMembership(TestCase):
+
+    def setUp(self):
+        self.range = RangeFactory()
+        self.parent = create_product(structure='parent')
+        self.child = create_product(structure='child', parent=self.parent)
+        self.product = create_product()
+
+    def test_includes_included_products_and_their_children(self):
+        self.range.add_product(self.parent)
+        self.assertEqual({self.parent.pk, self.child.pk},
+                         member_ids(self.range))
+
+        new_child = create_product(structure='child', parent=self.parent)
+        self.assertIn(new_child.pk, member_ids(self.range))
+
+    def test_removes_excluded_products(self):
+        self.range.add_product(self.product)
+        self.range.remove_product(self.product)
+        self.assertEqual(set(), member_ids(self.range))
+        self.assertFalse(self.range.contains_product(self.product))
+
+        self.range.add_product(self.product)
+        self.assertEqual({self.product.pk}, member_ids(self.range))
+
+    def test_includes_products_of_included_classes(self):
+        product_class = ProductClassFactory(name='Shirts')
+        self.range.classes.add(product_class)
+        product = create_product(product_class='Shirts')
+        self.assertEqual({product.pk}, member_ids(self.range))
+
+        self.range.classes.remove(product_class)
+        self.assertEqual(set(), member_ids(self.range))
+
+    def test_follows_category_assignments(self):
+        category = CategoryFactory()
+        subcategory = category.add_child(name='Child')
+        self.range.included_categories.add(category)
+
+        assignment = ProductCategoryFactory(
+            product=self.parent, category=subcategory)
+        self.assertEqual({self.parent.pk, self.child.pk},
+                         member_ids(self.range))
+
+        assignment.delete()
+        self.assertEqual(set(), member_ids(self.range))
+
+    def test_contains_product_loads_the_memberships_once(self):
+        self.range.add_product(self.parent)
+        rng = models.Range.objects.get(pk=self.range.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(rng.contains_product(self.child))
+            self.assertFalse(rng.contains_product(self.product))
+            self.assertEqual({self.parent.pk},
+                             rng.contains_products([self.parent, self.product]))
+
+    def test_is_only_read_once_synced(self):
+        rng = RangeFactory()
+        self.assertTrue(rng.memberships_synced)
+        self.assertTrue(rng.has_memberships)
+
+        models.Range.objects.filter(pk=rng.pk).update(memberships_synced=False)
+        rng = models.Range.objects.get(pk=rng.pk)
+        self.assertFalse(rng.has_memberships)
+        rng.add_product(self.product)
+        rng = models.Range.objects.get(pk=rng.pk)
+        self.assertFalse(rng.has_memberships)
+        self.assertTrue(rng.contains_product(self.product))
+
+    def test_follows_category_moves(self):
+        category = CategoryFactory(name='Shirts')
+        subcategory = category.add_child(name='Summer')
+        other = CategoryFactory(name='Trousers')
+        self.range.included_categories.add(category)
+        ProductCategoryFactory(product=self.parent, category=subcategory)
+        self.assertEqual({self.parent.pk, self.child.pk},
+                         member_ids(self.range))
+
+        subcategory.move(other, 'last-child')
+        self.assertEqual(set(), member_ids(self.range))
+
+        other_range = RangeFactory()
+        other_range.included_categories.add(other)
+        category.refresh_from_db()
+        subcategory.refresh_from_db()
+        subcategory.move(category, 'last-child')
+        self.assertEqual({self.parent.pk, self.child.pk},
+                         member_ids(self.range))
+        self.assertEqual(set(), member_ids(other_range))
+
+    def test_saving_a_category_only_syncs_ranges_of_its_ancestors(self):
+        category = CategoryFactory(name='Shirts')
+        other = CategoryFactory(name='Trousers')
+        self.range.included_categories.add(other)
+        rng = RangeFactory()
+        rng.included_categories.add(category)
+        ProductCategoryFactory(product=self.product, category=category)
+
+        with mock.patch.object(models.Range, 'sync_memberships') as sync:
+            category.name = 'Short sleeved shirts'
+            category.save()
+        sync.assert_called_once_with([self.product.pk])
+
+    def test_all_products_matches_the_unmaterialised_range(self):
+        category = CategoryFactory()
+        self.range.included_categories.add(category)
+        ProductCategoryFactory(product=self.product, category=category)
+        self.range.add_product(self.parent)
+
+        expected = {self.parent, self.child, self.product}
+        self.assertEqual(expected, set(self.range.all_products()))
+        self.assertEqual(3, self.range.num_products())
+        with self.settings(OSCAR_OFFERS_RANGE_MEMBERSHIP=False):
+            self.range.invalidate_cached_ids()
+            self.assertEqual(expected, set(self.range.all_products()))
+
+    def test_is_emptied_for_ranges_including_all_products(self):
+        self.range.add_product(self.product)
+        self.range.includes_all_products = True
+        self.range.save()
+        self.assertEqual(set(), member_ids(self.range))
+        self.assertTrue(self.range.contains_product(self.parent))
+
+    def test_deleting_a_product_removes_its_memberships(self):
+        self.range.add_product(self.product)
+        self.product.delete()
+        self.assertEqual(set(), member_ids(self.range))
+
+
+class TestUpdateRangeMembershipsCommand(TestCase):
+
+    def test_rebuilds_memberships(self):
+        product = create_product()
+        rng = RangeFactory(products=[product])
+        self.assertEqual(set(), member_ids(rng))
+        self.assertFalse(rng.memberships_synced)
+
+        with self.settings(OSCAR_OFFERS_RANGE_MEMBERSHIP=True):
+            call_command('oscar_update_range_memberships', stdout=StringIO())
+        self.assertEqual({product.pk}, member_ids(rng))
+        rng.refresh_from_db()
+        self.assertTrue(rng.memberships_synced)
@@ -5,7 +5,8 @@ import time
 import pytest
 from django.http import HttpRequest
 from django.test import TestCase, TransactionTestCase
-from django.test.utils import override_settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.contrib.auth.models import AnonymousUser
 
 from oscar.apps.catalogue.models import ProductClass, Product
@@ -13,12 +14,14 @@ from oscar.apps.checkout import calculators
 from oscar.apps.offer.utils import Applicator
 from oscar.apps.order.models import Order
 from oscar.apps.order.utils import OrderCreator
+from oscar.apps.partner.strategy import Default
 from oscar.apps.shipping.methods import Free, FixedPrice
 from oscar.apps.shipping.repository import Repository
 from oscar.apps.voucher.models import Voucher
 from oscar.core.loading import get_class
 from oscar.test import factories
 from oscar.test.basket import add_product
+from oscar.test.utils import RequestFactory
 from tests.utils import run_concurrently
 
 Range = get_class('offer.models', 'Range')
@@ -106,6 +109,20 @@ class TestSuccessfulOrderCreation(TestCase):
         line = order.lines.all()[0]
         self.assertEqual('A', line.status)
 
+    @override_settings(OSCAR_STRATEGY_MEMOIZE_PURCHASE_INFO=True)
+    def test_invalidates_purchase_info_memoized_by_the_strategy(self):
+        request = RequestFactory().get('/')
+        self.basket.strategy = Default(request)
+        product = factories.create_product(price=D('12.00'), num_in_stock=1)
+        add_product(self.basket, product=product)
+        self.assertTrue(self.basket.strategy.fetch_for_product(
+            product).availability.is_available_to_buy)
+
+        place_order(self.creator, basket=self.basket, order_number='1234')
+
+        info = self.basket.strategy.fetch_for_product(product)
+        self.assertFalse(info.availability.is_available_to_buy)
+
     def test_partner_name_is_optional(self):
         for partner_name, order_number in [('', 'A'), ('p1', 'B')]:
             self.basket = factories.create_basket(empty=True)
@@ -118,6 +135,86 @@ class TestSuccessfulOrderCreation(TestCase):
             self.assertTrue(partner_name == line.partner_name == partner.name)
 
 
+@override_settings(OSCAR_BULK_CREATE_ORDER_LINES=True)
+class TestBulkOrderCreation(TestCase):
+
+    def setUp(self):
+        self.creator = OrderCreator()
+        self.basket = factories.create_basket(empty=True)
+        self.option = factories.OptionFactory()
+
+    def add_products(self, num_products):
+        for i in range(num_products):
+            add_product(self.basket, D('10.00') + i, quantity=2)
+        line = self.basket.all_lines()[0]
+        factories.BasketLineAttributeFactory(
+            line=line, option=self.option, value='red')
+
+    def test_creates_lines_with_prices_and_attributes(self):
+        self.add_products(3)
+        order = place_order(self.creator, basket=self.basket,
+                            order_number='1234')
+        lines = list(order.lines.order_by('pk'))
+        self.assertEqual(3, len(lines))
+        for line, basket_line in zip(lines, self.basket.all_lines()):
+            self.assertEqual(basket_line.product, line.product)
+            self.assertEqual(basket_line.stockrecord, line.stockrecord)
+            self.assertEqual(2, line.quantity)
+            self.assertEqual(basket_line.line_price_incl_tax,
+                             line.line_price_incl_tax)
+            self.assertEqual([(2, basket_line.unit_price_excl_tax)],
+                             list(line.prices.values_list(
+                                 'quantity', 'price_excl_tax')))
+        self.assertEqual(['red'], [
+            attribute.value for attribute in lines[0].attributes.all()])
+
+    def test_allocates_stock(self):
+        self.add_products(2)
+        place_order(self.creator, basket=self.basket, order_number='1234')
+        for line in self.basket.all_lines():
+            line.stockrecord.refresh_from_db()
+            self.assertEqual(2, line.stockrecord.num_allocated)
+
+    def test_calls_the_additional_line_models_hook_for_each_line(self):
+        self.add_products(3)
+        created = []
+
+        class Creator(OrderCreator):
+            def create_additional_line_models(self, order, order_line,
+                                              basket_line):
+                created.append((order_line.pk, basket_line.pk))
+
+        order = place_order(Creator(), basket=self.basket,
+                            order_number='1234')
+        self.assertEqual(
+            list(order.lines.order_by('pk').values_list('pk', flat=True)),
+            [line_pk for line_pk, basket_line_pk in created])
+
+    def test_number_of_queries_does_not_depend_on_the_number_of_lines(self):
+        num_queries = []
+        for num_products in (1, 5):
+            self.basket = factories.create_basket(empty=True)
+            self.add_products(num_products)
+            order = factories.OrderFactory(basket=self.basket)
+            lines = self.basket.all_lines()
+            with CaptureQueriesContext(connection) as context:
+                self.creator.create_line_models_in_bulk(order, lines)
+            num_queries.append(len(context.captured_queries))
+        self.assertEqual(num_queries[0], num_queries[1])
+
+    def test_calls_overridden_line_hooks(self):
+        class CustomOrderCreator(OrderCreator):
+            def create_line_attributes(self, order, order_line, basket_line):
+                order_line.attributes.create(type='gift', value='yes')
+
+        self.add_products(2)
+        order = place_order(CustomOrderCreator(), basket=self.basket,
+                            order_number='1234')
+        self.assertEqual(
+            ['yes', 'yes'],
+            [line.attributes.get().value for line in order.lines.all()])
+
+
 class TestPlacingOrderForDigitalGoods(TestCase):
 
     def setUp(self):
@@ -1,4 +1,5 @@
 from decimal import Decimal as D
+from oscar.apps.partner.exceptions import InvalidStockAdjustment
 from oscar.core.loading import get_model
 
 from django.test import TestCase
@@ -7,6 +8,8 @@ from oscar.test import factories
 
 Partner = get_model('partner', 'Partner')
 PartnerAddress = get_model('partner', 'PartnerAddress')
+StockAlert = get_model('partner', 'StockAlert')
+StockRecord = get_model('partner', 'StockRecord')
 Country = get_model('address', 'Country')
 
 
@@ -54,6 +57,68 @@ class TestStockRecord(TestCase):
         self.assertEqual(0, self.stockrecord.num_allocated)
         self.assertEqual(10, self.stockrecord.num_in_stock)
 
+    def test_allocation_can_require_stock(self):
+        self.assertFalse(self.stockrecord.allocate(11, check_stock=True))
+        self.assertTrue(self.stockrecord.allocate(10, check_stock=True))
+        self.stockrecord.refresh_from_db()
+        self.assertEqual(10, self.stockrecord.num_allocated)
+        self.assertFalse(self.stockrecord.allocate(1, check_stock=True))
+
+    def test_allocations_are_not_lost_by_stale_objects(self):
+        stale = StockRecord.objects.get(pk=self.stockrecord.pk)
+        self.stockrecord.allocate(5)
+        stale.allocate(3)
+        stale.cancel_allocation(1)
+        self.stockrecord.refresh_from_db()
+        self.assertEqual(7, self.stockrecord.num_allocated)
+
+    def test_consuming_more_than_the_stored_allocation_fails(self):
+        stale = StockRecord.objects.get(pk=self.stockrecord.pk)
+        self.stockrecord.allocate(5)
+        stale.allocate(1)
+        self.stockrecord.consume_allocation(5)
+        with self.assertRaises(InvalidStockAdjustment):
+            stale.consume_allocation(6)
+
+    def test_alerts_are_only_checked_when_crossing_the_threshold(self):
+        self.stockrecord.low_stock_threshold = 5
+        self.stockrecord.save()
+        with self.assertNumQueries(1):
+            self.stockrecord.allocate(2)
+        self.stockrecord.allocate(4)
+        self.assertEqual(1, StockAlert.objects.filter(
+            stockrecord=self.stockrecord, status=StockAlert.OPEN).count())
+        self.stockrecord.cancel_allocation(6)
+        self.assertFalse(StockAlert.objects.filter(
+            stockrecord=self.stockrecord, status=StockAlert.OPEN).exists())
+
+
+class TestBulkStockAllocation(TestCase):
+
+    def setUp(self):
+        self.stockrecords = [
+            factories.create_stockrecord(
+                factories.create_product(), num_in_stock=num_in_stock)
+            for num_in_stock in (5, 10)]
+
+    def test_allocates_all_stockrecords_in_one_statement(self):
+        allocations = [(self.stockrecords[0], 2), (self.stockrecords[1], 3),
+                       (self.stockrecords[0], 1)]
+        with self.assertNumQueries(1):
+            self.assertTrue(StockRecord.objects.allocate(allocations))
+        self.assertEqual(3, self.stockrecords[0].num_allocated)
+        for stockrecord, num_allocated in zip(self.stockrecords, (3, 3)):
+            stockrecord.refresh_from_db()
+            self.assertEqual(num_allocated, stockrecord.num_allocated)
+
+    def test_allocates_nothing_without_enough_stock(self):
+        allocations = [(self.stockrecords[0], 6), (self.stockrecords[1], 3)]
+        self.assertFalse(StockRecord.objects.allocate(
+            allocations, check_stock=True))
+        for stockrecord in self.stockrecords:
+            stockrecord.refresh_from_db()
+            self.assertIsNone(stockrecord.num_allocated)
+
 
 class TestStockRecordNoStockTrack(TestCase):
 
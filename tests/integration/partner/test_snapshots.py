@@ -0,0 +1,155 @@
+import datetime
+from decimal import Decimal as D
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from oscar.apps.catalogue.models import Product
+from oscar.apps.partner import strategy
+from oscar.apps.partner.models import ProductPriceSnapshot
+from oscar.apps.partner.snapshots import PriceSnapshotUpdater
+from oscar.apps.search.search_indexes import ProductIndex
+from oscar.test import factories
+from oscar.test.utils import RequestFactory
+
+
+@override_settings(OSCAR_PRICE_SNAPSHOTS=True)
+class TestPriceSnapshotUpdater(TestCase):
+
+    def setUp(self):
+        self.product = factories.create_product(
+            price=D('12.00'), num_in_stock=5)
+        self.parent = factories.create_product(structure='parent')
+        for price in (D('10.00'), D('30.00')):
+            factories.create_product(
+                parent=self.parent, price=price, num_in_stock=1)
+        factories.create_product(parent=self.parent)
+
+    def test_records_price_and_availability_of_products(self):
+        PriceSnapshotUpdater().update([self.product])
+        snapshot = ProductPriceSnapshot.objects.get(product=self.product)
+        self.assertEqual(self.product.stockrecords.get(), snapshot.stockrecord)
+        self.assertEqual(D('12.00'), snapshot.price_excl_tax)
+        self.assertEqual(D('12.00'), snapshot.price_incl_tax)
+        self.assertEqual('instock', snapshot.availability_code)
+        self.assertTrue(snapshot.is_available_to_buy)
+        self.assertEqual(5, snapshot.num_available)
+        self.assertEqual(5, snapshot.num_in_stock)
+
+    def test_records_price_range_of_parents(self):
+        PriceSnapshotUpdater().update([self.parent])
+        snapshot = ProductPriceSnapshot.objects.get(product=self.parent)
+        info = strategy.Default().fetch_for_parent(self.parent)
+        self.assertIsNone(snapshot.stockrecord)
+        self.assertEqual(info.price.excl_tax, snapshot.price_excl_tax)
+        self.assertEqual(D('10.00'), snapshot.min_price_excl_tax)
+        self.assertEqual(D('30.00'), snapshot.max_price_excl_tax)
+        self.assertTrue(snapshot.is_available_to_buy)
+        self.assertIsNone(snapshot.num_available)
+
+    def test_records_products_without_stockrecords(self):
+        product = factories.ProductFactory(stockrecords=[])
+        PriceSnapshotUpdater().update([product])
+        snapshot = ProductPriceSnapshot.objects.get(product=product)
+        self.assertIsNone(snapshot.price_excl_tax)
+        self.assertFalse(snapshot.is_available_to_buy)
+        self.assertIsNone(snapshot.num_in_stock)
+
+    def test_updating_a_child_updates_its_parent(self):
+        child = self.parent.children.first()
+        PriceSnapshotUpdater().update_for_product_ids([child.id])
+        self.assertEqual(
+            {child.id, self.parent.id},
+            set(ProductPriceSnapshot.objects.values_list(
+                'product_id', flat=True)))
+
+    def test_command_rebuilds_all_snapshots(self):
+        call_command('oscar_update_price_snapshots', stdout=StringIO())
+        self.assertEqual(5, ProductPriceSnapshot.objects.count())
+
+
+@override_settings(OSCAR_PRICE_SNAPSHOTS=True)
+class TestStrategyReadingPriceSnapshots(TestCase):
+
+    def setUp(self):
+        self.parent = factories.create_product(structure='parent')
+        self.child = factories.create_product(
+            parent=self.parent, price=D('10.00'), num_in_stock=1)
+        PriceSnapshotUpdater().update([self.parent])
+        # Change the stock without updating the snapshot
+        self.child.stockrecords.update(num_in_stock=0)
+        self.parent = Product.objects.get(pk=self.parent.pk)
+        self.strategy = strategy.Default(RequestFactory().get('/'))
+
+    def test_reads_parents_from_their_snapshot(self):
+        info = self.strategy.fetch_for_parent(self.parent)
+        self.assertTrue(info.availability.is_available_to_buy)
+        self.assertEqual(D('10.00'), info.price.excl_tax)
+
+    def test_fetches_parents_without_querying_children(self):
+        parents = [self.parent]
+        with self.assertNumQueries(1):
+            infos = self.strategy.fetch_for_parents(parents)
+        self.assertTrue(infos[self.parent.id].availability.is_available_to_buy)
+
+    def test_search_index_reads_prices_from_snapshots(self):
+        PriceSnapshotUpdater().update([self.child])
+        self.child.stockrecords.update(
+            price_excl_tax=D('20.00'), num_in_stock=3)
+        child = Product.objects.get(pk=self.child.pk)
+        index = ProductIndex()
+        self.assertEqual(D('10.00'), index.prepare_price(child))
+        # Stock levels are read from the stockrecord, as allocating stock
+        # doesn't update snapshots
+        self.assertEqual(3, index.prepare_num_in_stock(child))
+        with self.settings(OSCAR_PRICE_SNAPSHOTS=False):
+            self.assertEqual(D('20.00'), index.prepare_price(child))
+
+    def test_ignores_stale_snapshots(self):
+        ProductPriceSnapshot.objects.update(
+            date_updated=timezone.now() - datetime.timedelta(days=2))
+        info = self.strategy.fetch_for_parent(self.parent)
+        self.assertFalse(info.availability.is_available_to_buy)
+
+    def test_ignores_snapshots_for_authenticated_users(self):
+        user = factories.UserFactory()
+        request = RequestFactory().get('/', user=user)
+        info = strategy.Default(request).fetch_for_parent(self.parent)
+        self.assertFalse(info.availability.is_available_to_buy)
+
+    def test_ignores_snapshots_when_disabled(self):
+        with self.settings(OSCAR_PRICE_SNAPSHOTS=False):
+            info = self.strategy.fetch_for_parent(self.parent)
+        self.assertFalse(info.availability.is_available_to_buy)
+
+
+class TestPriceSnapshotReceivers(TransactionTestCase):
+
+    @override_settings(OSCAR_PRICE_SNAPSHOTS=True)
+    def test_saving_a_stockrecord_updates_the_snapshot(self):
+        product = factories.create_product(price=D('12.00'), num_in_stock=5)
+        stockrecord = product.stockrecords.get()
+        stockrecord.price_excl_tax = D('15.00')
+        stockrecord.save()
+        snapshot = ProductPriceSnapshot.objects.get(product=product)
+        self.assertEqual(D('15.00'), snapshot.price_excl_tax)
+
+        product.delete()
+        self.assertFalse(ProductPriceSnapshot.objects.exists())
+
+    @override_settings(OSCAR_PRICE_SNAPSHOTS=True)
+    def test_allocating_stock_only_updates_the_snapshot_when_it_runs_out(self):
+        product = factories.create_product(price=D('12.00'), num_in_stock=5)
+        stockrecord = product.stockrecords.get()
+        with mock.patch.object(PriceSnapshotUpdater,
+                               'update_for_product_ids') as update:
+            stockrecord.allocate(2)
+            stockrecord.consume_allocation(2)
+            stockrecord.save(update_fields=['low_stock_threshold'])
+            self.assertFalse(update.called)
+
+            stockrecord.allocate(3)
+            update.assert_called_once_with([product.id])
@@ -1,9 +1,10 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from decimal import Decimal as D
 
 from oscar.apps.partner import strategy
 from oscar.apps.catalogue import models
 from oscar.test import factories
+from oscar.test.utils import RequestFactory
 from oscar.apps.basket.models import Line
 
 
@@ -118,6 +119,105 @@ class TestDefaultStrategyForParentProductWithOutOfStockVariant(TestCase):
         self.assertEqual(D('10.00'), self.info.price.incl_tax)
 
 
+class TestFetchingPurchaseInfoForManyProducts(TestCase):
+
+    def setUp(self):
+        self.strategy = strategy.Default()
+
+    def test_fetches_products_in_a_constant_number_of_queries(self):
+        for i in range(5):
+            factories.create_product(price=D('1.00') + i, num_in_stock=i)
+        products = list(models.Product.objects.all())
+
+        with self.assertNumQueries(2):
+            infos = self.strategy.fetch_for_products(products)
+        with self.assertNumQueries(0):
+            for product in products:
+                self.strategy.fetch_for_product(product)
+
+        self.assertEqual(5, len(infos))
+        for product in products:
+            expected = strategy.Default().fetch_for_product(product)
+            info = infos[product.id]
+            self.assertEqual(expected.stockrecord, info.stockrecord)
+            self.assertEqual(expected.price.excl_tax, info.price.excl_tax)
+            self.assertEqual(expected.availability.code,
+                             info.availability.code)
+
+    def test_fetches_parents_in_a_constant_number_of_queries(self):
+        for i in range(3):
+            parent = factories.create_product(structure='parent')
+            factories.create_product(parent=parent, price=D('10.00'),
+                                     num_in_stock=i)
+            factories.create_product(parent=parent)
+        parents = list(models.Product.objects.filter(structure='parent'))
+
+        with self.assertNumQueries(3):
+            infos = self.strategy.fetch_for_parents(parents)
+
+        self.assertEqual(3, len(infos))
+        availability = sorted(
+            info.availability.is_available_to_buy for info in infos.values())
+        self.assertEqual([False, True, True], availability)
+        for info in infos.values():
+            self.assertEqual(D('10.00'), info.price.excl_tax)
+
+
+@override_settings(OSCAR_STRATEGY_MEMOIZE_PURCHASE_INFO=True)
+class TestMemoizingPurchaseInfo(TestCase):
+
+    def setUp(self):
+        self.strategy = strategy.Default(RequestFactory().get('/'))
+        self.product = factories.create_product(
+            price=D('1.99'), num_in_stock=4)
+
+    def test_fetches_each_product_once_per_request(self):
+        info = self.strategy.fetch_for_product(self.product)
+        product = models.Product.objects.get(pk=self.product.pk)
+        with self.assertNumQueries(0):
+            self.assertIs(info, self.strategy.fetch_for_product(product))
+
+    def test_memoizes_per_stockrecord(self):
+        stockrecord = self.product.stockrecords.get()
+        other = factories.StockRecordFactory(
+            product=self.product, price_excl_tax=D('5.00'))
+        self.assertEqual(D('1.99'), self.strategy.fetch_for_product(
+            self.product, stockrecord).price.excl_tax)
+        self.assertEqual(D('5.00'), self.strategy.fetch_for_product(
+            self.product, other).price.excl_tax)
+
+    def test_memoizes_parents(self):
+        parent = factories.create_product(structure='parent')
+        factories.create_product(parent=parent, price=D('10.00'),
+                                 num_in_stock=1)
+        info = self.strategy.fetch_for_parent(parent)
+        with self.assertNumQueries(0):
+            self.assertIs(info, self.strategy.fetch_for_parent(parent))
+
+    def test_invalidating_a_product_recomputes_its_info(self):
+        info = self.strategy.fetch_for_product(self.product)
+        self.strategy.invalidate_purchase_info(self.product)
+        self.assertIsNot(info, self.strategy.fetch_for_product(self.product))
+
+    def test_invalidating_a_child_recomputes_its_parent(self):
+        parent = factories.create_product(structure='parent')
+        child = factories.create_product(parent=parent, price=D('10.00'),
+                                         num_in_stock=1)
+        info = self.strategy.fetch_for_parent(parent)
+        self.strategy.invalidate_purchase_info(child)
+        self.assertIsNot(info, self.strategy.fetch_for_parent(parent))
+
+    def test_does_not_memoize_without_a_request(self):
+        offline = strategy.Default()
+        info = offline.fetch_for_product(self.product)
+        self.assertIsNot(info, offline.fetch_for_product(self.product))
+
+    def test_strategies_can_disable_memoizing(self):
+        self.strategy.memoize_purchase_info = False
+        info = self.strategy.fetch_for_product(self.product)
+        self.assertIsNot(info, self.strategy.fetch_for_product(self.product))
+
+
 class TestFixedRateTax(TestCase):
 
     def test_pricing_policy_unavailable_if_no_price_excl_tax(self):
@@ -0,0 +1,104 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from haystack.views import SearchView
+
+from oscar.apps.search.cache import (
+    CachedResult, CachedSearchResults, invalidate_search_results)
+from oscar.apps.search.forms import SearchForm
+from oscar.apps.search.search_handlers import SearchHandler
+from oscar.core.loading import get_model
+from oscar.test import factories
+
+Product = get_model('catalogue', 'Product')
+
+
+class ProductSearchHandler(SearchHandler):
+    form_class = SearchForm
+    model_whitelist = [Product]
+    paginate_by = 2
+
+
+class TestCachedSearchResults(TestCase):
+
+    def test_is_paginated_like_the_cached_page(self):
+        results = CachedSearchResults(
+            5, 2, [CachedResult(Product, 3), CachedResult(Product, 4)], {})
+        page = Paginator(results, 2).page(2)
+        self.assertEqual(5, page.paginator.count)
+        self.assertEqual([3, 4], [result.pk for result in page.object_list])
+
+
+@override_settings(OSCAR_SEARCH_CACHE_RESULTS=True)
+class TestSearchHandlerCache(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.products = [
+            factories.create_product(title='Widget %d' % i) for i in range(3)]
+
+    def search(self, query_string):
+        with mock.patch.object(
+                ProductSearchHandler, 'get_search_results',
+                autospec=True,
+                side_effect=SearchHandler.get_search_results) as search:
+            handler = ProductSearchHandler(QueryDict(query_string), '/')
+            objects = handler.get_paginated_objects()
+        return handler, objects, search.call_count
+
+    def test_caches_pages_of_results(self):
+        handler, objects, num_searches = self.search('q=widget&page=2')
+        self.assertEqual(1, num_searches)
+
+        cached_handler, cached_objects, num_searches = self.search(
+            'q=%20Widget%20&page=2&utm_source=mail')
+        self.assertEqual(0, num_searches)
+        self.assertEqual(objects, cached_objects)
+        self.assertEqual(3, cached_handler.paginator.count)
+        self.assertEqual(2, cached_handler.page.number)
+
+    def test_keys_pages_by_query_and_page(self):
+        self.search('q=widget')
+        self.assertEqual(1, self.search('q=widget&page=2')[2])
+        self.assertEqual(1, self.search('q=gadget')[2])
+
+    def test_reindexing_invalidates_the_cache(self):
+        self.search('q=widget')
+        invalidate_search_results()
+        self.assertEqual(1, self.search('q=widget')[2])
+
+    def test_drops_deleted_products(self):
+        __, objects, __ = self.search('q=widget')
+        objects[0].delete()
+        __, cached_objects, __ = self.search('q=widget')
+        self.assertEqual(objects[1:], cached_objects)
+
+    def test_caches_pages_of_the_search_view(self):
+        url = reverse('search:search')
+        with mock.patch.object(
+                SearchView, 'get_results', autospec=True,
+                side_effect=SearchView.get_results) as search:
+            response = self.client.get(url, {'q': 'widget'})
+            cached_response = self.client.get(url, {'q': 'WIDGET'})
+        self.assertEqual(1, search.call_count)
+        self.assertEqual(3, cached_response.context['paginator'].count)
+        self.assertEqual(
+            [result.object for result in response.context['page'].object_list],
+            [result.object
+             for result in cached_response.context['page'].object_list])
+
+    def test_search_view_drops_deleted_products(self):
+        url = reverse('search:search')
+        response = self.client.get(url, {'q': 'widget'})
+        objects = [
+            result.object for result in response.context['page'].object_list]
+        objects[0].delete()
+        cached_response = self.client.get(url, {'q': 'widget'})
+        self.assertEqual(
+            objects[1:],
+            [result.object
+             for result in cached_response.context['page'].object_list])
@@ -0,0 +1,159 @@
+from unittest import mock
+
+from django.http import QueryDict
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from oscar.apps.catalogue.categories import create_from_breadcrumbs
+from oscar.apps.catalogue.search_handlers import (
+    DatabaseProductSearchHandler, get_product_search_handler_class)
+from oscar.apps.search.documents import ProductDocumentBuilder
+from oscar.apps.search.fulltext import FullTextBackend, get_full_text_backend
+from oscar.core.loading import get_model
+from oscar.test import factories
+
+Category = get_model('catalogue', 'Category')
+Product = get_model('catalogue', 'Product')
+ProductCategory = get_model('catalogue', 'ProductCategory')
+ProductSearchDocument = get_model('search', 'ProductSearchDocument')
+
+
+class TestProductDocumentBuilder(TestCase):
+
+    def test_builds_documents_of_browsable_products(self):
+        parent = factories.create_product(
+            title='Shirt', structure='parent', product_class='Clothing',
+            attributes={'material': 'cotton'})
+        factories.create_product(
+            title='Large shirt', parent=parent, upc='SHIRT-L',
+            product_class='Clothing', attributes={'material': 'linen'})
+        ProductCategory.objects.create(
+            product=parent,
+            category=create_from_breadcrumbs('Clothes > Summer'))
+
+        self.assertEqual(1, ProductDocumentBuilder().rebuild())
+        document = ProductSearchDocument.objects.get().document
+        for text in ['Shirt', 'cotton', 'Large shirt', 'SHIRT-L', 'linen',
+                     'Clothes', 'Summer']:
+            self.assertIn(text, document)
+
+
+@override_settings(OSCAR_SEARCH_FULLTEXT=True)
+class TestDatabaseProductSearchHandler(TestCase):
+
+    def setUp(self):
+        get_full_text_backend().install()
+        self.widget = factories.create_product(
+            title='Red widget', product_class='Tools', rating=4.0)
+        self.widgets = factories.create_product(
+            title='Widget widget', product_class='Toys', rating=2.0)
+        self.gadget = factories.create_product(
+            title='Blue gadget', product_class='Tools',
+            attributes={'material': 'steel widget'})
+        self.other = factories.create_product(title='Lamp')
+        ProductDocumentBuilder().rebuild()
+
+    def search(self, query_string):
+        handler = DatabaseProductSearchHandler(QueryDict(query_string), '/')
+        return handler, list(handler.get_queryset())
+
+    def test_is_used_without_a_haystack_backend(self):
+        self.assertEqual(
+            DatabaseProductSearchHandler, get_product_search_handler_class())
+
+    def test_ranks_matching_products(self):
+        __, products = self.search('q=widget')
+        self.assertEqual(self.widgets, products[0])
+        self.assertEqual({self.widget, self.widgets, self.gadget}, set(products))
+
+    def test_requires_every_term(self):
+        self.assertEqual([self.widget], self.search('q=red+widget')[1])
+        self.assertEqual([], self.search('q=red+OR+blue')[1])
+
+    def test_escapes_query_syntax(self):
+        self.assertEqual([self.widget], self.search('q=%22red*')[1])
+
+    def test_counts_and_filters_facets(self):
+        handler, __ = self.search('q=widget')
+        self.assertEqual([('Tools', 2), ('Toys', 1)],
+                         handler.facet_counts['fields']['product_class'])
+
+        handler, products = self.search(
+            'q=widget&selected_facets=product_class_exact:Tools'
+            '&selected_facets=rating_exact:invalid')
+        self.assertEqual({self.widget, self.gadget}, set(products))
+        self.assertEqual([('Tools', 2)],
+                         handler.facet_counts['fields']['product_class'])
+
+    def test_sorts_products(self):
+        __, products = self.search('q=widget&sort_by=title-asc')
+        self.assertEqual([self.gadget, self.widget, self.widgets], products)
+
+    def test_portable_backend_requires_every_term(self):
+        backend = FullTextBackend()
+        products = backend.rank(
+            backend.filter(Product.objects.all(), 'WIDGET steel'), 'widget')
+        self.assertEqual([self.gadget], list(products))
+
+    def test_searches_the_catalogue(self):
+        response = self.client.get(reverse('catalogue:index'), {'q': 'lamp'})
+        self.assertEqual([self.other], list(response.context['products']))
+
+    def test_is_used_by_the_search_box(self):
+        response = self.client.get(reverse('search:search'), {'q': 'lamp'})
+        self.assertEqual([self.other], list(response.context['products']))
+        self.assertEqual('Products matching "lamp"', response.context['summary'])
+
+    def test_browses_all_products_without_a_query(self):
+        handler, products = self.search('')
+        self.assertEqual(4, len(products))
+        context = handler.get_search_context_data('products')
+        self.assertTrue(context['has_facets'])
+
+
+@override_settings(OSCAR_SEARCH_FULLTEXT=True)
+class TestSearchDocumentReceivers(TransactionTestCase):
+
+    def setUp(self):
+        self.backend = get_full_text_backend()
+        self.backend.install()
+
+    def tearDown(self):
+        self.backend.uninstall()
+
+    def test_keeps_documents_up_to_date(self):
+        product = factories.create_product(title='Red widget')
+        self.assertIn('Red widget', product.search_document.document)
+
+        ProductCategory.objects.create(
+            product=product, category=create_from_breadcrumbs('Tools'))
+        product.search_document.refresh_from_db()
+        self.assertIn('Tools', product.search_document.document)
+
+        product.delete()
+        self.assertFalse(ProductSearchDocument.objects.exists())
+
+    def test_keeps_category_names_up_to_date(self):
+        product = factories.create_product(title='Red widget')
+        ProductCategory.objects.create(
+            product=product,
+            category=create_from_breadcrumbs('Tools > Hammers'))
+        tools = Category.objects.get(name='Tools')
+        tools.name = 'Hardware'
+        tools.save()
+        product.search_document.refresh_from_db()
+        self.assertIn('Hardware', product.search_document.document)
+        self.assertNotIn('Tools', product.search_document.document)
+
+        with mock.patch.object(ProductDocumentBuilder, 'update') as update:
+            tools.description = 'Tools for the house'
+            tools.save()
+            tools.save(update_fields=['description'])
+        self.assertFalse(update.called)
+
+        garden = create_from_breadcrumbs('Garden')
+        hammers = Category.objects.get(name='Hammers')
+        hammers.move(garden, 'last-child')
+        product.search_document.refresh_from_db()
+        self.assertIn('Garden', product.search_document.document)
+        self.assertNotIn('Hardware', product.search_document.document)
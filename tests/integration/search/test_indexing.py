@@ -0,0 +1,158 @@
+from decimal import Decimal as D
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from oscar.apps.catalogue.categories import create_from_breadcrumbs
+from oscar.apps.catalogue.models import Product, ProductCategory
+from oscar.apps.search.indexing import ProductIndexer
+from oscar.apps.search.models import ProductChange
+from oscar.apps.search.search_indexes import ProductIndex
+from oscar.test import factories
+
+
+class TestPreparingProductsInBatches(TestCase):
+
+    def setUp(self):
+        self.category = create_from_breadcrumbs('Books > Fiction')
+
+    def create_products(self, num_products):
+        for i in range(num_products):
+            product = factories.create_product(
+                price=D('10.00') + i, num_in_stock=i)
+            ProductCategory.objects.create(
+                product=product, category=self.category)
+        parent = factories.create_product(structure='parent')
+        factories.create_product(parent=parent, price=D('5.00'))
+
+    def prepare_products(self):
+        index = ProductIndex()
+        products = list(index.index_queryset().order_by('pk'))
+        with CaptureQueriesContext(connection) as context:
+            data = [index.full_prepare(product)
+                    for product in index.prepare_batch(products)]
+        return data, len(context.captured_queries)
+
+    def test_prepares_price_stock_and_categories(self):
+        self.create_products(2)
+        data, __ = self.prepare_products()
+        self.assertEqual([D('10.00'), D('11.00'), D('5.00')],
+                         [item['price'] for item in data])
+        self.assertEqual(
+            [0, 1, None], [item.get('num_in_stock') for item in data])
+        self.assertEqual(['Books > Fiction'], data[0]['category'])
+
+    def test_number_of_queries_does_not_depend_on_the_number_of_products(self):
+        self.create_products(2)
+        __, few_queries = self.prepare_products()
+        self.create_products(8)
+        __, many_queries = self.prepare_products()
+        self.assertEqual(few_queries, many_queries)
+
+    def test_fetches_purchase_info_once_per_product(self):
+        self.create_products(1)
+        product = Product.objects.filter(structure='standalone').get()
+        index = ProductIndex()
+        with mock.patch.object(
+                index.get_strategy(), 'fetch_for_product',
+                wraps=index.get_strategy().fetch_for_product) as fetch:
+            index.full_prepare(product)
+        self.assertEqual(1, fetch.call_count)
+
+
+class TestProductIndexer(TestCase):
+
+    def setUp(self):
+        self.products = [factories.create_product(price=D('10.00'))
+                         for __ in range(5)]
+
+    def test_indexes_products_in_batches(self):
+        backend = mock.Mock()
+        indexer = ProductIndexer(batch_size=2)
+        with mock.patch('oscar.apps.search.indexing.connections', {'default': mock.Mock(
+                get_backend=mock.Mock(return_value=backend),
+                get_unified_index=mock.Mock(return_value=mock.Mock(
+                    get_index=mock.Mock(return_value=ProductIndex()))))}):
+            self.assertEqual(5, indexer.run())
+        batches = [list(call[0][1]) for call in backend.update.call_args_list]
+        self.assertEqual([2, 2, 1], [len(batch) for batch in batches])
+        self.assertEqual(
+            [product.pk for product in self.products],
+            [product.pk for batch in batches for product in batch])
+
+    def test_splits_products_into_ranges(self):
+        pks = [product.pk for product in self.products]
+        ranges = ProductIndexer().get_ranges(2)
+        self.assertEqual([(None, pks[2]), (pks[2], pks[4])], ranges)
+
+
+@override_settings(OSCAR_SEARCH_CHANGE_JOURNAL=True)
+class TestIndexingProductChanges(TestCase):
+
+    def setUp(self):
+        self.product = factories.create_product(price=D('10.00'))
+        self.parent = factories.create_product(structure='parent')
+        self.child = factories.create_product(
+            parent=self.parent, price=D('5.00'))
+        ProductChange.objects.all().delete()
+        self.backend = mock.Mock()
+        self.connections = {'default': mock.Mock(
+            get_backend=mock.Mock(return_value=self.backend),
+            get_unified_index=mock.Mock(return_value=mock.Mock(
+                get_index=mock.Mock(return_value=ProductIndex()))))}
+
+    def index_changes(self):
+        with mock.patch('oscar.apps.search.indexing.connections',
+                        self.connections):
+            return ProductIndexer().index_changes()
+
+    def get_updated_ids(self):
+        return {product.pk for call in self.backend.update.call_args_list
+                for product in call[0][1]}
+
+    def test_journals_changes_to_stockrecords_and_categories(self):
+        stockrecord = self.product.stockrecords.get()
+        stockrecord.num_in_stock = 3
+        stockrecord.save()
+        ProductCategory.objects.create(
+            product=self.product,
+            category=create_from_breadcrumbs('Books'))
+        self.assertEqual(
+            [self.product.pk, self.product.pk],
+            list(ProductChange.objects.values_list('product_id', flat=True)))
+
+    def test_updates_parents_of_changed_children(self):
+        self.child.stockrecords.get().save()
+        self.product.save()
+        self.assertEqual(2, self.index_changes())
+        self.assertEqual({self.parent.pk, self.product.pk},
+                         self.get_updated_ids())
+        self.assertFalse(ProductChange.objects.exists())
+
+    def test_keeps_changes_committed_while_indexing(self):
+        ProductChange.objects.create(pk=10, product_id=self.product.pk)
+        ProductChange.objects.create(pk=12, product_id=self.product.pk)
+
+        def commit_change(*args):
+            # A concurrent transaction commits a change with a lower pk
+            if not ProductChange.objects.filter(pk=11).exists():
+                ProductChange.objects.create(pk=11, product_id=self.product.pk)
+        self.backend.update.side_effect = commit_change
+
+        self.assertEqual(3, self.index_changes())
+        self.assertEqual(2, self.backend.update.call_count)
+        self.assertFalse(ProductChange.objects.exists())
+
+    def test_removes_deleted_products(self):
+        product_id = self.product.pk
+        self.product.delete()
+        self.index_changes()
+        self.assertEqual(set(), self.get_updated_ids())
+        self.backend.remove.assert_any_call('catalogue.product.%s' % product_id)
+
+    def test_does_not_journal_changes_when_disabled(self):
+        with self.settings(OSCAR_SEARCH_CHANGE_JOURNAL=False):
+            self.product.save()
+        self.assertFalse(ProductChange.objects.exists())